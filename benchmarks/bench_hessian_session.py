@@ -0,0 +1,57 @@
+'''
+This script benchmarks the amortized latency of a HessianSession against obtainHessian.
+
+For chains of increasing size it computes the Hessian of several perturbed configurations,
+building the simulation on every call with obtainHessian and reusing the simulation dictionary
+with a HessianSession, and prints the average time per Hessian of both. pyUAMMD is used when it
+is installed, and the local simulation otherwise.
+
+Example
+-------
+>>> python bench_hessian_session.py
+'''
+
+import time
+import numpy as np
+from hydrodynamic_int.hessian import obtainHessian, HessianSession
+
+try:
+    import pyUAMMD
+    simulation_factory = None
+except ImportError:
+    from hydrodynamic_int.local_simulation import LocalSimulation as simulation_factory
+
+def create_chain(nparticles):
+    '''
+    Straight chain of particles joined by harmonic bonds.
+    '''
+    positions = np.zeros((nparticles, 3))
+    positions[:, 0] = np.arange(nparticles)
+    bonds = {
+        "pairbonds": {
+            "type": ["Bond2", "Harmonic"],
+            "parameters": {},
+            "labels": ["id_i", "id_j", "K", "r0"],
+            "data": [[i, i + 1, 1.0, 1.0] for i in range(nparticles - 1)]
+        }
+    }
+    return positions, bonds
+
+ncalls = 10
+rng = np.random.default_rng(0)
+print(f"{'particles':>10} {'obtainHessian (ms)':>19} {'session (ms)':>13}")
+for nparticles in [10, 30, 100]:
+    positions, bonds = create_chain(nparticles)
+    configurations = positions + 0.05 * rng.normal(size=(ncalls, nparticles, 3))
+
+    start = time.perf_counter()
+    for configuration in configurations:
+        obtainHessian(configuration.tolist(), bonds, simulation_factory)
+    single_latency = (time.perf_counter() - start) / ncalls
+
+    with HessianSession(bonds, nparticles, simulation_factory) as session:
+        for configuration in configurations:
+            session.compute(configuration)
+        session_latency = session.amortized_latency
+
+    print(f"{nparticles:>10} {1e3*single_latency:>19.2f} {1e3*session_latency:>13.2f}")
@@ -0,0 +1,38 @@
+'''
+This script benchmarks the import time of the packages in a fresh interpreter.
+
+Every import is timed in a new process, so nothing is cached between repetitions. The first row is
+the interpreter with numpy only, which is the floor of the other rows. The last rows access a name
+of hydrodynamic_int, which imports the submodule (and scipy) defining it.
+
+Example
+-------
+>>> python bench_imports.py
+'''
+
+import subprocess
+import sys
+import numpy as np
+
+def import_time(statement, repeats=5):
+    '''
+    Best time in seconds of running a statement in a new interpreter.
+    '''
+    code = f"import time\nstart = time.perf_counter()\n{statement}\nprint(time.perf_counter() - start)"
+    best = np.inf
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        best = min(best, float(result.stdout.split()[-1]))
+    return best
+
+statements = [
+    'import numpy',
+    'import particles_mod',
+    'import hydrodynamic_int',
+    'import particles_mod, hydrodynamic_int',
+    'import hydrodynamic_int; hydrodynamic_int.obtainHessian',
+    'import hydrodynamic_int; hydrodynamic_int.relaxation_modes',
+]
+print(f"{'statement':>60} {'time (ms)':>10}")
+for statement in statements:
+    print(f"{statement:>60} {1e3*import_time(statement):>10.1f}")
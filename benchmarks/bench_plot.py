@@ -0,0 +1,69 @@
+'''
+This script benchmarks the rendering time of Particles.plot across system sizes.
+
+It compares the previous path (a pyplot 3D scatter of every particle written to a file and removed)
+with the off-screen in-memory renderers, with and without decimation, and the batch rendering of
+several frames with render_frames. The pyvista rows are skipped if pyvista is not installed.
+
+Example
+-------
+>>> python bench_plot.py
+'''
+
+import os
+import tempfile
+import time
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from particles_mod.core import Particles, render_frames
+
+def scatter_plot(positions, output_file):
+    '''
+    Previous implementation of Particles.plot.
+    '''
+    fig = plt.figure()
+    ax = fig.add_subplot(111, projection='3d')
+    ax.scatter(positions[:, 0], positions[:, 1], positions[:, 2])
+    ax.set_xlabel('X')
+    ax.set_ylabel('Y')
+    ax.set_zlabel('Z')
+    plt.savefig(output_file)
+    plt.close()
+    os.remove(output_file)
+
+def best_time(function, repeats=3):
+    '''
+    Best time of a function over some repetitions.
+    '''
+    best = np.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+try:
+    import pyvista
+    backends = ['matplotlib', 'pyvista']
+except ImportError:
+    backends = ['matplotlib']
+
+output_file = os.path.join(tempfile.mkdtemp(), 'particles.png')
+nframes = 10
+print(f"{'particles':>10} {'method':>32} {'time (ms)':>10}")
+for nparticles in [10**3, 10**4, 10**5]:
+    positions = np.random.rand(nparticles, 3)
+    particles = Particles.from_arrays(id=np.arange(nparticles), position=positions)
+    rows = [('scatter to file', lambda: scatter_plot(positions, output_file))]
+    for backend in backends:
+        rows.append((f'{backend} in memory', lambda backend=backend: particles.plot(backend=backend)))
+        rows.append((f'{backend} max_points=10^4', lambda backend=backend: particles.plot(backend=backend, max_points=10**4)))
+        frames = positions + 0.01*np.random.rand(nframes, nparticles, 3)
+        rows.append((f'{backend} per frame ({nframes} frames)', lambda backend=backend, frames=frames: render_frames(frames, backend=backend, max_points=10**4)))
+    for method, function in rows:
+        elapsed = best_time(function)
+        if 'per frame' in method:
+            elapsed /= nframes
+        print(f"{nparticles:>10} {method:>32} {1e3*elapsed:>10.1f}")
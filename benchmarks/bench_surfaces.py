@@ -0,0 +1,46 @@
+'''
+This script benchmarks the construction time of parametric surface structures across sizes.
+
+For every preset and number of particles it times the generation of the positions, the pair
+bonds and the angular bonds (as columnar BondTable objects) and prints one line per size.
+
+Example
+-------
+>>> python bench_surfaces.py
+'''
+
+import time
+import numpy as np
+from particles_mod.ParametricSurface import flat_sheet, tube, spherical_cap, helicoid
+from particles_mod.HalfPipe import HalfPipe
+
+def time_construction(surface, repeats=3):
+    '''
+    Best construction times (positions, pair bonds, angular bonds) over some repetitions.
+    '''
+    best = np.full(3, np.inf)
+    for _ in range(repeats):
+        start = time.perf_counter()
+        positions = surface.generate_positions()
+        positions_time = time.perf_counter()
+        surface.pairbond_table(positions)
+        pairbonds_time = time.perf_counter()
+        surface.anglebond_table(positions)
+        anglebonds_time = time.perf_counter()
+        best = np.minimum(best, [positions_time - start, pairbonds_time - positions_time, anglebonds_time - pairbonds_time])
+    return best
+
+presets = {
+    'half-pipe': lambda n: HalfPipe(n, n/np.pi, np.pi/2, 1.0),
+    'flat sheet': lambda n: flat_sheet(1.0, 1.0, n, n),
+    'tube': lambda n: tube(1.0, 1.0, n, n),
+    'spherical cap': lambda n: spherical_cap(1.0, np.pi/2, n, n),
+    'helicoid': lambda n: helicoid(1.0, 1.0, 3.0, n, n),
+}
+
+print(f"{'preset':>14} {'particles':>10} {'positions (ms)':>15} {'pair bonds (ms)':>16} {'angle bonds (ms)':>17}")
+for name, preset in presets.items():
+    for side in [32, 100, 316, 1000]:
+        surface = preset(side)
+        times = time_construction(surface)
+        print(f"{name:>14} {surface.nparticles:>10} {1e3*times[0]:>15.2f} {1e3*times[1]:>16.2f} {1e3*times[2]:>17.2f}")
@@ -1,11 +1,58 @@
-from .utils import getMobilityTensor, getMobilityTensorRPY
-from .hessian import *
+import importlib
+
+# Public names and the submodules defining them. The submodules (and scipy, libMobility or
+# pyUAMMD through them) are only imported when one of their names is first accessed.
+_LAZY_ATTRIBUTES = {
+    'getMobilityTensor': 'utils',
+    'getMobilityTensorRPY': 'utils',
+    'read_hessian_file': 'hessian',
+    'read_hessian_diagonal_blocks': 'hessian',
+    'blocks_to_sparse_hessian': 'hessian',
+    'obtain_Box': 'hessian',
+    'create_simulation': 'hessian',
+    'restrict_bonds': 'hessian',
+    'obtainHessian': 'hessian',
+    'HessianSession': 'hessian',
+    'replicate_bonds': 'hessian',
+    'obtainHessianBatch': 'hessian',
+    'reshape_hessian': 'hessian',
+    'diagonalize_hessian': 'hessian',
+    'relaxation_modes': 'modes',
+    'MobilityFactorization': 'modes',
+    'ensemble_mobility': 'ensemble',
+    'WelfordAccumulator': 'ensemble',
+    'BrownianDynamics': 'dynamics',
+    'MobilityBackend': 'backends',
+    'register_backend': 'backends',
+    'available_backends': 'backends',
+    'select_backend': 'backends',
+    'create_backend': 'backends',
+}
 
 __all__ = [
     'getMobilityTensor',
-    'getMobilityTensorRPY'
+    'getMobilityTensorRPY',
+    'relaxation_modes',
+    'MobilityFactorization',
+    'ensemble_mobility',
+    'WelfordAccumulator',
+    'BrownianDynamics',
+    'MobilityBackend',
+    'register_backend',
+    'available_backends',
+    'select_backend',
+    'create_backend'
 ]
 
 __version__ = '0.1.0'
 __author__ = 'Joan Ronquillo'
 
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(f'.{_LAZY_ATTRIBUTES[name]}', __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
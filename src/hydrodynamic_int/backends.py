@@ -0,0 +1,352 @@
+'''
+Registry of mobility backends sharing a common interface, with automatic selection.
+'''
+
+import numpy as np
+
+OPEN = ('open', 'open', 'open')
+
+class MobilityBackend:
+    '''
+    Parent class of the mobility backends.
+
+    A backend is created for some boundary conditions, initialized with the hydrodynamic
+    parameters, and then computes products of the mobility tensor with forces for the positions
+    set last. Child classes implement initialize, set_positions and Mdot; the batched product and
+    the dense assembly fall back to repeated products.
+
+    Parameters
+    ----------
+    boundary_conditions : tuple, optional
+        Boundary conditions along x, y and z. Default is ('open', 'open', 'open').
+    **parameters :
+        Parameters of the particular backend.
+
+    Attributes
+    ----------
+    name : str
+        Name of the backend in the registry.
+    supported_boundary_conditions : tuple
+        Boundary conditions the backend can handle, or None for any.
+    max_particles : int
+        Largest number of particles for which the backend is selected automatically, or None.
+    auto : bool
+        Whether the backend takes part in the automatic selection.
+
+    Methods
+    -------
+    available()
+        Whether the backend can be used on this machine.
+    supports(boundary_conditions, nparticles)
+        Whether the backend handles some boundary conditions and number of particles.
+    initialize(hyd_radius, viscosity, nparticles)
+        Set the hydrodynamic parameters.
+    set_positions(positions)
+        Set the positions of the particles.
+    Mdot(forces)
+        Product of the mobility tensor with some forces.
+    Mdot_batch(forces)
+        Products of the mobility tensor with several sets of forces.
+    dense()
+        Assemble the dense mobility tensor.
+    '''
+
+    name = None
+    supported_boundary_conditions = (OPEN,)
+    max_particles = None
+    auto = True
+
+    def __init__(self, boundary_conditions: tuple = OPEN, **parameters):
+        '''
+        Constructor of the MobilityBackend class.
+        '''
+        self.boundary_conditions = tuple(boundary_conditions)
+        if not self.supports(self.boundary_conditions):
+            raise ValueError(f'The {self.name} backend does not support the boundary conditions {self.boundary_conditions}.')
+        self.parameters = parameters
+        self.positions = None
+
+    @classmethod
+    def available(cls) -> bool:
+        '''
+        Whether the backend can be used on this machine.
+        '''
+        return True
+
+    @classmethod
+    def supports(cls, boundary_conditions: tuple, nparticles: int = None) -> bool:
+        '''
+        Whether the backend handles some boundary conditions and number of particles.
+        '''
+        if cls.supported_boundary_conditions is not None and tuple(boundary_conditions) not in cls.supported_boundary_conditions:
+            return False
+        return nparticles is None or cls.max_particles is None or nparticles <= cls.max_particles
+
+    def initialize(self, hyd_radius: float = 1.0, viscosity: float = 1.0, nparticles: int = None):
+        '''
+        Set the hydrodynamic parameters.
+        '''
+        raise NotImplementedError('The initialize method must be implemented in the child class.')
+
+    def set_positions(self, positions: np.ndarray):
+        '''
+        Set the positions of the particles, with shape (nparticles, 3).
+        '''
+        raise NotImplementedError('The set_positions method must be implemented in the child class.')
+
+    def Mdot(self, forces: np.ndarray) -> np.ndarray:
+        '''
+        Product of the mobility tensor with some forces, both with shape (nparticles, 3).
+        '''
+        raise NotImplementedError('The Mdot method must be implemented in the child class.')
+
+    def Mdot_batch(self, forces: np.ndarray) -> np.ndarray:
+        '''
+        Products of the mobility tensor with several sets of forces, both with shape (nbatch, nparticles, 3).
+        '''
+        return np.stack([self.Mdot(force) for force in forces])
+
+    def dense(self) -> np.ndarray:
+        '''
+        Assemble the dense (nparticles * 3, nparticles * 3) mobility tensor, one column per unit force.
+        '''
+        nparticles = len(self.positions)
+        columns = self.Mdot_batch(np.eye(3 * nparticles).reshape(3 * nparticles, nparticles, 3))
+        return columns.reshape(3 * nparticles, 3 * nparticles).T
+
+def rpy_blocks(first: np.ndarray, second: np.ndarray, hyd_radius: float = 1.0, viscosity: float = 1.0) -> np.ndarray:
+    '''
+    Rotne-Prager-Yamakawa mobility blocks in open boundaries between two sets of particles.
+
+    Returns
+    -------
+    numpy.ndarray
+        Blocks with shape (len(first), len(second), 3, 3). Coincident particles get the self mobility.
+    '''
+    separation = second[np.newaxis, :, :] - first[:, np.newaxis, :]
+    r = np.linalg.norm(separation, axis=2)
+    safe_r = np.where(r > 0, r, 1.0)
+    outer = separation[..., :, np.newaxis] * separation[..., np.newaxis, :] / safe_r[..., np.newaxis, np.newaxis]**2
+    selfmobility = 1/(6*np.pi*viscosity*hyd_radius)
+    far = r >= 2*hyd_radius
+    # Far field and overlapping (near field) coefficients of the identity and of the outer product
+    identity_coefficient = np.where(far, (1 + 2*hyd_radius**2/(3*safe_r**2))/(8*np.pi*viscosity*safe_r), selfmobility*(1 - 9*r/(32*hyd_radius)))
+    outer_coefficient = np.where(far, (1 - 2*hyd_radius**2/safe_r**2)/(8*np.pi*viscosity*safe_r), selfmobility*3*r/(32*hyd_radius))
+    return identity_coefficient[..., np.newaxis, np.newaxis] * np.eye(3) + outer_coefficient[..., np.newaxis, np.newaxis] * outer
+
+class NumpyRPYBackend(MobilityBackend):
+    '''
+    Rotne-Prager-Yamakawa mobility in open boundaries evaluated with numpy on the CPU.
+
+    The products are computed in blocks of rows, so the memory is bounded by block_pairs pairs
+    and the cost is quadratic in the number of particles.
+
+    Parameters
+    ----------
+    boundary_conditions : tuple, optional
+        Only ('open', 'open', 'open') is supported.
+    block_pairs : int, optional
+        Number of particle pairs evaluated at once. Default is 2**20.
+    '''
+
+    name = 'numpy-rpy'
+    max_particles = 20000
+
+    def initialize(self, hyd_radius=1.0, viscosity=1.0, nparticles=None):
+        self.hyd_radius = hyd_radius
+        self.viscosity = viscosity
+
+    def set_positions(self, positions):
+        self.positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+
+    def _row_blocks(self):
+        nparticles = len(self.positions)
+        rows = max(1, self.parameters.get('block_pairs', 2**20) // max(nparticles, 1))
+        for start in range(0, nparticles, rows):
+            yield start, rpy_blocks(self.positions[start:start + rows], self.positions, self.hyd_radius, self.viscosity)
+
+    def Mdot(self, forces):
+        return self.Mdot_batch(np.asarray(forces)[np.newaxis])[0]
+
+    def Mdot_batch(self, forces):
+        forces = np.asarray(forces, dtype=float).reshape(len(forces), -1, 3)
+        velocities = np.empty_like(forces)
+        for start, blocks in self._row_blocks():
+            velocities[:, start:start + len(blocks)] = np.einsum('ijab,kjb->kia', blocks, forces)
+        return velocities
+
+    def dense(self):
+        nparticles = len(self.positions)
+        mobility = np.empty((nparticles, 3, nparticles, 3))
+        for start, blocks in self._row_blocks():
+            mobility[start:start + len(blocks)] = blocks.transpose(0, 2, 1, 3)
+        return mobility.reshape(3 * nparticles, 3 * nparticles)
+
+class LibMobilityNBodyBackend(MobilityBackend):
+    '''
+    libMobility NBody solver (GPU) in open boundaries or above a single wall.
+    '''
+
+    name = 'libmobility-nbody'
+    supported_boundary_conditions = (OPEN, ('open', 'open', 'single_wall'))
+
+    @classmethod
+    def available(cls):
+        try:
+            import libMobility
+        except ImportError:
+            return False
+        return hasattr(libMobility, 'NBody')
+
+    def initialize(self, hyd_radius=1.0, viscosity=1.0, nparticles=None):
+        import libMobility as lb
+        self.solver = lb.NBody(*self.boundary_conditions)
+        self.solver.setParameters(algorithm="advise", Nbatch=1, NperBatch=nparticles)
+        self.solver.initialize(temperature=0.0, viscosity=viscosity, hydrodynamicRadius=hyd_radius)
+
+    def set_positions(self, positions):
+        self.positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        self.solver.setPositions(self.positions)
+
+    def Mdot(self, forces):
+        return np.asarray(self.solver.Mdot(np.asarray(forces, dtype=float))[0]).reshape(-1, 3)
+
+class EwaldBackend(MobilityBackend):
+    '''
+    libMobility positively split Ewald (PSE) solver in triply periodic boxes.
+
+    Parameters
+    ----------
+    boundary_conditions : tuple, optional
+        Only ('periodic', 'periodic', 'periodic') is supported.
+    box : array_like
+        Side lengths of the periodic box.
+    psi : float, optional
+        Ewald splitting parameter. Default is 0.5 / hyd_radius.
+    '''
+
+    name = 'ewald'
+    supported_boundary_conditions = (('periodic', 'periodic', 'periodic'),)
+
+    @classmethod
+    def available(cls):
+        try:
+            import libMobility
+        except ImportError:
+            return False
+        return hasattr(libMobility, 'PSE')
+
+    def initialize(self, hyd_radius=1.0, viscosity=1.0, nparticles=None):
+        import libMobility as lb
+        if 'box' not in self.parameters:
+            raise ValueError('The ewald backend needs the side lengths of the periodic box (box).')
+        lx, ly, lz = self.parameters['box']
+        self.solver = lb.PSE(*self.boundary_conditions)
+        self.solver.setParameters(psi=self.parameters.get('psi', 0.5 / hyd_radius), Lx=lx, Ly=ly, Lz=lz, shearStrain=0.0)
+        self.solver.initialize(temperature=0.0, viscosity=viscosity, hydrodynamicRadius=hyd_radius)
+
+    def set_positions(self, positions):
+        self.positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        self.solver.setPositions(self.positions)
+
+    def Mdot(self, forces):
+        return np.asarray(self.solver.Mdot(np.asarray(forces, dtype=float))[0]).reshape(-1, 3)
+
+class MockBackend(MobilityBackend):
+    '''
+    Deterministic free-draining mobility (self mobility only) for any boundary conditions.
+
+    It has no hydrodynamic interactions between particles, so it is never selected automatically;
+    it is meant for testing the code around the mobility on machines without the GPU solvers.
+
+    Attributes
+    ----------
+    nproducts : int
+        Number of products with the mobility computed.
+    '''
+
+    name = 'mock'
+    supported_boundary_conditions = None
+    auto = False
+
+    def initialize(self, hyd_radius=1.0, viscosity=1.0, nparticles=None):
+        self.selfmobility = 1/(6*np.pi*viscosity*hyd_radius)
+        self.nproducts = 0
+
+    def set_positions(self, positions):
+        self.positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+
+    def Mdot(self, forces):
+        self.nproducts += 1
+        return self.selfmobility * np.asarray(forces, dtype=float).reshape(-1, 3)
+
+    def dense(self):
+        return self.selfmobility * np.eye(3 * len(self.positions))
+
+# Registered backends, in order of preference for the automatic selection
+_BACKENDS = {}
+
+def register_backend(backend_class):
+    '''
+    Add a MobilityBackend subclass to the registry under its name, after the registered ones.
+    '''
+    _BACKENDS[backend_class.name] = backend_class
+    return backend_class
+
+for _backend_class in (LibMobilityNBodyBackend, EwaldBackend, NumpyRPYBackend, MockBackend):
+    register_backend(_backend_class)
+
+def available_backends() -> list:
+    '''
+    Names of the registered backends that can be used on this machine.
+    '''
+    return [name for name, backend_class in _BACKENDS.items() if backend_class.available()]
+
+def select_backend(boundary_conditions: tuple = OPEN, nparticles: int = None) -> str:
+    '''
+    Name of the first registered backend that is available and supports some boundary conditions
+    and number of particles, so the GPU solvers are preferred and numpy-rpy is the CPU fallback.
+
+    Raises
+    ------
+    ValueError
+        If no automatic backend fits.
+    '''
+    for name, backend_class in _BACKENDS.items():
+        if backend_class.auto and backend_class.supports(boundary_conditions, nparticles) and backend_class.available():
+            return name
+    raise ValueError(f'No available mobility backend supports the boundary conditions {tuple(boundary_conditions)} '
+                     f'with {nparticles} particles (available: {available_backends()}).')
+
+def create_backend(name: str = 'auto', boundary_conditions: tuple = OPEN, nparticles: int = None,
+                   hyd_radius: float = 1.0, viscosity: float = 1.0, **parameters) -> MobilityBackend:
+    '''
+    Create and initialize a mobility backend.
+
+    Parameters
+    ----------
+    name : str, optional
+        Name of a registered backend, or 'auto' to use select_backend. Default is 'auto'.
+    boundary_conditions : tuple, optional
+        Boundary conditions along x, y and z. Default is ('open', 'open', 'open').
+    nparticles : int, optional
+        Number of particles, used by the selection and by some solvers.
+    hyd_radius : float, optional
+        Hydrodynamic radius of the particles. Default is 1.0.
+    viscosity : float, optional
+        Viscosity of the fluid. Default is 1.0.
+    **parameters :
+        Parameters of the particular backend (e.g. box for ewald).
+
+    Returns
+    -------
+    MobilityBackend
+        The initialized backend.
+    '''
+    if name == 'auto':
+        name = select_backend(boundary_conditions, nparticles)
+    if name not in _BACKENDS:
+        raise ValueError(f'Unknown mobility backend {name}, use one of {list(_BACKENDS)}.')
+    backend = _BACKENDS[name](boundary_conditions, **parameters)
+    backend.initialize(hyd_radius, viscosity, nparticles)
+    return backend
@@ -0,0 +1,204 @@
+'''
+Native evaluation of the UAMMD bonded potentials used in the project (Bond2 Harmonic and Bond3 HarmonicAngular).
+'''
+
+import numpy as np
+
+def bond_columns(bond: dict) -> dict:
+    """
+    Obtain the columns of a UAMMD-structured bond entry as numpy arrays.
+
+    Parameters
+    ----------
+    bond :
+        A UAMMD-structured bond entry with "labels" and "data" (and optionally "parameters"), or
+        any object following that schema with a "columns" dictionary of arrays (such as a BondTable).
+
+    Returns
+    -------
+    columns :
+        Dictionary mapping every label to a numpy array with one value per bond. Labels missing
+        from the data are taken from the bond "parameters".
+    """
+
+    labels = bond["labels"]
+    if hasattr(bond, "columns"):
+        # Columnar bond tables are used without building their rows
+        columns = dict(bond.columns)
+    else:
+        data = bond["data"]
+        if len(data) == 0:
+            columns = {label: np.empty(0) for label in labels}
+        else:
+            columns = {label: np.asarray(column) for label, column in zip(labels, zip(*data))}
+    for label in labels:
+        if label.startswith("id_"):
+            columns[label] = columns[label].astype(int, copy=False)
+    nbonds = len(columns[labels[0]])
+    for name, value in bond.get("parameters", {}).items():
+        if name not in columns:
+            columns[name] = np.full(nbonds, value, dtype=float)
+    return columns
+
+def _harmonic_terms(positions, columns):
+    '''
+    Energy and gradient contributions of Bond2 Harmonic bonds, U = K/2 (r - r0)^2.
+    '''
+    i, j = columns["id_i"], columns["id_j"]
+    K, r0 = columns["K"].astype(float), columns["r0"].astype(float)
+    rij = positions[j] - positions[i]
+    r = np.linalg.norm(rij, axis=-1)
+    energy = 0.5 * K * (r - r0)**2
+    grad_j = (K * (r - r0) / r)[..., np.newaxis] * rij
+    return energy, (i, j), (-grad_j, grad_j)
+
+def _harmonic_angular_terms(positions, columns):
+    '''
+    Energy and gradient contributions of Bond3 HarmonicAngular bonds, U = K/2 (theta - theta0)^2,
+    where theta is the angle at particle j.
+    '''
+    i, j, k = columns["id_i"], columns["id_j"], columns["id_k"]
+    K, theta0 = columns["K"].astype(float), columns["theta0"].astype(float)
+    a = positions[i] - positions[j]
+    b = positions[k] - positions[j]
+    a_norm = np.linalg.norm(a, axis=-1)
+    b_norm = np.linalg.norm(b, axis=-1)
+    cos_theta = np.clip(np.sum(a * b, axis=-1) / (a_norm * b_norm), -1.0, 1.0)
+    theta = np.arccos(cos_theta)
+    sin_theta = np.sqrt(1.0 - cos_theta**2)
+    # (theta - theta0)/sin(theta) has a finite limit for straight angles at rest (theta0 = pi)
+    safe_sin = np.where(sin_theta > 1e-12, sin_theta, 1.0)
+    limit = np.where(np.isclose(theta0, np.pi), -1.0, 0.0)
+    factor = np.where(sin_theta > 1e-12, (theta - theta0) / safe_sin, limit)
+    energy = 0.5 * K * (theta - theta0)**2
+    prefactor = (-K * factor)[..., np.newaxis]
+    grad_i = prefactor * (b / (a_norm * b_norm)[..., np.newaxis] - (cos_theta / a_norm**2)[..., np.newaxis] * a)
+    grad_k = prefactor * (a / (a_norm * b_norm)[..., np.newaxis] - (cos_theta / b_norm**2)[..., np.newaxis] * b)
+    return energy, (i, j, k), (grad_i, -(grad_i + grad_k), grad_k)
+
+# Supported bond types, indexed by their UAMMD "type" entry
+BOND_TERMS = {
+    ("Bond2", "Harmonic"): _harmonic_terms,
+    ("Bond3", "HarmonicAngular"): _harmonic_angular_terms,
+}
+
+def _bond_terms(bond):
+    '''
+    Return the term function for a bond entry, raising an error for unsupported types.
+    '''
+    bond_type = tuple(bond["type"])
+    if bond_type not in BOND_TERMS:
+        raise ValueError(f"Unsupported bond type {list(bond_type)}. Supported types: {[list(t) for t in BOND_TERMS]}")
+    return BOND_TERMS[bond_type]
+
+def bonded_energy(positions: np.ndarray, bonds: dict) -> float:
+    """
+    Compute the total bonded energy of a configuration.
+
+    Parameters
+    ----------
+    positions :
+        Positions of the particles with shape (nparticles, 3).
+    bonds :
+        A UAMMD-structured dictionary representing the bonds between particles.
+
+    Returns
+    -------
+    energy :
+        The total bonded energy.
+    """
+
+    positions = np.asarray(positions, dtype=float)
+    energy = 0.0
+    for bond in bonds.values():
+        bond_energy, _, _ = _bond_terms(bond)(positions, bond_columns(bond))
+        energy += np.sum(bond_energy)
+    return energy
+
+def bonded_gradient(positions: np.ndarray, bonds: dict) -> np.ndarray:
+    """
+    Compute the gradient of the bonded energy with respect to the positions.
+
+    Parameters
+    ----------
+    positions :
+        Positions of the particles with shape (nparticles, 3).
+    bonds :
+        A UAMMD-structured dictionary representing the bonds between particles.
+
+    Returns
+    -------
+    gradient :
+        The energy gradient with shape (nparticles, 3). The bonded forces are its negative.
+    """
+
+    positions = np.asarray(positions, dtype=float)
+    nparticles = positions.shape[0]
+    # Accumulated with bincount over the flattened coordinates, much faster than np.add.at
+    gradient = np.zeros(nparticles * 3)
+    for bond in bonds.values():
+        _, ids, grads = _bond_terms(bond)(positions, bond_columns(bond))
+        for particle_ids, grad in zip(ids, grads):
+            flat_ids = (3 * particle_ids[:, np.newaxis] + np.arange(3)).ravel()
+            gradient += np.bincount(flat_ids, grad.ravel(), minlength=nparticles * 3)
+    return gradient.reshape(nparticles, 3)
+
+def bonded_hessian(positions: np.ndarray, bonds: dict, step: float = 1e-6) -> np.ndarray:
+    """
+    Compute the Hessian of the bonded energy.
+
+    Harmonic bonds use the analytical expression. Angular bonds are differentiated by central
+    differences of their analytical gradient, perturbing the three particles of every bond at once.
+
+    Parameters
+    ----------
+    positions :
+        Positions of the particles with shape (nparticles, 3).
+    bonds :
+        A UAMMD-structured dictionary representing the bonds between particles.
+    step :
+        Displacement used for the finite differences of the angular bonds.
+
+    Returns
+    -------
+    hessian :
+        The Hessian matrix in (nparticles, nparticles, 3, 3) format.
+    """
+
+    positions = np.asarray(positions, dtype=float)
+    nparticles = positions.shape[0]
+    hessian = np.zeros((nparticles, nparticles, 3, 3))
+    for bond in bonds.values():
+        terms = _bond_terms(bond)
+        columns = bond_columns(bond)
+        if terms is _harmonic_terms:
+            i, j = columns["id_i"], columns["id_j"]
+            K, r0 = columns["K"].astype(float), columns["r0"].astype(float)
+            rij = positions[j] - positions[i]
+            r = np.linalg.norm(rij, axis=-1)
+            unit = rij / r[:, np.newaxis]
+            outer = unit[:, :, np.newaxis] * unit[:, np.newaxis, :]
+            block = K[:, np.newaxis, np.newaxis] * (outer + (1 - r0 / r)[:, np.newaxis, np.newaxis] * (np.eye(3) - outer))
+            np.add.at(hessian, (i, i), block)
+            np.add.at(hessian, (j, j), block)
+            np.add.at(hessian, (i, j), -block)
+            np.add.at(hessian, (j, i), -block)
+            continue
+        # Give every bond its own copy of its particles so that they can be displaced independently
+        _, ids, _ = terms(positions, columns)
+        nbonds = len(ids[0])
+        local_positions = np.concatenate([positions[particle_ids] for particle_ids in ids])
+        local_columns = dict(columns)
+        for m, name in enumerate("ijk"[:len(ids)]):
+            local_columns[f"id_{name}"] = np.arange(nbonds) + m * nbonds
+        for a, particle_a in enumerate(ids):
+            for direction in range(3):
+                grads = []
+                for sign in (1.0, -1.0):
+                    shifted = local_positions.copy()
+                    shifted[a * nbonds:(a + 1) * nbonds, direction] += sign * step
+                    grads.append(terms(shifted, local_columns)[2])
+                for b, particle_b in enumerate(ids):
+                    column = (grads[0][b] - grads[1][b]) / (2 * step)
+                    np.add.at(hessian, (particle_b, particle_a, slice(None), direction), column)
+    return hessian
@@ -0,0 +1,267 @@
+'''
+Command line runner of batches of mobility, Hessian and relaxation mode jobs.
+
+A job spec is a JSON file such as
+
+    {
+        "structure": {"type": "halfpipe", "length": 10.0, "radius": 2.0, "density": 2.0},
+        "compute": ["mobility", "hessian", "modes"],
+        "parameters": {"hyd_radius": 0.5, "viscosity": 1.0, "k": 10},
+        "sweep": {"structure.radius": [1.0, 2.0, 3.0], "parameters.hyd_radius": [0.25, 0.5]}
+    }
+
+The sweep (optional) runs one job per combination of its values, each one overriding the dotted
+key of the spec. Every job writes its outputs as .npy files in its own directory of the output
+directory, followed by a done.json marker with its timings, so a restarted batch skips the jobs
+already done.
+
+Structures
+----------
+halfpipe : the keyword arguments of particles_mod.construct_structure.
+flat_sheet, tube, spherical_cap, helicoid : the keyword arguments of the surface functions of particles_mod.
+sphere : nparticles and the keyword arguments of particles_mod.SphereGeometry (no bonds).
+directory : path of a structure written by ParametricSurface.export.
+file : path of the positions (.npy or text) and optionally bonds, path of a JSON bonds dictionary.
+
+Parameters
+----------
+hyd_radius, viscosity, boundary_conditions, backend : passed to getMobilityTensorRPY.
+box, psi : parameters of the mobility backend.
+simulation : 'uammd' (default) or 'local' (LocalSimulation) to compute the Hessian.
+k, matrix_free : passed to relaxation_modes.
+
+Example
+-------
+>>> hydint jobs.json --output results --workers 4
+'''
+
+import argparse
+import copy
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+COMPUTABLE = ('mobility', 'hessian', 'modes')
+SURFACES = ('flat_sheet', 'tube', 'spherical_cap', 'helicoid')
+BACKEND_PARAMETERS = ('box', 'psi', 'block_pairs')
+
+def expand_jobs(spec: dict) -> list:
+    '''
+    Expand the sweep of a job spec into the list of jobs, in the order of the sweep values.
+    '''
+    sweep = spec.get('sweep', {})
+    base = {key: value for key, value in spec.items() if key != 'sweep'}
+    jobs = []
+    for values in itertools.product(*sweep.values()):
+        job = copy.deepcopy(base)
+        for dotted_key, value in zip(sweep, values):
+            *parents, key = dotted_key.split('.')
+            target = job
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[key] = value
+        jobs.append(job)
+    return jobs
+
+def build_structure(structure: dict) -> tuple:
+    '''
+    Positions and bonds (None if the structure has none) of the structure of a job.
+    '''
+    import particles_mod
+    structure = dict(structure)
+    kind = structure.pop('type')
+    if kind == 'halfpipe':
+        return particles_mod.construct_structure(**structure)
+    if kind in SURFACES:
+        return getattr(particles_mod, kind)(**structure).construct()
+    if kind == 'sphere':
+        nparticles = structure.pop('nparticles')
+        particles = particles_mod.Particles.from_arrays(id=np.arange(nparticles), position=np.zeros((nparticles, 3)))
+        return particles_mod.SphereGeometry(**structure).get_positions(particles), None
+    if kind == 'directory':
+        return particles_mod.load_structure(structure['path'])
+    if kind == 'file':
+        path = structure['path']
+        positions = np.load(path) if path.endswith('.npy') else np.loadtxt(path)
+        bonds = None
+        if 'bonds' in structure:
+            with open(structure['bonds']) as bonds_file:
+                bonds = json.load(bonds_file)
+        return np.asarray(positions, dtype=float).reshape(-1, 3), bonds
+    raise ValueError(f"Unknown structure type {kind}, use one of {['halfpipe', *SURFACES, 'sphere', 'directory', 'file']}.")
+
+def run_job(job: dict, directory: str) -> dict:
+    '''
+    Run a job, writing its outputs and then its done.json marker in a directory.
+
+    Returns
+    -------
+    dict
+        Time in seconds spent in every stage of the job.
+    '''
+    from .utils import getMobilityTensorRPY
+    from .hessian import obtainHessian
+    from .modes import relaxation_modes
+
+    os.makedirs(directory, exist_ok=True)
+    # The marker of an earlier run is removed first, so an edited job that fails is not taken as done
+    marker_path = os.path.join(directory, 'done.json')
+    if os.path.exists(marker_path):
+        os.remove(marker_path)
+    compute = job.get('compute', ['mobility'])
+    unknown = set(compute) - set(COMPUTABLE)
+    if unknown:
+        raise ValueError(f'Unknown outputs {sorted(unknown)}, use some of {list(COMPUTABLE)}.')
+    parameters = job.get('parameters', {})
+    with open(os.path.join(directory, 'job.json'), 'w') as job_file:
+        json.dump(job, job_file, indent=2)
+
+    timings = {}
+    start = time.perf_counter()
+    positions, bonds = build_structure(job['structure'])
+    positions = np.asarray(positions, dtype=float)
+    np.save(os.path.join(directory, 'positions.npy'), positions)
+    timings['structure'] = time.perf_counter() - start
+    if bonds is None and ('hessian' in compute or 'modes' in compute):
+        raise ValueError('The Hessian and the modes need a structure with bonds.')
+
+    mobility = hessian = None
+    if 'mobility' in compute or 'modes' in compute:
+        start = time.perf_counter()
+        mobility = getMobilityTensorRPY(positions, parameters.get('hyd_radius', 1.0), parameters.get('viscosity', 1.0),
+                                        parameters.get('boundary_conditions', ['open', 'open', 'open']), parameters.get('backend', 'auto'),
+                                        **{key: parameters[key] for key in BACKEND_PARAMETERS if key in parameters})
+        if 'mobility' in compute:
+            np.save(os.path.join(directory, 'mobility.npy'), mobility)
+        timings['mobility'] = time.perf_counter() - start
+    if 'hessian' in compute or 'modes' in compute:
+        start = time.perf_counter()
+        simulation_factory = None
+        if parameters.get('simulation', 'uammd') == 'local':
+            from .local_simulation import LocalSimulation
+            simulation_factory = LocalSimulation
+        hessian = obtainHessian(positions, bonds, simulation_factory)
+        if 'hessian' in compute:
+            np.save(os.path.join(directory, 'hessian.npy'), hessian)
+        timings['hessian'] = time.perf_counter() - start
+    if 'modes' in compute:
+        start = time.perf_counter()
+        rates, modes = relaxation_modes(positions, k=parameters.get('k'), hessian=hessian, mobility=mobility,
+                                        matrix_free=parameters.get('matrix_free', False))
+        np.save(os.path.join(directory, 'rates.npy'), rates)
+        np.save(os.path.join(directory, 'modes.npy'), modes)
+        timings['modes'] = time.perf_counter() - start
+
+    # The marker is written last and atomically, so its presence means every output is complete
+    with open(f'{marker_path}.tmp', 'w') as marker_file:
+        json.dump(timings, marker_file)
+    os.replace(f'{marker_path}.tmp', marker_path)
+    return timings
+
+def _is_done(job: dict, directory: str) -> bool:
+    '''
+    Whether a job was completed in a directory, with the same spec.
+    '''
+    if not os.path.exists(os.path.join(directory, 'done.json')):
+        return False
+    with open(os.path.join(directory, 'job.json')) as job_file:
+        return json.load(job_file) == json.loads(json.dumps(job))
+
+def run_jobs(jobs: list, output: str, workers: int = None, overwrite: bool = False, progress=None) -> dict:
+    '''
+    Run a list of jobs, skipping the ones already done in the output directory. A job directory
+    whose job.json differs from the job (e.g. after editing the sweep) is run again.
+
+    Parameters
+    ----------
+    jobs : list
+        Jobs (see expand_jobs).
+    output : str
+        Output directory, with one job_XXXX directory per job.
+    workers : int, optional
+        Number of worker processes. Default is None, which runs the jobs in this process.
+    overwrite : bool, optional
+        If True, the jobs already done are run again. Default is False.
+    progress : callable, optional
+        Function called with a line of text every time a job finishes.
+
+    Returns
+    -------
+    dict
+        Summary with the number of jobs run, skipped and failed, the errors, the total time of
+        every stage and the wall time.
+    '''
+    progress = progress or (lambda line: None)
+    wall_start = time.perf_counter()
+    os.makedirs(output, exist_ok=True)
+    directories = [os.path.join(output, f'job_{index:04d}') for index in range(len(jobs))]
+    pending = [index for index, directory in enumerate(directories) if overwrite or not _is_done(jobs[index], directory)]
+    summary = {'jobs': len(jobs), 'run': 0, 'skipped': len(jobs) - len(pending), 'failed': 0, 'errors': {}, 'stages': {}}
+    if summary['skipped']:
+        progress(f"Skipping {summary['skipped']} jobs already done")
+
+    def finish(index, result):
+        name = os.path.basename(directories[index])
+        finished = summary['run'] + summary['failed'] + 1
+        if isinstance(result, Exception):
+            summary['failed'] += 1
+            summary['errors'][name] = f'{type(result).__name__}: {result}'
+            progress(f'[{finished}/{len(pending)}] {name} failed: {summary["errors"][name]}')
+            return
+        summary['run'] += 1
+        for stage, elapsed in result.items():
+            summary['stages'][stage] = summary['stages'].get(stage, 0.0) + elapsed
+        stages = ' '.join(f'{stage} {elapsed:.2f}s' for stage, elapsed in result.items())
+        progress(f'[{finished}/{len(pending)}] {name} done ({stages})')
+
+    if workers is None or workers <= 1:
+        for index in pending:
+            try:
+                result = run_job(jobs[index], directories[index])
+            except Exception as error:
+                result = error
+            finish(index, result)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(run_job, jobs[index], directories[index]): index for index in pending}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as error:
+                    result = error
+                finish(futures[future], result)
+    summary['wall_time'] = time.perf_counter() - wall_start
+    return summary
+
+def main(argv: list = None) -> int:
+    '''
+    Entry point of the hydint command.
+    '''
+    parser = argparse.ArgumentParser(prog='hydint', description='Run batches of mobility, Hessian and relaxation mode jobs.')
+    parser.add_argument('spec', help='JSON job spec')
+    parser.add_argument('-o', '--output', default=None, help='output directory (default: the spec file name without extension)')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='number of worker processes')
+    parser.add_argument('--overwrite', action='store_true', help='run again the jobs already done')
+    parser.add_argument('-q', '--quiet', action='store_true', help='do not report the progress')
+    arguments = parser.parse_args(argv)
+
+    with open(arguments.spec) as spec_file:
+        jobs = expand_jobs(json.load(spec_file))
+    output = arguments.output or os.path.splitext(arguments.spec)[0]
+    progress = None if arguments.quiet else (lambda line: print(line, file=sys.stderr, flush=True))
+    summary = run_jobs(jobs, output, arguments.workers, arguments.overwrite, progress)
+    with open(os.path.join(output, 'summary.json'), 'w') as summary_file:
+        json.dump(summary, summary_file, indent=2)
+
+    print(f"{summary['jobs']} jobs: {summary['run']} run, {summary['skipped']} skipped, {summary['failed']} failed "
+          f"in {summary['wall_time']:.2f} s")
+    for stage, elapsed in summary['stages'].items():
+        print(f'  {stage:>10} {elapsed:10.2f} s')
+    return 1 if summary['failed'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
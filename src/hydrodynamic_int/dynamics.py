@@ -0,0 +1,165 @@
+'''
+Brownian dynamics of bonded structures with hydrodynamic interactions.
+'''
+
+import time
+import numpy as np
+from particles_mod.core.bonds import BondTable
+from .bonded import bonded_gradient
+from .modes import MobilityFactorization
+
+class BrownianDynamics:
+    '''
+    Euler-Maruyama integrator of overdamped Brownian dynamics with hydrodynamic interactions.
+
+    Every step moves the particles as
+
+        x(t + dt) = x(t) + dt M F + sqrt(2 kT dt) L xi,
+
+    where F are the bonded forces, M = L L^T is the mobility tensor and xi are independent
+    standard normal numbers, so the noise has the M correlations of the fluctuation-dissipation
+    theorem (the RPY mobility has no divergence, so no drift term is needed). The mobility and its
+    Cholesky factor are only recomputed every refresh_every steps, or earlier if some particle has
+    moved more than refresh_displacement since the last refresh.
+
+    Parameters
+    ----------
+    positions :
+        Initial positions with shape (nparticles, 3), or a Particles object whose positions are
+        updated after every run.
+    bonds : dictionary
+        A UAMMD-structured dictionary representing the bonds (Bond2 Harmonic and Bond3 HarmonicAngular).
+    dt : float
+        Time step.
+    temperature : float, optional
+        Thermal energy kT. Default is 1.0.
+    refresh_every : int, optional
+        Number of steps between mobility refreshes. Default is 1.
+    refresh_displacement : float, optional
+        Particle displacement since the last refresh that forces a new one. Default is infinity.
+    mobility_function : callable, optional
+        Function returning the mobility tensor of some positions. Default is getMobilityTensorRPY.
+    seed : int, optional
+        Seed of the noise.
+    **mobility_parameters :
+        Parameters of the mobility function, e.g. hyd_radius and viscosity.
+
+    Attributes
+    ----------
+    positions : numpy.ndarray
+        Current positions of the particles.
+    nsteps : int
+        Number of steps taken.
+    nrefreshes : int
+        Number of times the mobility was computed.
+    elapsed : float
+        Time in seconds spent in the steps.
+    steps_per_second : float
+        Number of steps per second of wall time.
+
+    Methods
+    -------
+    forces(positions)
+        Bonded forces of some positions.
+    step()
+        Take one step.
+    run(nsteps, trajectory, save_every)
+        Take several steps.
+    '''
+
+    def __init__(self, positions, bonds: dict, dt: float, temperature: float = 1.0, refresh_every: int = 1,
+                 refresh_displacement: float = np.inf, mobility_function=None, seed: int = None, **mobility_parameters):
+        '''
+        Constructor of the BrownianDynamics class.
+        '''
+        self.particles = positions if hasattr(positions, 'position') else None
+        self.positions = np.array(getattr(positions, 'position', positions), dtype=float)
+        # The bonds are converted to columns once instead of at every step
+        self.bonds = {name: BondTable.from_dict(bond) for name, bond in bonds.items()}
+        self.dt = dt
+        self.temperature = temperature
+        self.refresh_every = refresh_every
+        self.refresh_displacement = refresh_displacement
+        self.factorization = MobilityFactorization(mobility_function, **mobility_parameters)
+        self.rng = np.random.default_rng(seed)
+        self.nsteps = 0
+        self.elapsed = 0.0
+        self._since_refresh = None
+
+    @property
+    def nrefreshes(self) -> int:
+        '''
+        Number of times the mobility was computed.
+        '''
+        return self.factorization.nfactorizations
+
+    @property
+    def steps_per_second(self) -> float:
+        '''
+        Number of steps per second of wall time.
+        '''
+        return self.nsteps / self.elapsed if self.elapsed else 0.0
+
+    def forces(self, positions: np.ndarray) -> np.ndarray:
+        '''
+        Bonded forces of some positions, with shape (nparticles, 3).
+        '''
+        return -bonded_gradient(positions, self.bonds)
+
+    def _lower(self) -> np.ndarray:
+        '''
+        Cholesky factor of the mobility, refreshed when needed.
+        '''
+        if self._since_refresh is not None and self._since_refresh < self.refresh_every:
+            displacement = np.max(np.linalg.norm(self.positions - self.factorization.positions, axis=1))
+            if displacement <= self.refresh_displacement:
+                return self.factorization.lower
+        self._since_refresh = 0
+        return self.factorization.factor(self.positions)
+
+    def step(self) -> np.ndarray:
+        '''
+        Take one step.
+
+        Returns
+        -------
+        positions : numpy.ndarray
+            The new positions.
+        '''
+        start = time.perf_counter()
+        lower = self._lower()
+        forces = self.forces(self.positions).ravel()
+        noise = self.rng.standard_normal(forces.shape)
+        # M F = L (L^T F), so the mobility itself is never needed
+        velocity = lower @ (lower.T @ forces) * self.dt + np.sqrt(2 * self.temperature * self.dt) * (lower @ noise)
+        self.positions = self.positions + velocity.reshape(-1, 3)
+        self._since_refresh += 1
+        self.nsteps += 1
+        self.elapsed += time.perf_counter() - start
+        return self.positions
+
+    def run(self, nsteps: int, trajectory=None, save_every: int = 1) -> np.ndarray:
+        '''
+        Take several steps.
+
+        Parameters
+        ----------
+        nsteps : int
+            Number of steps.
+        trajectory : optional
+            Trajectory (see particles_mod.core.Trajectory) where the positions are appended.
+        save_every : int, optional
+            Number of steps between saved frames. Default is 1.
+
+        Returns
+        -------
+        positions : numpy.ndarray
+            The final positions.
+        '''
+        for step in range(1, nsteps + 1):
+            self.step()
+            if trajectory is not None and step % save_every == 0:
+                trajectory.append(self.positions)
+        if self.particles is not None:
+            self.particles.set_positions(self.positions.copy())
+        return self.positions
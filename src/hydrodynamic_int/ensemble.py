@@ -0,0 +1,215 @@
+'''
+Streaming ensemble averages of mobility tensors over configurations generated by a geometry.
+'''
+
+import os
+import json
+import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from .utils import getMobilityTensorRPY
+
+class WelfordAccumulator:
+    '''
+    Running mean and variance of array samples with Welford's update.
+
+    Accumulators of disjoint sets of samples are combined with Chan's parallel update, so
+    workers can accumulate chunks independently. Only the count, the mean and the sum of
+    squared deviations are stored, whatever the number of samples.
+
+    Parameters
+    ----------
+    shape : tuple
+        Shape of the samples.
+
+    Attributes
+    ----------
+    count : int
+        Number of samples.
+    mean : numpy.ndarray
+        Running mean of the samples.
+    variance : numpy.ndarray
+        Running (population) variance of the samples.
+
+    Methods
+    -------
+    update(sample)
+        Add a sample.
+    merge(other)
+        Add the samples of another accumulator.
+    save(path, **metadata)
+        Save the accumulator in an .npz file.
+    load(path)
+        Open an accumulator saved with save.
+    '''
+
+    def __init__(self, shape: tuple):
+        '''
+        Constructor of the WelfordAccumulator class.
+        '''
+        self.count = 0
+        self.mean = np.zeros(shape)
+        self._m2 = np.zeros(shape)
+
+    @property
+    def variance(self) -> np.ndarray:
+        '''
+        Running (population) variance of the samples.
+        '''
+        return self._m2 / self.count if self.count else np.zeros_like(self._m2)
+
+    def update(self, sample: np.ndarray):
+        '''
+        Add a sample.
+        '''
+        self.count += 1
+        delta = sample - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (sample - self.mean)
+
+    def merge(self, other):
+        '''
+        Add the samples of another accumulator.
+        '''
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self._m2 += other._m2 + delta**2 * self.count * other.count / total
+        self.mean += delta * other.count / total
+        self.count = total
+        return self
+
+    def save(self, path: str, **metadata):
+        '''
+        Save the accumulator (and some metadata) in an .npz file, replacing it atomically.
+        '''
+        temporary_path = f'{path}.tmp.npz'
+        np.savez(temporary_path, count=self.count, mean=self.mean, m2=self._m2, **metadata)
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        '''
+        Open an accumulator saved with save.
+
+        Returns
+        -------
+        accumulator : WelfordAccumulator
+            The accumulator.
+        metadata : dict
+            The other arrays of the file.
+        '''
+        with np.load(path) as data:
+            accumulator = cls(data['mean'].shape)
+            accumulator.count = int(data['count'])
+            accumulator.mean = data['mean'].copy()
+            accumulator._m2 = data['m2'].copy()
+            metadata = {key: data[key] for key in data.files if key not in ('count', 'mean', 'm2')}
+        return accumulator, metadata
+
+def _ensemble_chunk(geometry, particles, seed, start, count, mobility_function, reduction, mobility_parameters):
+    '''
+    Accumulate the (reduced) mobility tensors of some members of the ensemble.
+    '''
+    accumulator = None
+    for positions in geometry.sample(particles, count, seed=seed, start=start):
+        sample = mobility_function(positions, **mobility_parameters)
+        sample = np.asarray(sample if reduction is None else reduction(sample))
+        if accumulator is None:
+            accumulator = WelfordAccumulator(sample.shape)
+        accumulator.update(sample)
+    return accumulator
+
+def _checkpoint_metadata(seed, k, chunk_size, mobility_function, reduction, mobility_parameters) -> dict:
+    '''
+    Settings of an ensemble run saved with its checkpoints, which must match to resume it.
+    '''
+    def name(function):
+        return 'None' if function is None else f'{function.__module__}.{getattr(function, "__qualname__", repr(function))}'
+    return {'seed': str(seed), 'k': k, 'chunk_size': chunk_size, 'mobility_function': name(mobility_function),
+            'reduction': name(reduction), 'mobility_parameters': json.dumps(mobility_parameters, sort_keys=True, default=repr)}
+
+def ensemble_mobility(geometry, particles, k: int, seed: int = 0, workers: int = None, chunk_size: int = 16,
+                      mobility_function=None, reduction=None, checkpoint: str = None, **mobility_parameters) -> WelfordAccumulator:
+    '''
+    Streaming mean and variance of the mobility tensor over an ensemble of configurations.
+
+    The members are generated by geometry.sample with independent seeded streams, in chunks
+    sent to a process pool. Every chunk is accumulated by its worker and merged in order, with
+    at most two chunks per worker in flight, so the memory use does not depend on k.
+
+    Parameters
+    ----------
+    geometry :
+        Geometry generating the configurations (see particles_mod.geometry.Geometry.sample).
+    particles :
+        Particles object passed to the geometry.
+    k : int
+        Number of members of the ensemble, at least 1.
+    seed : int, optional
+        Seed of the ensemble. Default is 0. It can not be None when a checkpoint is used.
+    workers : int, optional
+        Number of worker processes. Default is None, which evaluates the members in this process.
+    chunk_size : int, optional
+        Number of members sent to a worker at once. Default is 16.
+    mobility_function : callable, optional
+        Function returning the mobility tensor of some positions. Default is getMobilityTensorRPY.
+        It must be picklable to use several workers.
+    reduction : callable, optional
+        Function applied to every mobility tensor before accumulating it, e.g. a trace or a
+        sum of blocks. Default is None, which accumulates the whole tensor.
+    checkpoint : str, optional
+        Path of an .npz file where the accumulator is saved after every chunk. If it exists,
+        the run resumes after the members already accumulated. The seed, k, chunk_size, the
+        functions and the mobility parameters of the run must match the ones of the checkpoint.
+    **mobility_parameters :
+        Parameters of the mobility function, e.g. hyd_radius and viscosity.
+
+    Returns
+    -------
+    accumulator : WelfordAccumulator
+        Mean and variance of the (reduced) mobility tensors over the ensemble.
+    '''
+    if k < 1:
+        raise ValueError(f'The ensemble needs at least one member, got k={k}.')
+    if checkpoint is not None and seed is None:
+        raise ValueError('A checkpointed ensemble needs a seed, so that the resumed members follow the saved ones.')
+    mobility_function = mobility_function or getMobilityTensorRPY
+
+    settings = _checkpoint_metadata(seed, k, chunk_size, mobility_function, reduction, mobility_parameters)
+    accumulator = None
+    if checkpoint is not None and os.path.exists(checkpoint):
+        accumulator, metadata = WelfordAccumulator.load(checkpoint)
+        for key, value in settings.items():
+            saved = metadata[key].item() if key in metadata else None
+            if saved != value:
+                raise ValueError(f'The checkpoint {checkpoint} was written with {key} {saved}, not {value}.')
+        if accumulator.count > k:
+            raise ValueError(f'The checkpoint {checkpoint} has {accumulator.count} members, more than {k}.')
+    first = accumulator.count if accumulator is not None else 0
+    chunks = ((start, min(chunk_size, k - start)) for start in range(first, k, chunk_size))
+
+    def merge(chunk_accumulator):
+        nonlocal accumulator
+        if accumulator is None:
+            accumulator = chunk_accumulator
+        else:
+            accumulator.merge(chunk_accumulator)
+        if checkpoint is not None:
+            accumulator.save(checkpoint, **settings)
+
+    arguments = (mobility_function, reduction, mobility_parameters)
+    if workers is None or workers <= 1:
+        for start, count in chunks:
+            merge(_ensemble_chunk(geometry, particles, seed, start, count, *arguments))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for start, count in chunks:
+                pending.append(executor.submit(_ensemble_chunk, geometry, particles, seed, start, count, *arguments))
+                if len(pending) >= 2 * workers:
+                    merge(pending.popleft().result())
+            while pending:
+                merge(pending.popleft().result())
+    return accumulator
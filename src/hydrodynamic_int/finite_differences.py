@@ -0,0 +1,200 @@
+'''
+Finite-difference Hessian engine for arbitrary potentials.
+'''
+
+import numpy as np
+import scipy.sparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from .bonded import bond_columns
+from .hessian import blocks_to_sparse_hessian
+
+def interaction_graph(bonds: dict, nparticles: int) -> scipy.sparse.csr_matrix:
+    """
+    Obtain the graph of particles sharing at least one bond.
+
+    Parameters
+    ----------
+    bonds : dictionary
+        A UAMMD-structured dictionary representing the bonds between particles.
+    nparticles :
+        Number of particles.
+
+    Returns
+    -------
+    graph : scipy.sparse.csr_matrix
+        Boolean (nparticles, nparticles) adjacency matrix, including the diagonal. Its pattern is
+        the pattern of non vanishing Hessian blocks.
+    """
+
+    rows = [np.arange(nparticles)]
+    columns = [np.arange(nparticles)]
+    for bond in bonds.values():
+        bond_table = bond_columns(bond)
+        ids = [bond_table[label] for label in bond["labels"] if label.startswith("id_")]
+        for a in ids:
+            for b in ids:
+                if a is not b:
+                    rows.append(a)
+                    columns.append(b)
+    rows = np.concatenate(rows)
+    columns = np.concatenate(columns)
+    graph = scipy.sparse.csr_matrix((np.ones(len(rows), dtype=bool), (rows, columns)), shape=(nparticles, nparticles))
+    graph.sum_duplicates()
+    return graph
+
+def color_particles(graph: scipy.sparse.csr_matrix) -> np.ndarray:
+    """
+    Color the particles so that particles of the same color can be displaced at the same time.
+
+    Two particles get different colors if they interact or if they interact with a common
+    particle (a distance-2 coloring of the interaction graph), so every gradient component only
+    responds to one displaced particle of each color. A greedy coloring is used.
+
+    Parameters
+    ----------
+    graph : scipy.sparse.csr_matrix
+        Adjacency matrix of the interaction graph, including the diagonal.
+
+    Returns
+    -------
+    colors :
+        The color of every particle, from 0 to ncolors - 1.
+    """
+
+    graph = graph.astype(np.int32)
+    conflicts = (graph @ graph).tocsr()
+    nparticles = graph.shape[0]
+    colors = np.full(nparticles, -1, dtype=int)
+    for particle in range(nparticles):
+        neighbors = conflicts.indices[conflicts.indptr[particle]:conflicts.indptr[particle + 1]]
+        used = set(colors[neighbors].tolist())
+        color = 0
+        while color in used:
+            color += 1
+        colors[particle] = color
+    return colors
+
+class EnergyGradient:
+    '''
+    Gradient of a vectorized energy function by central differences.
+
+    Parameters
+    ----------
+    energy : callable
+        Function returning the energies of a (nconfigurations, nparticles, 3) stack of positions
+        as a (nconfigurations,) array.
+    step : float
+        Displacement of the central differences.
+    batch_size : int
+        Maximum number of displaced configurations passed to the energy function at once.
+    '''
+
+    def __init__(self, energy, step: float = 1e-5, batch_size: int = 256):
+        '''
+        Constructor of the EnergyGradient class.
+        '''
+        self.energy = energy
+        self.step = step
+        self.batch_size = batch_size
+
+    def __call__(self, positions: np.ndarray) -> np.ndarray:
+        '''
+        Evaluate the gradient of the energy with shape (nparticles, 3).
+        '''
+        ncoordinates = positions.size
+        gradient = np.empty(ncoordinates)
+        for start in range(0, ncoordinates, self.batch_size):
+            coordinates = np.arange(start, min(start + self.batch_size, ncoordinates))
+            displaced = np.repeat(positions.reshape(1, -1), 2 * len(coordinates), axis=0)
+            displaced[np.arange(len(coordinates)), coordinates] += self.step
+            displaced[len(coordinates) + np.arange(len(coordinates)), coordinates] -= self.step
+            energies = np.asarray(self.energy(displaced.reshape(-1, *positions.shape)))
+            gradient[coordinates] = (energies[:len(coordinates)] - energies[len(coordinates):]) / (2 * self.step)
+        return gradient.reshape(positions.shape)
+
+def _color_response(gradient, positions, colors, step, task):
+    '''
+    Central difference of the gradient when all the particles of a color are displaced along one direction.
+    '''
+    color, direction = task
+    displaced = positions.copy()
+    displaced[colors == color, direction] += step
+    forward = np.asarray(gradient(displaced))
+    displaced[colors == color, direction] -= 2 * step
+    backward = np.asarray(gradient(displaced))
+    return (forward - backward) / (2 * step)
+
+def finite_difference_hessian(positions: np.ndarray, gradient=None, energy=None, bonds: dict = None, step: float = 1e-5,
+                              workers: int = None, sparse: bool = False):
+    """
+    Compute a Hessian by central differences of the gradient of an arbitrary potential.
+
+    The particles are colored with the bond topology so that all the particles of a color are
+    displaced at once, which needs 6 * ncolors gradient evaluations instead of 6 * nparticles.
+    Without bonds every particle is assumed to interact with every other one.
+
+    Parameters
+    ----------
+    positions :
+        Positions of the particles with shape (nparticles, 3).
+    gradient : callable, optional
+        Function returning the (nparticles, 3) energy gradient of some positions.
+    energy : callable, optional
+        Vectorized energy function (see EnergyGradient), used when gradient is not given.
+    bonds : dictionary, optional
+        A UAMMD-structured dictionary with the bonds defining which particles interact.
+    step :
+        Displacement of the central differences.
+    workers :
+        Number of processes evaluating the displaced gradients. Default is a serial evaluation.
+        The gradient or energy functions must be picklable to use several workers.
+    sparse :
+        If True, return a block-sparse Hessian (see blocks_to_sparse_hessian).
+
+    Returns
+    -------
+    hessian :
+        The Hessian matrix in (nparticles, nparticles, 3, 3) format or as a scipy.sparse.bsr_matrix.
+    """
+
+    if gradient is None:
+        if energy is None:
+            raise ValueError("Either a gradient or an energy function must be given.")
+        gradient = EnergyGradient(energy, step)
+
+    positions = np.asarray(positions, dtype=float)
+    nparticles = positions.shape[0]
+    if bonds is None:
+        graph = scipy.sparse.csr_matrix(np.ones((nparticles, nparticles), dtype=bool))
+        colors = np.arange(nparticles)
+    else:
+        graph = interaction_graph(bonds, nparticles)
+        colors = color_particles(graph)
+
+    ncolors = colors.max() + 1
+    tasks = [(color, direction) for color in range(ncolors) for direction in range(3)]
+    evaluate = partial(_color_response, gradient, positions, colors, step)
+    if workers is None or workers <= 1:
+        responses = list(map(evaluate, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            responses = list(executor.map(evaluate, tasks))
+    # responses[color, direction, particle, coordinate]
+    responses = np.array(responses).reshape(ncolors, 3, nparticles, 3)
+
+    graph = graph.tocoo()
+    rows, columns = graph.row, graph.col
+    # H[j, i, a, d] is the response of the coordinate a of particle j to displacing the color of i along d
+    blocks = responses[colors[columns], :, rows, :].transpose(0, 2, 1)
+    # Symmetrize to remove the asymmetric part of the finite difference error
+    keys = rows.astype(np.int64) * nparticles + columns
+    order = np.argsort(keys)
+    partners = order[np.searchsorted(keys[order], columns.astype(np.int64) * nparticles + rows)]
+    blocks = 0.5 * (blocks + blocks[partners].transpose(0, 2, 1))
+
+    if sparse:
+        return blocks_to_sparse_hessian(rows, columns, blocks, nparticles)
+    hessian = np.zeros((nparticles, nparticles, 3, 3))
+    hessian[rows, columns] = blocks
+    return hessian
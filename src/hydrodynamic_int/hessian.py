@@ -1,10 +1,14 @@
-import pyUAMMD
 import numpy as np
+import scipy.sparse
+import itertools
 import os
+import shutil
 import tempfile
+import time
 from typing import Iterable
+from .bonded import bond_columns
 
-def read_hessian_file(file_path):
+def read_hessian_file(file_path, sparse: bool = False):
     
     hessian_f = np.loadtxt(file_path)
     # Hessian file has shape (npairs, 11), first two columns are the pair indices
@@ -19,10 +23,92 @@ def read_hessian_file(file_path):
     i = hessian_f[:, 0].astype(int)
     j = hessian_f[:, 1].astype(int)
     matrices = hessian_f[:, 2:].reshape(-1, 3, 3)
+    if sparse:
+        # Keep only the non vanishing blocks
+        nonzero = np.any(matrices != 0, axis=(1, 2))
+        return blocks_to_sparse_hessian(i[nonzero], j[nonzero], matrices[nonzero], n)
     hessian = np.empty((n, n, 3, 3))
     hessian[i, j] = matrices
     return hessian
 
+def read_hessian_diagonal_blocks(file_path, nparticles: int, ncopies: int, chunk_rows: int = 2**16) -> np.ndarray:
+    """
+    Read the Hessians of the non interacting copies of a structure from a Hessian file.
+
+    The file is parsed in chunks of rows and only the blocks between particles of the same copy
+    are kept, so the memory used grows linearly with the number of copies.
+
+    Parameters
+    ----------
+    file_path :
+        Path to the Hessian file of the packed system of ncopies * nparticles particles.
+    nparticles :
+        Number of particles of every copy.
+    ncopies :
+        Number of copies, copy c holding the particles c * nparticles to (c + 1) * nparticles - 1.
+    chunk_rows :
+        Number of rows of the file parsed at once.
+
+    Returns
+    -------
+    hessians :
+        The Hessians of the copies in (ncopies, nparticles, nparticles, 3, 3) format.
+    """
+
+    hessians = np.empty((ncopies, nparticles, nparticles, 3, 3))
+    nblocks = 0
+    with open(file_path) as file:
+        while True:
+            lines = list(itertools.islice(file, chunk_rows))
+            if not lines:
+                break
+            table = np.loadtxt(lines, ndmin=2)
+            assert (
+                table.shape[1] == 11
+            ), f"Hessian file has unexpected shape {table.shape}"
+            i = table[:, 0].astype(int)
+            j = table[:, 1].astype(int)
+            # Keep only the (copy, copy) blocks
+            same_copy = i // nparticles == j // nparticles
+            i, j = i[same_copy], j[same_copy]
+            hessians[i // nparticles, i % nparticles, j % nparticles] = table[same_copy, 2:].reshape(-1, 3, 3)
+            nblocks += len(i)
+    assert (
+        nblocks == ncopies * nparticles**2
+    ), f"Unexpected number of diagonal blocks {nblocks}"
+    return hessians
+
+def blocks_to_sparse_hessian(rows: np.ndarray, columns: np.ndarray, blocks: np.ndarray, nparticles: int):
+    """
+    Assemble a block-sparse Hessian from its non vanishing 3x3 blocks.
+
+    Parameters
+    ----------
+    rows :
+        Index of the first particle of every block.
+    columns :
+        Index of the second particle of every block.
+    blocks :
+        The (nblocks, 3, 3) Hessian blocks, blocks[b] = H[rows[b], columns[b]].
+    nparticles :
+        Number of particles.
+
+    Returns
+    -------
+    hessian : scipy.sparse.bsr_matrix
+        The Hessian in (nparticles * 3, nparticles * 3) format with 3x3 blocks, the same layout
+        returned by reshape_hessian for dense Hessians.
+    """
+
+    rows = np.asarray(rows, dtype=int)
+    columns = np.asarray(columns, dtype=int)
+    order = np.lexsort((columns, rows))
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=nparticles))])
+    return scipy.sparse.bsr_matrix(
+        (np.asarray(blocks, dtype=float)[order], columns[order], indptr),
+        shape=(3 * nparticles, 3 * nparticles)
+    )
+
 def obtain_Box(positions):
     """
     Obtain the simulation box from the positions of the particles.
@@ -44,18 +130,21 @@ def obtain_Box(positions):
     box = [(max_coords[i] - min_coords[i])*1.5 for i in range(3)]
     return box
 
-def create_simulation(positions, bonds, output_file_path):
+def create_simulation(positions, bonds, output_file_path, simulation_factory=None):
     """
     Create a pyUAMMD simulation object with the given positions and bonds.
     
     Parameters
     ----------
-    positions : list of tuples
-        A list of tuples representing the positions of atoms.
+    positions : list of tuples or numpy.ndarray
+        A list of tuples or a (natoms, 3) array representing the positions of atoms.
     bonds : list of tuples
         A list of tuples representing the bonds between atoms.
     output_file_path : str
         The path to the output file for the simulation.
+    simulation_factory : callable, optional
+        Callable returning an empty simulation object. Default is pyUAMMD.simulation; a
+        `hydrodynamic_int.local_simulation.LocalSimulation` can be used when pyUAMMD is not available.
     
     Returns
     -------
@@ -64,7 +153,11 @@ def create_simulation(positions, bonds, output_file_path):
     """
 
     # Create a pyUAMMD simulation object
-    simulation = pyUAMMD.simulation()
+    if simulation_factory is None:
+        # pyUAMMD is only needed (and imported) to run UAMMD simulations
+        import pyUAMMD
+        simulation_factory = pyUAMMD.simulation
+    simulation = simulation_factory()
 
     # Set up the system information
     simulation["system"] = {
@@ -113,6 +206,7 @@ def create_simulation(positions, bonds, output_file_path):
 
     # Initialize Particle Positions and Topology
 
+    positions = np.asarray(positions, dtype=float).tolist()
     simulation["state"] = {
         "labels": ["id", "position"],
         "data": [[i, positions[i]] for i in range(len(positions))]
@@ -123,8 +217,10 @@ def create_simulation(positions, bonds, output_file_path):
             "data": [[i, "A"] for i in range(len(positions))]
         }
     }
-    # Initialize the force field dictionary
-    simulation["topology"]["forceField"] = bonds
+    # Initialize the force field dictionary, with the bond tables converted to plain dictionaries of rows
+    # Bond tables are converted to plain dictionaries with list data
+    simulation["topology"]["forceField"] = {name: bond.to_dict() if hasattr(bond, "to_dict") else dict(bond)
+                                            for name, bond in bonds.items()}
     # Configure Simulation Steps
     simulation["simulationStep"] = {
         # Output simulation information periodically
@@ -146,30 +242,308 @@ def create_simulation(positions, bonds, output_file_path):
     return simulation
 
 
-def obtainHessian (positions: Iterable[float] , bonds: dict) -> np.ndarray:
+def restrict_bonds(bonds: dict, subset: np.ndarray) -> tuple:
+    """
+    Keep the bonds that involve at least one particle of a subset, relabelled to the particles they involve.
+
+    These are the only bonds contributing to the Hessian blocks between particles of the subset.
+
+    Parameters
+    ----------
+    bonds : dictionary
+        A UAMMD-structured dictionary representing the bonds between atoms.
+    subset :
+        Indices of the particles of the subset.
+
+    Returns
+    -------
+    restricted_bonds :
+        A UAMMD-structured dictionary with the kept bonds, whose particle ids are positions in `involved`.
+    involved :
+        Sorted indices of the subset particles and of their bonded partners.
+    """
+
+    subset = np.asarray(subset, dtype=int)
+    kept = {}
+    for name, bond in bonds.items():
+        columns = bond_columns(bond)
+        id_labels = [label for label in bond["labels"] if label.startswith("id_")]
+        mask = np.zeros(len(columns[bond["labels"][0]]), dtype=bool)
+        for label in id_labels:
+            mask |= np.isin(columns[label], subset)
+        if mask.any():
+            kept[name] = (bond, {label: columns[label][mask] for label in bond["labels"]}, id_labels)
+    involved = np.unique(np.concatenate([subset] + [columns[label] for _, columns, id_labels in kept.values() for label in id_labels]))
+
+    restricted_bonds = {}
+    for name, (bond, columns, id_labels) in kept.items():
+        for label in id_labels:
+            columns[label] = np.searchsorted(involved, columns[label])
+        rows = zip(*(columns[label].tolist() for label in bond["labels"]))
+        restricted_bonds[name] = {"type": bond["type"], "parameters": dict(bond.get("parameters", {})),
+                                  "labels": bond["labels"], "data": [list(row) for row in rows]}
+    return restricted_bonds, involved
+
+def obtainHessian (positions: Iterable[float] , bonds: dict, simulation_factory=None, subset=None, sparse: bool = False) -> np.ndarray:
     """
     Obtain the Hessian matrix from the positions and bonds.
     
     Parameters
     ----------
     positions :
-        Positions of atoms.
+        Positions of atoms, or a Particles object. For a Particles subset (see Particles.subset)
+        the Hessian blocks of the subset are computed, with the bonds indexing the parent particles.
+        The subset particles are taken at the positions of the subset and their bonded partners
+        at the positions of the parent.
     bonds : dictionary
         A UAMMD-structured dictionary representing the bonds between atoms.
+    simulation_factory : callable, optional
+        Callable returning an empty simulation object (see `create_simulation`).
+    subset : array_like, optional
+        Indices of the particles whose Hessian blocks are computed. Only the subset particles
+        and their bonded partners are simulated.
+    sparse : bool, optional
+        If True, only the non vanishing blocks are kept (see read_hessian_file).
     
     Returns
     -------
     hessian : 
-        The Hessian matrix.
+        The Hessian matrix, with shape (n, n, 3, 3) for the n particles (of the subset), or a
+        (n * 3, n * 3) scipy.sparse.bsr_matrix if sparse is True.
     """
+    if getattr(positions, "parent", None) is not None:
+        subset = positions.parent_index
+        # The bonded partners outside the subset keep the positions of the parent, while the
+        # subset particles use the positions of the subset (which may be edited copies)
+        subset_positions = positions.position
+        positions = np.array(positions.parent.position, dtype=float)
+        positions[subset] = subset_positions
+    positions = np.asarray(getattr(positions, "position", positions))
+
+    if subset is not None:
+        bonds, involved = restrict_bonds(bonds, subset)
+        local = np.searchsorted(involved, np.asarray(subset, dtype=int))
+        hessian = obtainHessian(positions[involved], bonds, simulation_factory, sparse=sparse)
+        if sparse:
+            indices = (3 * local[:, np.newaxis] + np.arange(3)).ravel()
+            return hessian.tocsr()[indices][:, indices].tobsr(blocksize=(3, 3))
+        return hessian[np.ix_(local, local)]
+
     with tempfile.TemporaryDirectory() as tmpdir:
         hessian_file_path = os.path.join(tmpdir, "hessian.txt")
-        simulation = create_simulation(positions, bonds, hessian_file_path)
+        simulation = create_simulation(positions, bonds, hessian_file_path, simulation_factory)
         simulation.run()
-        hessian = read_hessian_file(hessian_file_path)
+        hessian = read_hessian_file(hessian_file_path, sparse=sparse)
         
     return hessian
 
+class HessianSession:
+    """
+    Hessian simulation dictionary built once and reused for many configurations of the same structure.
+
+    Only the particle positions change between calls, so the nested simulation dictionary
+    (types, ensemble, integrator, topology and force field) is created once and the positions
+    are swapped in place before every run. The Hessian is written to the same output file on
+    every call, placed in a memory-backed directory (/dev/shm) when available.
+
+    Only the construction of the dictionary and of the output directory are amortized: every
+    call still runs the whole simulation, including the pyUAMMD startup. The saving is largest
+    for large bond lists (see benchmarks/bench_hessian_session.py and amortized_latency).
+
+    Parameters
+    ----------
+    bonds : dictionary
+        A UAMMD-structured dictionary representing the bonds between atoms.
+    nparticles :
+        Number of particles of the structure.
+    simulation_factory : callable, optional
+        Callable returning an empty simulation object (see `create_simulation`).
+    buffer_dir : str, optional
+        Directory where the reusable output file is created.
+
+    Attributes
+    ----------
+    simulation :
+        The reused simulation object.
+    output_file_path : str
+        Path of the reusable Hessian output file.
+    ncalls : int
+        Number of Hessians computed.
+    total_time : float
+        Total time spent computing Hessians, in seconds.
+
+    Methods
+    -------
+    compute(positions)
+        Obtain the Hessian matrix of some positions.
+    close()
+        Remove the output buffer.
+    """
+
+    def __init__(self, bonds: dict, nparticles: int, simulation_factory=None, buffer_dir: str = None):
+        if buffer_dir is None and os.path.isdir("/dev/shm"):
+            buffer_dir = "/dev/shm"
+        self._directory = tempfile.mkdtemp(prefix="hessian_session_", dir=buffer_dir)
+        self.output_file_path = os.path.join(self._directory, "hessian.txt")
+        self.nparticles = nparticles
+        self.simulation = create_simulation(np.zeros((nparticles, 3)).tolist(), bonds, self.output_file_path, simulation_factory)
+        self.ncalls = 0
+        self.total_time = 0.0
+
+    @property
+    def amortized_latency(self) -> float:
+        """
+        Average time per computed Hessian, in seconds.
+        """
+        return self.total_time / self.ncalls if self.ncalls else 0.0
+
+    def compute(self, positions) -> np.ndarray:
+        """
+        Obtain the Hessian matrix of some positions.
+
+        Parameters
+        ----------
+        positions :
+            Positions of the particles with shape (nparticles, 3).
+
+        Returns
+        -------
+        hessian :
+            The Hessian matrix in (nparticles, nparticles, 3, 3) format.
+        """
+        start = time.perf_counter()
+        positions = np.asarray(positions, dtype=float)
+        if positions.shape != (self.nparticles, 3):
+            raise ValueError(f"The positions must have shape {(self.nparticles, 3)}, got {positions.shape}.")
+        for row, position in zip(self.simulation["state"]["data"], positions.tolist()):
+            row[1] = position
+        # The output of the previous call is removed, so it is never appended to or read again
+        if os.path.exists(self.output_file_path):
+            os.remove(self.output_file_path)
+        self.simulation.run()
+        hessian = read_hessian_file(self.output_file_path)
+        self.total_time += time.perf_counter() - start
+        self.ncalls += 1
+        return hessian
+
+    def close(self):
+        """
+        Remove the output buffer.
+        """
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def replicate_bonds(bonds: dict, nparticles: int, ncopies: int) -> dict:
+    """
+    Replicate a bonds dictionary for several copies of the same structure packed in one system.
+
+    Parameters
+    ----------
+    bonds : dictionary
+        A UAMMD-structured dictionary representing the bonds of one copy of the structure.
+    nparticles :
+        Number of particles of one copy of the structure.
+    ncopies :
+        Number of copies packed in the system. Copy c uses the particle ids c*nparticles ... (c+1)*nparticles - 1.
+
+    Returns
+    -------
+    packed_bonds :
+        A UAMMD-structured dictionary with the bonds of all the copies.
+    """
+
+    packed_bonds = {}
+    for name, bond in bonds.items():
+        columns = bond_columns(bond)
+        nbonds = len(columns[bond["labels"][0]])
+        offsets = np.repeat(np.arange(ncopies) * nparticles, nbonds)
+        packed_columns = []
+        for label in bond["labels"]:
+            column = np.tile(columns[label], ncopies)
+            if label.startswith("id_"):
+                column = column + offsets
+            packed_columns.append(column.tolist())
+        # Only the metadata is copied, the "data" of a BondTable would build its whole row list
+        packed_bonds[name] = {"type": bond["type"], "parameters": dict(bond.get("parameters", {})), "labels": bond["labels"],
+                              "data": [list(row) for row in zip(*packed_columns)]}
+    return packed_bonds
+
+# Default maximum number of particles packed in one simulation by obtainHessianBatch
+MAX_PACKED_PARTICLES = 1000
+
+def obtainHessianBatch(positions_batch: np.ndarray, bonds: dict, batch_size: int = None, simulation_factory=None) -> np.ndarray:
+    """
+    Obtain the Hessian matrices of many configurations of the same structure.
+
+    The configurations are packed as non interacting copies of the structure in a single
+    simulation, so the simulation startup is paid once per batch instead of once per configuration.
+    Copies may overlap in space because the force field only contains bonded interactions.
+
+    Parameters
+    ----------
+    positions_batch :
+        Positions of the configurations with shape (nconfigurations, nparticles, 3).
+    bonds : dictionary
+        A UAMMD-structured dictionary representing the bonds, shared by all the configurations.
+    batch_size :
+        Maximum number of configurations packed in one simulation. Default packs at most
+        MAX_PACKED_PARTICLES particles per simulation. The Hessian file written by pyUAMMD holds
+        every pair of particles, so its size and the time to write and parse it grow with the
+        square of the batch size. Only the diagonal blocks are kept while reading it.
+    simulation_factory : callable, optional
+        Callable returning an empty simulation object (see `create_simulation`).
+
+    Returns
+    -------
+    hessians :
+        The Hessian matrices in (nconfigurations, nparticles, nparticles, 3, 3) format.
+    """
+
+    positions_batch = np.asarray(positions_batch, dtype=float)
+    nconfigurations, nparticles = positions_batch.shape[:2]
+    if batch_size is None:
+        batch_size = max(1, MAX_PACKED_PARTICLES // nparticles)
+
+    hessians = np.empty((nconfigurations, nparticles, nparticles, 3, 3))
+    for start in range(0, nconfigurations, batch_size):
+        stop = min(start + batch_size, nconfigurations)
+        ncopies = stop - start
+        packed_positions = positions_batch[start:stop].reshape(-1, 3)
+        packed_bonds = replicate_bonds(bonds, nparticles, ncopies)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            hessian_file_path = os.path.join(tmpdir, "hessian.txt")
+            simulation = create_simulation(packed_positions, packed_bonds, hessian_file_path, simulation_factory)
+            simulation.run()
+            hessians[start:stop] = read_hessian_diagonal_blocks(hessian_file_path, nparticles, ncopies)
+
+    return hessians
+
+def reshape_hessian(hessian: np.ndarray) -> np.ndarray:
+    """
+    Reshape a Hessian matrix to the (nparticles * 3, nparticles * 3) format of the mobility tensor.
+
+    Parameters
+    ----------
+    hessian :
+        The Hessian matrix in (nparticles, nparticles, 3, 3) format.
+
+    Returns
+    -------
+    hessian_reshaped :
+        The Hessian matrix in (nparticles * 3, nparticles * 3) format.
+    """
+
+    nparticles = hessian.shape[0]
+    # Transposing is done in order to change al the coordinates and indexes
+    # for the second particle before changing the coordinates of the first particle
+    preprocessed_hessian = hessian.transpose(0, 2, 1, 3)
+    return preprocessed_hessian.reshape((nparticles * 3, nparticles * 3))
+
 def diagonalize_hessian(hessian: np.ndarray) -> np.ndarray:
     """
     Diagonalize the Hessian matrix.
@@ -192,10 +566,7 @@ def diagonalize_hessian(hessian: np.ndarray) -> np.ndarray:
     """
 
     nparticles = hessian.shape[0]
-    # Transposing is done in order to change al the coordinates and indexes
-    # for the second particle before changing the coordinates of the first particle
-    preprocessed_hessian = hessian.transpose(0, 2, 1, 3)
-    hessian_reshaped = preprocessed_hessian.reshape((nparticles * 3, nparticles * 3)) 
+    hessian_reshaped = reshape_hessian(hessian)
     eigenvalues, eigenvectors = np.linalg.eigh(hessian_reshaped)
     sorted_indices = np.argsort(eigenvalues)
     eigenvalues = eigenvalues[sorted_indices]
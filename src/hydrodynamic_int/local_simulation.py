@@ -0,0 +1,59 @@
+'''
+Local stand-in for pyUAMMD simulations that only needs numpy.
+'''
+
+import numpy as np
+from .bonded import bonded_hessian
+
+class LocalSimulation(dict):
+    '''
+    Minimal replacement of a pyUAMMD simulation that evaluates the Hessian of the bonded force field on the CPU.
+
+    It accepts the same nested dictionary built by `create_simulation` and, when run, writes the
+    output of every "HessianMeasure" simulation step in the pyUAMMD file format (one row per
+    particle pair with the pair indices followed by the 9 Hessian elements). Integrators, ensemble
+    and non bonded interactions are ignored, so it is only meant for testing and for machines
+    without pyUAMMD.
+
+    Methods
+    -------
+    run()
+        Evaluate the simulation steps of the simulation dictionary.
+    '''
+
+    def run(self):
+        '''
+        Evaluate the simulation steps of the simulation dictionary.
+        '''
+        state = self["state"]
+        id_column = state["labels"].index("id")
+        position_column = state["labels"].index("position")
+        ids = np.array([row[id_column] for row in state["data"]], dtype=int)
+        positions = np.empty((len(ids), 3))
+        positions[ids] = [row[position_column] for row in state["data"]]
+
+        for step in self.get("simulationStep", {}).values():
+            if step["type"] != ["MechanicalMeasure", "HessianMeasure"]:
+                continue
+            parameters = step["parameters"]
+            hessian = bonded_hessian(positions, self["topology"].get("forceField", {}))
+            write_hessian_file(parameters["outputFilePath"], hessian, parameters.get("outputPrecision", 6))
+
+def write_hessian_file(file_path, hessian, precision=6):
+    """
+    Write a (n, n, 3, 3) Hessian with the pyUAMMD HessianMeasure file layout.
+
+    Parameters
+    ----------
+    file_path :
+        Path to the output file.
+    hessian :
+        The Hessian matrix in (nparticles, nparticles, 3, 3) format.
+    precision :
+        Number of decimals of the Hessian elements.
+    """
+
+    nparticles = hessian.shape[0]
+    i, j = np.meshgrid(np.arange(nparticles), np.arange(nparticles), indexing="ij")
+    table = np.column_stack([i.ravel(), j.ravel(), hessian.reshape(-1, 9)])
+    np.savetxt(file_path, table, fmt=["%d", "%d"] + [f"%.{precision}e"] * 9)
@@ -0,0 +1,199 @@
+'''
+Overdamped relaxation modes of bonded structures with hydrodynamic interactions.
+'''
+
+import numpy as np
+import scipy.linalg
+import scipy.sparse
+import scipy.sparse.linalg
+from .utils import getMobilityTensorRPY
+from .hessian import obtainHessian, reshape_hessian
+from .backends import create_backend
+
+# scipy renamed the relative tolerance of its iterative solvers from tol to rtol in version 1.12
+_CG_TOLERANCE = "rtol" if tuple(int(part) for part in scipy.__version__.split(".")[:2]) >= (1, 12) else "tol"
+
+class MobilityFactorization:
+    '''
+    Cholesky factorization of the mobility tensor, reused across nearby configurations.
+
+    Parameters
+    ----------
+    mobility_function : callable, optional
+        Function returning the (nparticles * 3, nparticles * 3) mobility tensor of some positions.
+        Default is getMobilityTensorRPY.
+    tolerance : float, optional
+        Maximum particle displacement with respect to the factorized configuration for which the
+        cached factorization is reused. Default is 0, which only reuses it for identical positions.
+    **mobility_parameters :
+        Extra keyword arguments for the mobility function (hyd_radius, viscosity...).
+
+    Attributes
+    ----------
+    positions : numpy.ndarray
+        Positions of the last factorized configuration.
+    lower : numpy.ndarray
+        Lower triangular Cholesky factor L of the mobility tensor, M = L L^T.
+    nfactorizations : int
+        Number of factorizations computed.
+    nreuses : int
+        Number of times the cached factorization was reused.
+
+    Methods
+    -------
+    factor(positions)
+        Return the Cholesky factor of the mobility tensor for some positions.
+    '''
+
+    def __init__(self, mobility_function=None, tolerance: float = 0.0, **mobility_parameters):
+        '''
+        Constructor of the MobilityFactorization class.
+        '''
+        self.mobility_function = mobility_function or getMobilityTensorRPY
+        self.tolerance = tolerance
+        self.mobility_parameters = mobility_parameters
+        self.positions = None
+        self.lower = None
+        self.nfactorizations = 0
+        self.nreuses = 0
+
+    def factor(self, positions: np.ndarray) -> np.ndarray:
+        '''
+        Return the Cholesky factor of the mobility tensor for some positions.
+
+        Parameters
+        ----------
+        positions : numpy.ndarray
+            Positions of the particles with shape (nparticles, 3).
+
+        Returns
+        -------
+        lower : numpy.ndarray
+            Lower triangular Cholesky factor of the mobility tensor.
+        '''
+        positions = np.asarray(positions, dtype=float)
+        if self.positions is not None and self.positions.shape == positions.shape:
+            displacement = np.max(np.linalg.norm(positions - self.positions, axis=1))
+            if displacement <= self.tolerance:
+                self.nreuses += 1
+                return self.lower
+
+        mobility = self.mobility_function(positions, **self.mobility_parameters)
+        self.lower = scipy.linalg.cholesky(mobility, lower=True)
+        self.positions = positions.copy()
+        self.nfactorizations += 1
+        return self.lower
+
+def relaxation_modes(positions, bonds: dict = None, hyd_radius: float = 1.0, viscosity: float = 1.0, k: int = None,
+                     hessian: np.ndarray = None, mobility: np.ndarray = None, factorization: MobilityFactorization = None,
+                     matrix_free: bool = False, simulation_factory=None):
+    """
+    Obtain the overdamped relaxation modes of a structure, the eigenpairs of M·H.
+
+    The nonsymmetric problem M H v = rate v is solved through the symmetric matrix L^T H L, where
+    M = L L^T is the Cholesky factorization of the mobility tensor. The modes are v = L w for the
+    eigenvectors w of the symmetric matrix, so they are orthonormal with the M^-1 metric.
+
+    The matrix free solver never builds M, its factorization or a dense Hessian. It solves the
+    generalized symmetric problem H v = rate M^-1 v with a Lanczos solver, using the block-sparse
+    Hessian and products of the mobility with vectors (from a mobility backend unless mobility or
+    factorization are given). The products with M^-1 are conjugate gradient solves, so every
+    Lanczos iteration costs a few tens of mobility products.
+
+    Parameters
+    ----------
+    positions :
+        Positions of the particles with shape (nparticles, 3).
+    bonds : dictionary, optional
+        A UAMMD-structured dictionary representing the bonds. Only needed if hessian is not given.
+    hyd_radius :
+        The hydrodynamic radius of the particles. Only used if neither mobility nor factorization are given.
+    viscosity :
+        The viscosity of the fluid. Only used if neither mobility nor factorization are given.
+    k :
+        Number of slowest modes to compute. Default is all of them.
+    hessian :
+        Precomputed Hessian in (nparticles, nparticles, 3, 3) format, or a (nparticles * 3, nparticles * 3)
+        scipy sparse matrix. Default is obtainHessian(positions, bonds).
+    mobility :
+        Precomputed (nparticles * 3, nparticles * 3) mobility tensor.
+    factorization :
+        MobilityFactorization reused across calls, for instance along a trajectory.
+    matrix_free :
+        If True, the k slowest modes are obtained with a Lanczos solver that only applies the Hessian
+        and the mobility to vectors. Requires k < nparticles * 3.
+    simulation_factory : callable, optional
+        Callable returning an empty simulation object for obtainHessian.
+
+    Returns
+    -------
+    rates :
+        The relaxation rates (eigenvalues of M·H) in ascending order.
+    modes :
+        The relaxation modes in (nmodes, nparticles, 3) format.
+    """
+
+    positions = np.asarray(positions, dtype=float)
+    nparticles = positions.shape[0]
+    if matrix_free:
+        return _matrix_free_relaxation_modes(positions, bonds, hyd_radius, viscosity, k, hessian, mobility,
+                                             factorization, simulation_factory)
+    if hessian is None:
+        hessian = obtainHessian(positions.tolist(), bonds, simulation_factory)
+    if scipy.sparse.issparse(hessian):
+        hessian_reshaped = hessian.toarray()
+    else:
+        hessian_reshaped = reshape_hessian(np.asarray(hessian))
+
+    if mobility is not None:
+        lower = scipy.linalg.cholesky(mobility, lower=True)
+    else:
+        if factorization is None:
+            factorization = MobilityFactorization(hyd_radius=hyd_radius, viscosity=viscosity)
+        lower = factorization.factor(positions)
+
+    symmetrized = lower.T @ hessian_reshaped @ lower
+    subset = None if k is None else [0, k - 1]
+    rates, vectors = scipy.linalg.eigh(symmetrized, subset_by_index=subset)
+
+    sorted_indices = np.argsort(rates)
+    rates = rates[sorted_indices]
+    modes = (lower @ vectors[:, sorted_indices]).T.reshape((-1, nparticles, 3))
+
+    return rates, modes
+
+def _matrix_free_relaxation_modes(positions, bonds, hyd_radius, viscosity, k, hessian, mobility, factorization,
+                                  simulation_factory):
+    '''
+    Relaxation modes from the generalized problem H v = rate M^-1 v, using only products with H and M.
+    '''
+    nparticles = positions.shape[0]
+    if k is None or k >= 3 * nparticles:
+        raise ValueError("The matrix free solver needs a number of modes k smaller than nparticles * 3.")
+    if hessian is None:
+        hessian = obtainHessian(positions.tolist(), bonds, simulation_factory, sparse=True)
+    elif not scipy.sparse.issparse(hessian):
+        hessian = scipy.sparse.bsr_matrix(reshape_hessian(np.asarray(hessian)), blocksize=(3, 3))
+
+    if mobility is not None:
+        mobility_dot = lambda x: mobility @ x
+    elif factorization is not None:
+        lower = factorization.factor(positions)
+        mobility_dot = lambda x: lower @ (lower.T @ x)
+    else:
+        backend = create_backend('auto', nparticles=nparticles, hyd_radius=hyd_radius, viscosity=viscosity)
+        backend.set_positions(positions)
+        mobility_dot = lambda x: backend.Mdot(x.reshape(nparticles, 3)).ravel()
+
+    shape = (3 * nparticles, 3 * nparticles)
+    mobility_operator = scipy.sparse.linalg.LinearOperator(shape, matvec=mobility_dot, dtype=float)
+    inverse_operator = scipy.sparse.linalg.LinearOperator(
+        shape,
+        matvec=lambda x: scipy.sparse.linalg.cg(mobility_operator, x, **{_CG_TOLERANCE: 1e-12})[0],
+        dtype=float
+    )
+    # The eigenvectors are orthonormal with the M^-1 metric, as the modes of the dense solver
+    rates, vectors = scipy.sparse.linalg.eigsh(hessian, k=k, M=inverse_operator, Minv=mobility_operator, which="SA")
+
+    sorted_indices = np.argsort(rates)
+    return rates[sorted_indices], vectors[:, sorted_indices].T.reshape((-1, nparticles, 3))
@@ -0,0 +1,209 @@
+'''
+Streaming projection of trajectories onto Hessian eigenmodes.
+'''
+
+import numpy as np
+
+class ModeProjector:
+    '''
+    Projects trajectory frames onto a set of modes chunk by chunk, accumulating running statistics.
+
+    Every chunk of frames is projected with a single matrix product. The mean, variance and
+    autocorrelation of the mode amplitudes are updated on the fly, so only one chunk of frames
+    (plus max_lag amplitudes) is held in memory.
+
+    Parameters
+    ----------
+    eigenvectors : numpy.ndarray
+        Modes in (nmodes, nparticles, 3) format, as returned by diagonalize_hessian.
+    reference_positions : numpy.ndarray, optional
+        Positions subtracted from every frame before projecting, with shape (nparticles, 3).
+    modes : array_like, optional
+        Indices of the modes to project. Default is all of them.
+    chunk_size : int, optional
+        Number of frames projected at once. Default is 1024.
+    max_lag : int, optional
+        Largest lag, in frames, of the accumulated autocorrelations. Default is 0.
+
+    Attributes
+    ----------
+    nframes : int
+        Number of frames processed.
+    mean : numpy.ndarray
+        Running mean of the mode amplitudes.
+    variance : numpy.ndarray
+        Running variance of the mode amplitudes.
+
+    Methods
+    -------
+    project(frames)
+        Obtain the mode amplitudes of some frames.
+    update(frames)
+        Update the running statistics with a chunk of frames.
+    consume(frames, output=None)
+        Process a whole trajectory chunk by chunk.
+    autocorrelation(normalized=True)
+        Obtain the autocorrelation functions of the mode amplitudes.
+    '''
+
+    def __init__(self, eigenvectors: np.ndarray, reference_positions: np.ndarray = None, modes=None,
+                 chunk_size: int = 1024, max_lag: int = 0):
+        '''
+        Constructor of the ModeProjector class.
+        '''
+        eigenvectors = np.asarray(eigenvectors)
+        if modes is not None:
+            eigenvectors = eigenvectors[np.asarray(modes)]
+        self.nparticles = eigenvectors.shape[1]
+        # (nmodes, nparticles * 3) basis, transposed once so that every chunk is a single GEMM
+        self.basis_t = np.ascontiguousarray(eigenvectors.reshape(eigenvectors.shape[0], -1).T)
+        self.nmodes = self.basis_t.shape[1]
+        if reference_positions is None:
+            self.reference = np.zeros(self.nparticles * 3)
+        else:
+            self.reference = np.asarray(reference_positions, dtype=float).reshape(-1)
+        self.chunk_size = chunk_size
+        self.max_lag = max_lag
+
+        self.nframes = 0
+        self.mean = np.zeros(self.nmodes)
+        self._m2 = np.zeros(self.nmodes)
+        # Sums over the pairs (t, t + lag) of a(t) a(t + lag), a(t) and a(t + lag)
+        self._lag_products = np.zeros((max_lag + 1, self.nmodes))
+        self._lag_heads = np.zeros((max_lag + 1, self.nmodes))
+        self._lag_tails = np.zeros((max_lag + 1, self.nmodes))
+        self._lag_counts = np.zeros(max_lag + 1, dtype=np.int64)
+        self._history = np.zeros((0, self.nmodes))
+
+    @property
+    def variance(self) -> np.ndarray:
+        '''
+        Running variance of the mode amplitudes.
+        '''
+        return self._m2 / self.nframes if self.nframes else np.zeros(self.nmodes)
+
+    def project(self, frames: np.ndarray) -> np.ndarray:
+        '''
+        Obtain the mode amplitudes of some frames.
+
+        Parameters
+        ----------
+        frames : numpy.ndarray
+            Frames with shape (nframes, nparticles, 3).
+
+        Returns
+        -------
+        amplitudes : numpy.ndarray
+            Mode amplitudes with shape (nframes, nmodes).
+        '''
+        flat = np.asarray(frames).reshape(len(frames), -1)
+        return (flat - self.reference) @ self.basis_t
+
+    def update(self, frames: np.ndarray) -> np.ndarray:
+        '''
+        Update the running statistics with a chunk of frames.
+
+        Parameters
+        ----------
+        frames : numpy.ndarray
+            Consecutive frames with shape (nframes, nparticles, 3), following the previous chunk.
+
+        Returns
+        -------
+        amplitudes : numpy.ndarray
+            Mode amplitudes of the chunk with shape (nframes, nmodes).
+        '''
+        amplitudes = self.project(frames)
+        nchunk = amplitudes.shape[0]
+        if nchunk == 0:
+            return amplitudes
+
+        # Chan's parallel update of the mean and the sum of squared deviations
+        chunk_mean = amplitudes.mean(axis=0)
+        chunk_m2 = np.sum((amplitudes - chunk_mean)**2, axis=0)
+        total = self.nframes + nchunk
+        delta = chunk_mean - self.mean
+        self._m2 += chunk_m2 + delta**2 * self.nframes * nchunk / total
+        self.mean += delta * nchunk / total
+        self.nframes = total
+
+        # Lagged products whose later frame lies in this chunk
+        window = np.concatenate([self._history, amplitudes])
+        offset = self._history.shape[0]
+        for lag in range(self.max_lag + 1):
+            start = max(offset, lag)
+            if start >= window.shape[0]:
+                continue
+            tails = window[start:]
+            heads = window[start - lag:window.shape[0] - lag]
+            self._lag_products[lag] += np.einsum('tm,tm->m', heads, tails)
+            self._lag_heads[lag] += heads.sum(axis=0)
+            self._lag_tails[lag] += tails.sum(axis=0)
+            self._lag_counts[lag] += tails.shape[0]
+        if self.max_lag > 0:
+            self._history = window[-self.max_lag:].copy()
+        return amplitudes
+
+    def consume(self, frames, output: np.ndarray = None):
+        '''
+        Process a whole trajectory chunk by chunk.
+
+        Parameters
+        ----------
+        frames : array_like or iterable
+            Array or memory map of shape (nframes, nparticles, 3), or an iterator of single
+            (nparticles, 3) frames.
+        output : numpy.ndarray, optional
+            Array or memory map of shape (nframes, nmodes) where the mode amplitudes are written.
+
+        Returns
+        -------
+        self : ModeProjector
+            The projector with the updated statistics.
+        '''
+        written = 0
+        for chunk in self._chunks(frames):
+            amplitudes = self.update(chunk)
+            if output is not None:
+                output[written:written + amplitudes.shape[0]] = amplitudes
+            written += amplitudes.shape[0]
+        return self
+
+    def _chunks(self, frames):
+        '''
+        Iterate over chunks of at most chunk_size frames.
+        '''
+        if hasattr(frames, 'shape') and hasattr(frames, '__getitem__'):
+            for start in range(0, frames.shape[0], self.chunk_size):
+                yield np.asarray(frames[start:start + self.chunk_size])
+            return
+        buffer = np.empty((self.chunk_size, self.nparticles, 3))
+        nbuffer = 0
+        for frame in frames:
+            buffer[nbuffer] = frame
+            nbuffer += 1
+            if nbuffer == self.chunk_size:
+                yield buffer
+                nbuffer = 0
+        if nbuffer:
+            yield buffer[:nbuffer]
+
+    def autocorrelation(self, normalized: bool = True) -> np.ndarray:
+        '''
+        Obtain the autocorrelation functions of the mode amplitudes.
+
+        Parameters
+        ----------
+        normalized : bool, optional
+            If True, the autocovariances are divided by their value at lag 0. Default is True.
+
+        Returns
+        -------
+        autocorrelation : numpy.ndarray
+            Autocorrelation functions with shape (max_lag + 1, nmodes).
+        '''
+        counts = np.maximum(self._lag_counts, 1)[:, np.newaxis]
+        covariance = self._lag_products / counts - (self._lag_heads / counts) * (self._lag_tails / counts)
+        if normalized:
+            return covariance / covariance[0]
+        return covariance
@@ -1,5 +1,5 @@
 import numpy as np
-import libMobility as lb
+from .backends import create_backend
 
 def getMobilityTensor(positions, solver):
     '''
@@ -9,9 +9,12 @@ def getMobilityTensor(positions, solver):
     Parameters
     ----------
     positions: numpy array
-        The positions of the particles in the system    
+        The positions of the particles in the system, or a Particles object. Only their number is
+        used, the mobility is the one of the positions already set in the solver
     solver: SelfMobility object
-        The solver object used to calculate the mobility tensor
+        The solver object used to calculate the mobility tensor, initialized and with the positions
+        of these same particles set (for a Particles subset, the positions of the subset and not
+        the ones of its parent)
     
     Returns
     -------
@@ -19,6 +22,7 @@ def getMobilityTensor(positions, solver):
         The mobility tensor of the system
     '''
 
+    positions = np.asarray(getattr(positions, "position", positions))
     numberparticles = positions.shape[0]
     # Perform the algorithm to obtain the mobility tensor
     mobility_tensor = np.zeros((numberparticles*3, numberparticles*3))
@@ -31,20 +35,27 @@ def getMobilityTensor(positions, solver):
     # Return the mobility tensor as a matrix
     return mobility_tensor
 
-def getMobilityTensorRPY(positions, hyd_radius = 1.0, viscosity = 1.0, boundary_conditions = ['open', 'open', 'open']):
+def getMobilityTensorRPY(positions, hyd_radius = 1.0, viscosity = 1.0, boundary_conditions = ['open', 'open', 'open'], backend = 'auto', **backend_parameters):
     '''
-    This function calculates the mobility tensor (NBody solver) of a system of particles given their positions and hydrodynamic parameters.
+    This function calculates the mobility tensor of a system of particles given their positions and hydrodynamic parameters.
     
     Parameters
     ----------
     positions: numpy array
-        The positions of the particles in the system
+        The positions of the particles in the system, or a Particles object. For a Particles subset
+        only the mobility blocks between the particles of the subset are computed, since the
+        pairwise mobility of the subset does not depend on the other particles.
     hyd_radius: float
         The hydrodynamic radius of the particles
     viscosity: float
         The viscosity of the fluid
     boundary_conditions: list
         The boundary conditions of the system   
+    backend: str
+        The name of a mobility backend (see backends.py), or 'auto' to use the libMobility NBody
+        solver when it is installed and the numpy RPY mobility otherwise
+    backend_parameters:
+        Extra parameters of the backend, e.g. box for the ewald backend
     
     
     Returns
@@ -52,25 +63,10 @@ def getMobilityTensorRPY(positions, hyd_radius = 1.0, viscosity = 1.0, boundary_
     mobility_tensor: numpy array
         The mobility tensor of the system
     '''
-    # Solver initialization
-    numberparticles = positions.shape[0]
-    solver = lb.NBody(boundary_conditions[0], boundary_conditions[1], boundary_conditions[2])
-    solver.setParameters(algorithm="advise", Nbatch=1, NperBatch=positions.shape[0])
-    solver.initialize(
-        temperature=0.0,
-        viscosity=viscosity,
-        hydrodynamicRadius=hyd_radius,
-        
-    )
-    solver.setPositions(positions)
-
-    # Perform the algorithm to obtain the mobility tensor
-    mobility_tensor = np.zeros((numberparticles*3, numberparticles*3))
-    for i in range(numberparticles*3):
-        force = np.zeros((numberparticles, 3))
-        force[i//3,i-3*(i//3)] = 1
-        velocity = solver.Mdot(force)[0]
-        mobility_tensor[:, i] = velocity.reshape(-1, 1).flatten()
+    positions = np.asarray(getattr(positions, "position", positions))
+    # libMobility is only imported by the backends that use it
+    solver = create_backend(backend, boundary_conditions, positions.shape[0], hyd_radius, viscosity, **backend_parameters)
+    solver.set_positions(positions)
 
     # Return the mobility tensor as a matrix
-    return mobility_tensor
\ No newline at end of file
+    return solver.dense()
@@ -1,9 +1,13 @@
 import numpy as np
+from particles_mod.ParametricSurface import ParametricSurface
 
 
-class HalfPipe:
+class HalfPipe(ParametricSurface):
     """
     Class to generate a half-pipe structure with particles.
+
+    It is the cylinder sector preset of ParametricSurface, with the rows along the angle and the
+    columns along the length of the half-pipe.
     
     Parameters
     ----------
@@ -29,32 +33,28 @@ class HalfPipe:
         self.HP_radius = HP_radius
         self.HP_amplitude = HP_amplitude
         self.HP_density = HP_density
-        self.Kp = Kp
-        self.Ka = Ka
-    
-    def generate_positions(self):
+
+        ny = int(self.HP_length * np.sqrt(self.HP_density))
+        ntheta = int(np.sqrt(self.HP_density) * self.HP_radius * 2 * self.HP_amplitude)
+        super().__init__(self.half_pipe_surface, ntheta, ny, (-HP_amplitude, HP_amplitude), (0.0, HP_length), Kp=Kp, Ka=Ka)
+
+    def half_pipe_surface(self, theta, y):
         """
-        Generates the positions of the particles in the half-pipe structure.
-        
-        Returns
-        -------
-        positions :
-            Positions of the half-pipe particles.
+        Parametrization of the half-pipe surface.
         """
-        
-        self.ny = int(self.HP_length * np.sqrt(self.HP_density))
-        self.ntheta = int(np.sqrt(self.HP_density) * self.HP_radius * 2 * self.HP_amplitude)
+        return self.HP_radius*np.sin(theta), y, self.HP_radius*(1-np.cos(theta))
 
-        self.nparticles = self.ny * self.ntheta
+    def set_grid(self, ntheta: int, ny: int):
+        """
+        Sets the number of particles along the angle and the length of the half-pipe.
+        """
+        super().set_grid(ntheta, ny)
+        self.ntheta = ntheta
+        self.ny = ny
+        # The actual density of the generated grid
         self.HP_density = self.nparticles / (self.HP_length * self.HP_radius * 2 * self.HP_amplitude)
 
-        # Parametrizer arrays
-        y = np.linspace(0, self.HP_length,self.ny)
-        theta = np.linspace(-self.HP_amplitude, self.HP_amplitude, self.ntheta)
-
-        return [[self.HP_radius*np.sin(t), j,  self.HP_radius*(1-np.cos(t))] for t in theta for j in y]
-    
-    def generate_pairbonds(self, positions: list) -> list:
+    def generate_pairbonds(self, positions: np.ndarray) -> list:
         """
         Generates the pair and angular bonds between the particles in the half-pipe structure.
 
@@ -69,36 +69,9 @@ class HalfPipe:
             Pair bonds between the particles.
         """
         
-        positions = self.generate_positions()
-        
-        pairbonds = []
-
-        # Horizontal bonds
-        for row_id in range(self.ntheta):
-            for column_id in range(self.ny - 1):
-                particle_id = row_id * self.ny + column_id
-                distance = np.linalg.norm(np.array(positions[particle_id]) - np.array(positions[particle_id + 1]))
-                pairbonds.append([particle_id, particle_id + 1, self.Kp, distance])
-
-        # Vertical bonds
-        for row_id in range(self.ntheta - 1):
-            for column_id in range(self.ny):
-                particle_id = row_id * self.ny + column_id
-                distance = np.linalg.norm(np.array(positions[particle_id]) - np.array(positions[particle_id + self.ny]))
-                pairbonds.append([particle_id, particle_id + self.ny, self.Kp, distance])
-
-        # Diagonal bonds
-        for row_cell_id in range(self.ntheta - 1):
-            for column_cell_id in range(self.ny - 1):
-                particle_id = row_cell_id * self.ny + column_cell_id
-                distance = np.linalg.norm(np.array(positions[particle_id]) - np.array(positions[particle_id + self.ny + 1]))
-                pairbonds.append([particle_id, particle_id + self.ny + 1, self.Kp, distance])
-                distance = np.linalg.norm(np.array(positions[particle_id + 1]) - np.array(positions[particle_id + self.ny]))
-                pairbonds.append([particle_id + 1, particle_id + self.ny, self.Kp, distance])
-
-        return pairbonds
+        return self.pairbond_table(positions).to_list()
     
-    def generate_anglebonds(self, positions: list) -> list:
+    def generate_anglebonds(self, positions: np.ndarray) -> list:
         """
         Generates the angular bonds between the particles in the half-pipe structure.
 
@@ -113,33 +86,7 @@ class HalfPipe:
             Angular bonds between the particles.
         """
         
-        anglebonds = []
-
-        # Horizontal angular bonds
-        for row_id in range(self.ntheta):
-            for column_id in range(self.ny - 2):
-                particle_id = row_id * self.ny + column_id
-                pos1 = np.array(positions[particle_id])
-                pos2 = np.array(positions[particle_id + 1])
-                pos3 = np.array(positions[particle_id + 2])
-                v1 = pos1 - pos2
-                v2 = pos3 - pos2
-                angle = np.arccos(np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2)))
-                anglebonds.append([particle_id, particle_id + 1, particle_id + 2, self.Ka, angle])
-
-        # Vertical angular bonds
-        for row_id in range(self.ntheta - 2):
-            for column_id in range(self.ny):
-                particle_id = row_id * self.ny + column_id
-                pos1 = np.array(positions[particle_id])
-                pos2 = np.array(positions[particle_id + self.ny])
-                pos3 = np.array(positions[particle_id + 2*self.ny])
-                v1 = pos1 - pos2
-                v2 = pos3 - pos2
-                angle = np.arccos(np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2)))
-                anglebonds.append([particle_id, particle_id + self.ny, particle_id + 2*self.ny, self.Ka, angle])
-
-        return anglebonds
+        return self.anglebond_table(positions).to_list()
 
 def construct_structure(length: float = 1.0, radius: float = 1.0, amplitude: float = np.pi/2, density: float = 1.0, Kp: float = 1.0, Ka: float = 1.0) -> tuple:
     """
@@ -163,28 +110,11 @@ def construct_structure(length: float = 1.0, radius: float = 1.0, amplitude: flo
     Returns
     -------
     tuple :
-        A tuple containing the positions and bonds of the half-pipe structure.
+        A tuple containing the positions and bonds of the half-pipe structure. The bonds are
+        BondTable objects that follow the UAMMD-structured bond dictionary schema. Their "data"
+        rows are read only: edit the bond columns, or convert the tables with to_dict.
     """
     
     half_pipe = HalfPipe(length, radius, amplitude, density, Kp, Ka)
-    positions = half_pipe.generate_positions()
-    pairbonds = half_pipe.generate_pairbonds(positions)
-    anglebonds = half_pipe.generate_anglebonds(positions)
-
-    # Create a bonds dictionary
-    bonds = {
-        "pairbonds" : {
-            "type": ["Bond2", "Harmonic"],
-            "parameters": {},
-            "labels": ["id_i", "id_j", "K", "r0"],
-            "data": pairbonds
-        },
-        "anglebonds" : {
-            "type": ["Bond3", "HarmonicAngular"],
-            "parameters": {},
-            "labels": ["id_i", "id_j", "id_k", "K", "theta0"],
-            "data": anglebonds
-        }
-    }
 
-    return positions, bonds
\ No newline at end of file
+    return half_pipe.construct()
\ No newline at end of file
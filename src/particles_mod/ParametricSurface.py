@@ -0,0 +1,398 @@
+import json
+import os
+import numpy as np
+from particles_mod.core import BondTable
+from particles_mod.core.npy import NpyWriter
+
+__all__ = ['ParametricSurface', 'load_structure', 'flat_sheet', 'tube', 'spherical_cap', 'helicoid']
+
+# Bond stencils of the surface grid. Every family is a list of stencils applied one after the
+# other at each anchor particle (row, column), and every stencil lists the (row, column) offsets
+# of its particles with respect to the anchor.
+PAIR_STENCILS = [
+    [((0, 0), (0, 1))],                    # horizontal
+    [((0, 0), (1, 0))],                    # vertical
+    [((0, 0), (1, 1)), ((0, 1), (1, 0))],  # both diagonals of each cell
+]
+ANGLE_STENCILS = [
+    [((0, 0), (0, 1), (0, 2))],            # horizontal
+    [((0, 0), (1, 0), (2, 0))],            # vertical
+]
+
+
+class ParametricSurface:
+    """
+    Class to generate a structure of particles bonded on a parametric surface.
+
+    The particles lie on a nu x nv grid of the (u, v) parameters and the particle with index
+    row_id * nv + column_id sits at the row_id-th value of u and the column_id-th value of v.
+    Horizontal bonds join neighbours along v, vertical bonds join neighbours along u and every
+    grid cell gets its two diagonals. Angular bonds join three consecutive particles along u or v.
+
+    Parameters
+    ----------
+    surface :
+        Vectorized map (u, v) -> (x, y, z) from broadcastable parameter arrays to coordinates.
+    nu :
+        Number of grid rows (values of u).
+    nv :
+        Number of grid columns (values of v).
+    u_range :
+        Range (min, max) of the u parameter.
+    v_range :
+        Range (min, max) of the v parameter.
+    periodic_u :
+        Whether the surface closes on itself along u. The last row is then bonded to the first
+        one and u_range[1] is excluded from the grid.
+    periodic_v :
+        Whether the surface closes on itself along v.
+    Kp :
+        Spring constant for the pair bonds.
+    Ka :
+        Spring constant for the angular bonds.
+    """
+
+    def __init__(self, surface, nu: int, nv: int, u_range: tuple = (0.0, 1.0), v_range: tuple = (0.0, 1.0),
+                 periodic_u: bool = False, periodic_v: bool = False, Kp: float = 1.0, Ka: float = 1.0):
+        """
+        Initializes the ParametricSurface class with the given parameters.
+        """
+        self.surface = surface
+        self.u_range = u_range
+        self.v_range = v_range
+        self.periodic_u = periodic_u
+        self.periodic_v = periodic_v
+        self.Kp = Kp
+        self.Ka = Ka
+        self.set_grid(nu, nv)
+
+    def set_grid(self, nu: int, nv: int):
+        """
+        Sets the number of rows and columns of the particle grid.
+        """
+        self.nu = nu
+        self.nv = nv
+        self.nparticles = nu * nv
+
+    def parameters(self) -> tuple:
+        """
+        Generates the values of the u and v parameters of the grid.
+
+        Returns
+        -------
+        u, v :
+            Arrays with the nu values of u and the nv values of v.
+        """
+
+        u = np.linspace(*self.u_range, self.nu, endpoint=not self.periodic_u)
+        v = np.linspace(*self.v_range, self.nv, endpoint=not self.periodic_v)
+        return u, v
+
+    def generate_positions(self, dtype=np.float64, rows: tuple = None) -> np.ndarray:
+        """
+        Generates the positions of the particles of the structure.
+
+        Parameters
+        ----------
+        dtype :
+            Floating point type of the positions (default is numpy.float64).
+        rows :
+            Range (start, stop) of grid rows to generate. Default is all of them.
+
+        Returns
+        -------
+        positions :
+            Positions of the particles as a contiguous (nparticles, 3) array.
+        """
+
+        start, stop = rows or (0, self.nu)
+        u, v = self.parameters()
+        coordinates = self.surface(u[start:stop, np.newaxis], v[np.newaxis, :])
+
+        # Broadcast every coordinate over the particle grid
+        positions = np.empty((stop - start, self.nv, 3), dtype=dtype)
+        for axis in range(3):
+            positions[:, :, axis] = coordinates[axis]
+
+        return positions.reshape(-1, 3)
+
+    def anchor_rows(self, family: list) -> int:
+        """
+        Number of grid rows holding anchor particles of a bond family.
+        """
+        span = max(du for stencil in family for du, _ in stencil)
+        return self.nu if self.periodic_u else max(self.nu - span, 0)
+
+    def anchor_columns(self, family: list) -> int:
+        """
+        Number of grid columns holding anchor particles of a bond family.
+        """
+        span = max(dv for stencil in family for _, dv in stencil)
+        return self.nv if self.periodic_v else max(self.nv - span, 0)
+
+    def family_indices(self, family: list, rows: tuple = None) -> np.ndarray:
+        """
+        Generates the particle indices of the bonds of a stencil family.
+
+        Parameters
+        ----------
+        family :
+            List of stencils, see PAIR_STENCILS and ANGLE_STENCILS.
+        rows :
+            Range (start, stop) of anchor rows. Default is all of them.
+
+        Returns
+        -------
+        indices :
+            Array of shape (nbonds, nparticles per bond), ordered by anchor row, anchor column and stencil.
+        """
+
+        nrows = self.anchor_rows(family)
+        start, stop = rows or (0, nrows)
+        stop = min(stop, nrows)
+        start = min(start, stop)
+        row = np.arange(start, stop)[:, np.newaxis]
+        column = np.arange(self.anchor_columns(family))[np.newaxis, :]
+
+        indices = np.empty((stop - start, column.shape[1], len(family), len(family[0])), dtype=np.int64)
+        for s, stencil in enumerate(family):
+            for p, (du, dv) in enumerate(stencil):
+                indices[:, :, s, p] = ((row + du) % self.nu) * self.nv + (column + dv) % self.nv
+
+        return indices.reshape(-1, len(family[0]))
+
+    def pairbond_indices(self) -> tuple:
+        """
+        Generates the particle indices of the pair bonds of the structure.
+
+        The bonds are ordered as horizontal (along v), vertical (along u) and the two diagonals
+        of every cell.
+
+        Returns
+        -------
+        id_i, id_j :
+            Arrays with the indices of the first and second particles of every pair bond.
+        """
+
+        indices = np.concatenate([self.family_indices(family) for family in PAIR_STENCILS])
+        return indices[:, 0], indices[:, 1]
+
+    def anglebond_indices(self) -> tuple:
+        """
+        Generates the particle indices of the angular bonds of the structure.
+
+        The bonds are ordered as horizontal (along v) and vertical (along u).
+
+        Returns
+        -------
+        id_i, id_j, id_k :
+            Arrays with the indices of the three particles of every angular bond, id_j being the vertex.
+        """
+
+        indices = np.concatenate([self.family_indices(family) for family in ANGLE_STENCILS])
+        return indices[:, 0], indices[:, 1], indices[:, 2]
+
+    def pairbond_table(self, positions: np.ndarray, indices: tuple = None) -> BondTable:
+        """
+        Generates the pair bonds between the particles as a columnar table.
+
+        Parameters
+        ----------
+        positions :
+            Positions of the particles.
+        indices :
+            Particle indices (id_i, id_j) of the bonds. Default is pairbond_indices().
+
+        Returns
+        -------
+        pairbonds :
+            Table with the "id_i", "id_j", "K" and "r0" columns of the pair bonds.
+        """
+
+        positions = np.asarray(positions)
+        id_i, id_j = indices if indices is not None else self.pairbond_indices()
+        distances = np.linalg.norm(positions[id_j] - positions[id_i], axis=1)
+
+        columns = {"id_i": id_i, "id_j": id_j, "K": np.full(len(id_i), self.Kp, dtype=float), "r0": distances}
+        return BondTable(["Bond2", "Harmonic"], ["id_i", "id_j", "K", "r0"], columns)
+
+    def anglebond_table(self, positions: np.ndarray, indices: tuple = None) -> BondTable:
+        """
+        Generates the angular bonds between the particles as a columnar table.
+
+        Parameters
+        ----------
+        positions :
+            Positions of the particles.
+        indices :
+            Particle indices (id_i, id_j, id_k) of the bonds. Default is anglebond_indices().
+
+        Returns
+        -------
+        anglebonds :
+            Table with the "id_i", "id_j", "id_k", "K" and "theta0" columns of the angular bonds.
+        """
+
+        positions = np.asarray(positions)
+        id_i, id_j, id_k = indices if indices is not None else self.anglebond_indices()
+        v1 = positions[id_i] - positions[id_j]
+        v2 = positions[id_k] - positions[id_j]
+        cosines = np.sum(v1 * v2, axis=1) / (np.linalg.norm(v1, axis=1) * np.linalg.norm(v2, axis=1))
+        angles = np.arccos(np.clip(cosines, -1.0, 1.0))
+
+        columns = {"id_i": id_i, "id_j": id_j, "id_k": id_k, "K": np.full(len(id_i), self.Ka, dtype=float), "theta0": angles}
+        return BondTable(["Bond3", "HarmonicAngular"], ["id_i", "id_j", "id_k", "K", "theta0"], columns)
+
+    def construct(self, dtype=np.float64) -> tuple:
+        """
+        Constructs the positions and bonds of the structure.
+
+        Returns
+        -------
+        tuple :
+            A tuple containing the positions and the bonds dictionary ("pairbonds" and
+            "anglebonds" BondTable entries) of the structure.
+        """
+
+        positions = self.generate_positions(dtype)
+        bonds = {
+            "pairbonds" : self.pairbond_table(positions),
+            "anglebonds" : self.anglebond_table(positions)
+        }
+        return positions, bonds
+
+    def band_positions(self, start: int, stop: int, dtype=np.float64) -> np.ndarray:
+        """
+        Generates the positions of the rows start ... stop - 1, wrapping around periodic rows.
+        """
+        stop = min(stop, start + self.nu)
+        if stop <= self.nu:
+            return self.generate_positions(dtype, (start, stop))
+        return np.concatenate([self.generate_positions(dtype, (start, self.nu)),
+                               self.generate_positions(dtype, (0, stop - self.nu))])
+
+    def export(self, directory: str, band_rows: int = 256, dtype=np.float64):
+        """
+        Writes the positions and bonds of the structure to binary files, band of rows by band of rows.
+
+        Only the positions and bonds of one band of grid rows (plus the two following rows needed
+        by the bonds) are held in memory at a time, so the peak memory is bounded by band_rows
+        instead of by the size of the structure. The output has the same content and ordering as
+        construct() and can be opened with load_structure.
+
+        Parameters
+        ----------
+        directory :
+            Output directory. It contains positions.npy, one .npy file per bond column in a
+            subdirectory per bond entry and a structure.json file with the bond types and labels.
+        band_rows :
+            Number of grid rows generated at once.
+        dtype :
+            Floating point type of the positions.
+        """
+
+        os.makedirs(directory, exist_ok=True)
+        positions_file = NpyWriter(os.path.join(directory, "positions.npy"), dtype, (self.nparticles, 3))
+        empty_positions = np.zeros((0, 3))
+        entries = {
+            "pairbonds": (PAIR_STENCILS, self.pairbond_table(empty_positions, (np.zeros(0, int),)*2)),
+            "anglebonds": (ANGLE_STENCILS, self.anglebond_table(empty_positions, (np.zeros(0, int),)*3)),
+        }
+
+        metadata = {"nparticles": self.nparticles, "bonds": {}}
+        outputs = {}
+        for name, (families, table) in entries.items():
+            nbonds = sum(self.anchor_rows(family) * self.anchor_columns(family) * len(family) for family in families)
+            os.makedirs(os.path.join(directory, name), exist_ok=True)
+            outputs[name] = {label: NpyWriter(os.path.join(directory, name, f"{label}.npy"), column.dtype, (nbonds,))
+                             for label, column in table.columns.items()}
+            metadata["bonds"][name] = {"type": table.type, "parameters": table.parameters, "labels": table.labels}
+
+        for start in range(0, self.nu, band_rows):
+            stop = min(start + band_rows, self.nu)
+            positions_file.write(start * self.nv, self.generate_positions(dtype, (start, stop)))
+            # The bonds anchored in the band reach up to two rows further
+            positions = self.band_positions(start, stop + 2, dtype)
+
+            for name, (families, _) in entries.items():
+                offset = 0
+                for family in families:
+                    per_row = self.anchor_columns(family) * len(family)
+                    indices = self.family_indices(family, (start, stop))
+                    # Indices local to the band positions
+                    local = ((indices // self.nv - start) % self.nu) * self.nv + indices % self.nv
+                    if name == "pairbonds":
+                        table = self.pairbond_table(positions, (local[:, 0], local[:, 1]))
+                    else:
+                        table = self.anglebond_table(positions, (local[:, 0], local[:, 1], local[:, 2]))
+                    for label, column in table.columns.items():
+                        if label.startswith("id_"):
+                            column = indices[:, table.labels.index(label)]
+                        outputs[name][label].write(offset + start * per_row, column)
+                    offset += self.anchor_rows(family) * per_row
+
+        positions_file.close()
+        for columns in outputs.values():
+            for column in columns.values():
+                column.close()
+        with open(os.path.join(directory, "structure.json"), "w") as metadata_file:
+            json.dump(metadata, metadata_file)
+
+
+def load_structure(directory: str, mmap: bool = True) -> tuple:
+    """
+    Opens a structure written by ParametricSurface.export.
+
+    Parameters
+    ----------
+    directory :
+        Directory of the exported structure.
+    mmap :
+        If True, the positions and bond columns are memory mapped (read only) instead of loaded.
+
+    Returns
+    -------
+    tuple :
+        A tuple containing the positions and the bonds dictionary (BondTable entries).
+    """
+
+    mmap_mode = "r" if mmap else None
+    with open(os.path.join(directory, "structure.json")) as metadata_file:
+        metadata = json.load(metadata_file)
+    positions = np.load(os.path.join(directory, "positions.npy"), mmap_mode=mmap_mode)
+    bonds = {}
+    for name, entry in metadata["bonds"].items():
+        columns = {label: np.load(os.path.join(directory, name, f"{label}.npy"), mmap_mode=mmap_mode) for label in entry["labels"]}
+        bonds[name] = BondTable(entry["type"], entry["labels"], columns, entry["parameters"])
+    return positions, bonds
+
+
+def flat_sheet(length_x: float, length_y: float, nx: int, ny: int, Kp: float = 1.0, Ka: float = 1.0) -> ParametricSurface:
+    """
+    Flat rectangular sheet in the z = 0 plane, with rows along x and columns along y.
+    """
+    return ParametricSurface(lambda u, v: (u, v, 0.0), nx, ny, (0.0, length_x), (0.0, length_y), Kp=Kp, Ka=Ka)
+
+def tube(length: float, radius: float, ny: int, ntheta: int, Kp: float = 1.0, Ka: float = 1.0) -> ParametricSurface:
+    """
+    Full cylindrical tube along y, with rows around the axis (periodic) and columns along the axis.
+    """
+    surface = lambda u, v: (radius*np.sin(u), v, radius*(1 - np.cos(u)))
+    return ParametricSurface(surface, ntheta, ny, (0.0, 2*np.pi), (0.0, length), periodic_u=True, Kp=Kp, Ka=Ka)
+
+def spherical_cap(radius: float, cap_angle: float, npolar: int, nazimuth: int, Kp: float = 1.0, Ka: float = 1.0) -> ParametricSurface:
+    """
+    Spherical cap around the z axis, with rows along the polar angle and periodic columns along the azimuth.
+
+    The pole itself is not included, the first row lies at the polar angle cap_angle / npolar.
+    """
+    surface = lambda u, v: (radius*np.sin(u)*np.cos(v), radius*np.sin(u)*np.sin(v), radius*np.cos(u))
+    return ParametricSurface(surface, npolar, nazimuth, (cap_angle/npolar, cap_angle), (0.0, 2*np.pi),
+                             periodic_v=True, Kp=Kp, Ka=Ka)
+
+def helicoid(radius: float, pitch: float, turns: float, nturn: int, nradial: int, Kp: float = 1.0, Ka: float = 1.0) -> ParametricSurface:
+    """
+    Helicoid around the z axis, with rows along the turning angle and columns along the radius.
+    """
+    surface = lambda u, v: (v*np.cos(u), v*np.sin(u), pitch*u/(2*np.pi))
+    return ParametricSurface(surface, nturn, nradial, (0.0, 2*np.pi*turns), (0.0, radius), Kp=Kp, Ka=Ka)
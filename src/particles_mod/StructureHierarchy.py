@@ -0,0 +1,160 @@
+import copy
+import numpy as np
+from particles_mod.ParametricSurface import ParametricSurface
+
+__all__ = ['StructureHierarchy']
+
+
+def _prolongation_1d(ncoarse: int, periodic: bool) -> "scipy.sparse.csr_matrix":
+    """
+    Linear interpolation from a 1D grid to the grid with one extra node in the middle of every interval.
+    """
+    import scipy.sparse
+    nfine = 2*ncoarse if periodic else 2*(ncoarse - 1) + 1
+    coarse = np.arange(ncoarse)
+    # Fine nodes on top of coarse nodes
+    rows = [2*coarse]
+    columns = [coarse]
+    weights = [np.ones(ncoarse)]
+    # Fine nodes in the middle of coarse intervals
+    intervals = coarse if periodic else coarse[:-1]
+    for side in (0, 1):
+        rows.append(2*intervals + 1)
+        columns.append((intervals + side) % ncoarse)
+        weights.append(np.full(len(intervals), 0.5))
+    return scipy.sparse.csr_matrix((np.concatenate(weights), (np.concatenate(rows), np.concatenate(columns))), shape=(nfine, ncoarse))
+
+
+class StructureHierarchy:
+    """
+    Class to generate nested coarse to fine versions of a parametric surface structure.
+
+    Level 0 is the given surface and every following level halves the grid spacing along u and v,
+    so the nodes of a level are also nodes of all the finer levels. Prolongation (bilinear
+    interpolation) and restriction (injection) operators move particle fields between
+    consecutive levels, which allows coarse solutions such as mobility or Hessian eigenvectors to
+    seed the iterative solvers of finer levels. Results can be cached per level and key.
+
+    Parameters
+    ----------
+    surface :
+        Coarsest ParametricSurface (or HalfPipe) of the hierarchy.
+    nlevels :
+        Number of levels.
+
+    Attributes
+    ----------
+    levels : list
+        ParametricSurface of every level, from coarse to fine.
+    cache : dict
+        Cached results indexed by (key, level).
+    """
+
+    def __init__(self, surface: ParametricSurface, nlevels: int):
+        """
+        Initializes the StructureHierarchy class with the given parameters.
+        """
+        # scipy is only imported when a hierarchy is built, to keep importing particles_mod fast
+        import scipy.sparse
+        self.levels = [surface]
+        self._prolongations = []
+        for _ in range(nlevels - 1):
+            coarse = self.levels[-1]
+            prolongation_u = _prolongation_1d(coarse.nu, coarse.periodic_u)
+            prolongation_v = _prolongation_1d(coarse.nv, coarse.periodic_v)
+            fine = copy.copy(coarse)
+            fine.set_grid(prolongation_u.shape[0], prolongation_v.shape[0])
+            self.levels.append(fine)
+            # Particle index row_id * nv + column_id
+            self._prolongations.append(scipy.sparse.kron(prolongation_u, prolongation_v, format="csr"))
+        self.cache = {}
+
+    def prolongation(self, level: int) -> "scipy.sparse.csr_matrix":
+        """
+        Interpolation matrix from the particles of a level to the particles of the next finer level.
+        """
+        return self._prolongations[level]
+
+    def restriction(self, level: int) -> "scipy.sparse.csr_matrix":
+        """
+        Injection matrix from the particles of a level to the particles of the next coarser level.
+
+        The coarse nodes are also fine nodes, so the restriction of a prolonged field is the field itself.
+        """
+        import scipy.sparse
+        prolongation = self._prolongations[level - 1]
+        fine, coarse = (prolongation == 1).nonzero()
+        return scipy.sparse.csr_matrix((np.ones(len(coarse)), (coarse, fine)), shape=prolongation.shape[::-1])
+
+    @staticmethod
+    def _apply(operator, fields):
+        """
+        Apply a particle operator to fields of shape (..., nparticles, 3).
+        """
+        fields = np.asarray(fields)
+        leading = fields.shape[:-2]
+        stacked = np.moveaxis(fields.reshape(-1, fields.shape[-2], 3), 1, 0).reshape(fields.shape[-2], -1)
+        result = operator @ stacked
+        return np.moveaxis(result.reshape(operator.shape[0], -1, 3), 0, 1).reshape(*leading, operator.shape[0], 3)
+
+    def prolong(self, fields, level: int) -> np.ndarray:
+        """
+        Interpolate particle fields of shape (..., nparticles, 3) from a level to the next finer level.
+        """
+        return self._apply(self.prolongation(level), fields)
+
+    def restrict(self, fields, level: int) -> np.ndarray:
+        """
+        Restrict particle fields of shape (..., nparticles, 3) from a level to the next coarser level.
+        """
+        return self._apply(self.restriction(level), fields)
+
+    def cached(self, key, level: int, compute):
+        """
+        Obtain a cached result of a level, computing it the first time.
+
+        Parameters
+        ----------
+        key :
+            Hashable identifier of the result, for instance ("hessian", Kp, Ka) in a parameter sweep.
+        level :
+            Level of the result.
+        compute :
+            Function of the level surface returning the result.
+        """
+        if (key, level) not in self.cache:
+            self.cache[(key, level)] = compute(self.levels[level])
+        return self.cache[(key, level)]
+
+    def refine_modes(self, operator, coarse_modes, level: int, largest: bool = False, tol: float = None, maxiter: int = 200) -> tuple:
+        """
+        Obtain eigenmodes of a fine level with LOBPCG seeded by the modes of the previous level.
+
+        Parameters
+        ----------
+        operator :
+            Symmetric (nparticles * 3, nparticles * 3) matrix, sparse matrix or LinearOperator of
+            the fine level, for instance a Hessian or a mobility tensor.
+        coarse_modes :
+            Modes of the previous level in (nmodes, nparticles, 3) format.
+        level :
+            Fine level of the operator.
+        largest :
+            Whether to look for the largest eigenvalues instead of the smallest ones.
+        tol, maxiter :
+            Tolerance and maximum number of iterations of LOBPCG.
+
+        Returns
+        -------
+        eigenvalues :
+            The eigenvalues of the modes.
+        modes :
+            The fine level modes in (nmodes, nparticles, 3) format.
+        """
+        import scipy.sparse.linalg
+        guess = self.prolong(coarse_modes, level - 1)
+        nmodes, nparticles = guess.shape[:2]
+        guess, _ = np.linalg.qr(guess.reshape(nmodes, -1).T)
+        eigenvalues, vectors = scipy.sparse.linalg.lobpcg(operator, guess, largest=largest, tol=tol, maxiter=maxiter)
+        order = np.argsort(eigenvalues)
+        return eigenvalues[order], vectors[:, order].T.reshape(nmodes, nparticles, 3)
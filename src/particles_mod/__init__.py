@@ -4,7 +4,9 @@ Particles' features module
 
 from .core import *
 from .geometry import *
+from .ParametricSurface import *
 from .HalfPipe import *
+from .StructureHierarchy import *
 
 __version__ = '0.1.0'
 __author__ = 'Joan Ronquillo'
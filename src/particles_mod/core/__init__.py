@@ -1,5 +1,8 @@
 from .particle import *
 from .particles import *
+from .bonds import *
+from .trajectory import *
+from .rendering import render_frames
 
-__all__ = ['Particle', 'Particles']
+__all__ = ['Particle', 'Particles', 'BondTable', 'Trajectory', 'render_frames']
 
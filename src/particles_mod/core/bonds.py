@@ -0,0 +1,198 @@
+'''
+This file contains the BondTable class which is used to store a set of bonds as columns
+'''
+
+import numpy as np
+from collections.abc import Mapping
+
+class BondTable(Mapping):
+    '''
+    Class to store a set of bonds of the same type as a table of numpy columns.
+
+    It behaves as the UAMMD-structured bond dictionary ("type", "parameters", "labels" and "data"
+    keys), but the "data" rows are only built when they are accessed. They are rebuilt from the
+    columns on every access as an immutable tuple of tuples, so editing them fails instead of
+    being silently lost: the bonds are changed through the columns, and to_dict builds a plain
+    dictionary with list data (for instance to hand the bonds to pyUAMMD).
+
+    Parameters
+    ----------
+    bond_type : list
+        UAMMD type of the bonds, e.g. ["Bond2", "Harmonic"].
+    labels : list
+        Labels of the columns, e.g. ["id_i", "id_j", "K", "r0"].
+    columns : dict
+        Dictionary mapping every label to a sequence with one value per bond.
+    parameters : dict, optional
+        UAMMD parameters shared by all the bonds.
+
+    Attributes
+    ----------
+    type : list
+        UAMMD type of the bonds.
+    labels : list
+        Labels of the columns.
+    columns : dict
+        Dictionary mapping every label to a numpy array with one value per bond.
+    parameters : dict
+        UAMMD parameters shared by all the bonds.
+
+    Methods
+    -------
+    from_dict(bond)
+        Create a BondTable from a UAMMD-structured bond dictionary.
+    to_list()
+        Obtain the bonds as a list of rows.
+    to_dict()
+        Obtain the bonds as a UAMMD-structured dictionary with list data.
+    slice(start, stop, step)
+        Obtain a table sharing the columns of a range of bonds.
+    take(indices)
+        Obtain a table with a selection of bonds.
+    concatenate(tables)
+        Join several tables of the same type.
+    filter_particles(particle_ids, relabel)
+        Obtain the bonds whose particles all belong to a subset.
+    '''
+
+    _keys = ("type", "parameters", "labels", "data")
+
+    def __init__(self, bond_type : list, labels : list, columns : dict, parameters : dict = None):
+        '''
+        Constructor of the BondTable class.
+        '''
+        if set(columns) != set(labels):
+            raise ValueError(f'The columns {list(columns)} do not match the labels {labels}.')
+        self.type = list(bond_type)
+        self.labels = list(labels)
+        self.parameters = parameters or {}
+        self.columns = {}
+        for label in labels:
+            dtype = np.int64 if label.startswith('id_') else None
+            self.columns[label] = np.asarray(columns[label], dtype=dtype)
+        lengths = {len(column) for column in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError('All the columns must have the same length.')
+
+    @classmethod
+    def from_dict(cls, bond : dict):
+        '''
+        Create a BondTable from a UAMMD-structured bond dictionary.
+
+        Parameters
+        ----------
+        bond : dict
+            Dictionary with "type", "labels" and "data" (and optionally "parameters") keys.
+
+        Returns
+        -------
+        BondTable
+            The bonds as a table.
+        '''
+        if isinstance(bond, BondTable):
+            return bond
+        labels = bond['labels']
+        data = bond['data']
+        if len(data) == 0:
+            columns = {label: [] for label in labels}
+        else:
+            columns = dict(zip(labels, zip(*data)))
+        return cls(bond['type'], labels, columns, dict(bond.get('parameters', {})))
+
+    @property
+    def nbonds(self) -> int:
+        '''
+        Number of bonds in the table.
+        '''
+        return len(self.columns[self.labels[0]])
+
+    def __getitem__(self, key):
+        if key == 'type':
+            return self.type
+        if key == 'parameters':
+            return self.parameters
+        if key == 'labels':
+            return self.labels
+        if key == 'data':
+            return tuple(map(tuple, self.to_list()))
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __repr__(self):
+        return f'BondTable(type={self.type}, labels={self.labels}, nbonds={self.nbonds})'
+
+    def to_list(self) -> list:
+        '''
+        Obtain the bonds as a list of rows, with the columns in the order of the labels.
+        '''
+        return [list(row) for row in zip(*(self.columns[label].tolist() for label in self.labels))]
+
+    def to_dict(self) -> dict:
+        '''
+        Obtain the bonds as a UAMMD-structured dictionary with list data.
+        '''
+        return {'type': self.type, 'parameters': self.parameters, 'labels': self.labels, 'data': self.to_list()}
+
+    def _with_columns(self, columns):
+        '''
+        Create a table of the same type with other columns.
+        '''
+        return BondTable(self.type, self.labels, columns, self.parameters)
+
+    def slice(self, start : int = None, stop : int = None, step : int = None):
+        '''
+        Obtain a table sharing the columns of a range of bonds (no data is copied).
+        '''
+        selection = slice(start, stop, step)
+        return self._with_columns({label: column[selection] for label, column in self.columns.items()})
+
+    def take(self, indices):
+        '''
+        Obtain a table with a selection of bonds, given by indices or by a boolean mask.
+        '''
+        return self._with_columns({label: column[indices] for label, column in self.columns.items()})
+
+    @staticmethod
+    def concatenate(tables : list):
+        '''
+        Join several tables of the same type and labels.
+        '''
+        first = tables[0]
+        for table in tables[1:]:
+            if table.type != first.type or table.labels != first.labels:
+                raise ValueError('Only tables with the same type and labels can be concatenated.')
+        return first._with_columns({label: np.concatenate([table.columns[label] for table in tables]) for label in first.labels})
+
+    def filter_particles(self, particle_ids, relabel : bool = False):
+        '''
+        Obtain the bonds whose particles all belong to a subset.
+
+        Parameters
+        ----------
+        particle_ids : array_like
+            Indices of the particles of the subset.
+        relabel : bool, optional
+            If True, the particle indices of the bonds are replaced by their position in particle_ids.
+
+        Returns
+        -------
+        BondTable
+            The bonds within the subset.
+        '''
+        particle_ids = np.asarray(particle_ids, dtype=np.int64)
+        id_labels = [label for label in self.labels if label.startswith('id_')]
+        mask = np.ones(self.nbonds, dtype=bool)
+        for label in id_labels:
+            mask &= np.isin(self.columns[label], particle_ids)
+        table = self.take(mask)
+        if relabel and table.nbonds:
+            new_index = np.full(particle_ids.max() + 1, -1, dtype=np.int64)
+            new_index[particle_ids] = np.arange(len(particle_ids))
+            for label in id_labels:
+                table.columns[label] = new_index[table.columns[label]]
+        return table
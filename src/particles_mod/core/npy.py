@@ -0,0 +1,42 @@
+'''
+This file contains the writer of .npy files used to export large arrays piece by piece
+'''
+
+import numpy as np
+
+class NpyWriter:
+    '''
+    Writes an .npy file piece by piece at given row offsets, without mapping it in memory.
+
+    Parameters
+    ----------
+    path : str
+        Path of the .npy file.
+    dtype : numpy.dtype
+        Data type of the array.
+    shape : tuple
+        Shape of the whole array, the rows are indexed along the first axis.
+
+    Methods
+    -------
+    write(row, array)
+        Write some consecutive rows starting at a row.
+    close()
+        Close the file.
+    '''
+
+    def __init__(self, path, dtype, shape):
+        self.dtype = np.dtype(dtype)
+        self.row_bytes = self.dtype.itemsize * int(np.prod(shape[1:]))
+        self.file = open(path, 'wb')
+        header = {'descr': np.lib.format.dtype_to_descr(self.dtype), 'fortran_order': False, 'shape': tuple(shape)}
+        np.lib.format.write_array_header_1_0(self.file, header)
+        self.header_bytes = self.file.tell()
+        self.file.truncate(self.header_bytes + shape[0] * self.row_bytes)
+
+    def write(self, row, array):
+        self.file.seek(self.header_bytes + row * self.row_bytes)
+        np.ascontiguousarray(array, dtype=self.dtype).tofile(self.file)
+
+    def close(self):
+        self.file.close()
@@ -3,11 +3,66 @@ This file contains the Particle class which is used to store the properties of a
 '''
 
 import numpy as np
+from collections.abc import MutableMapping
+from .particles import Particles
+
+class ParticleProperties(MutableMapping):
+    '''
+    Dictionary-like view of the additional properties of a particle.
+
+    Reading or writing a property goes directly to the arrays of the Particles container, so
+    the set of properties is fixed by the container: new properties can not be added or removed.
+
+    Parameters
+    ----------
+    parent : Particles
+        Container holding the data of the particle.
+    index : int
+        Index of the particle in the container.
+    '''
+
+    __slots__ = ('parent', 'index')
+
+    def __init__(self, parent: Particles, index: int):
+        '''
+        Constructor of the ParticleProperties class.
+        '''
+        self.parent = parent
+        self.index = index
+
+    def _labels(self):
+        return [label for label in self.parent.labels if label not in ('id', 'position')]
+
+    def __getitem__(self, label):
+        if label not in self._labels():
+            raise KeyError(label)
+        return getattr(self.parent, label)[self.index]
+
+    def __setitem__(self, label, value):
+        if label not in self._labels():
+            raise KeyError(f"'{label}' is not a property of the particles.")
+        getattr(self.parent, label)[self.index] = value
+
+    def __delitem__(self, label):
+        raise TypeError('The properties of a particle can not be removed.')
+
+    def __iter__(self):
+        return iter(self._labels())
+
+    def __len__(self):
+        return len(self._labels())
+
+    def __repr__(self):
+        return repr(dict(self))
 
 class Particle:
     '''
     Class to store the properties of a particle in the simulation.
 
+    A Particle is a view of one row of a Particles container: it only stores a reference to the
+    container and its index, and reading or writing its properties goes directly to the arrays
+    of the container. A Particle created from its id and position owns a container of one particle.
+
     Parameters
     ----------
     id : int
@@ -23,15 +78,24 @@ class Particle:
         Unique identifier for the particle.
     position : ndarray
         Array of particle's position.
-    properties : dict
-        Dictionary of particle's additional properties such as velocity, mass, charge...
+    properties : ParticleProperties
+        Dictionary-like view of the particle's additional properties such as velocity, mass,
+        charge... Writing a property changes the arrays of the container.
+    parent : Particles
+        Container holding the data of the particle.
+    index : int
+        Index of the particle in the container.
 
     Methods
     -------
+    view(parent, index)
+        Create a Particle that views a row of a Particles container.
     update_positions(position)
         Update the particle's position.
     '''
 
+    __slots__ = ('parent', 'index')
+
     def __init__(self, id: int, position: np.ndarray, properties: dict = None):
         '''
         Initialize a Particle instance.
@@ -42,16 +106,64 @@ class Particle:
             Unique identifier for the particle.
         position : np.ndarray
             Array representing the particle's position.
-        velocity : np.ndarray, optional
-            Array representing the particle's velocity. Default is None.
         properties : dict, optional
             Dictionary of additional properties for the particle. Default is None.
         '''
-        
-        self.id = id
-        self.position = np.array(position)
-        self.properties = properties or {}
-        
+        properties = properties or {}
+        parent = Particles.from_arrays(id=np.array([id]), position=np.array([position]),
+                                       **{label: np.array([value]) for label, value in properties.items()})
+        object.__setattr__(self, 'parent', parent)
+        object.__setattr__(self, 'index', 0)
+
+    @classmethod
+    def view(cls, parent: Particles, index: int):
+        '''
+        Create a Particle that views a row of a Particles container.
+
+        Parameters
+        ----------
+        parent : Particles
+            Container holding the data of the particle.
+        index : int
+            Index of the particle in the container.
+        '''
+        particle = cls.__new__(cls)
+        object.__setattr__(particle, 'parent', parent)
+        object.__setattr__(particle, 'index', index)
+        return particle
+
+    def __getattr__(self, label):
+        # Only called for the properties of the particle, the slots are found before unless they
+        # are not set yet (e.g. while copying or unpickling), when parent can not be used
+        if label in Particle.__slots__ or (label.startswith('__') and label.endswith('__')):
+            raise AttributeError(f"'Particle' object has no attribute '{label}'")
+        if label in self.parent.labels:
+            return getattr(self.parent, label)[self.index]
+        raise AttributeError(f"'Particle' object has no attribute '{label}'")
+
+    def __setattr__(self, label, value):
+        if label in Particle.__slots__:
+            raise AttributeError(f"The attribute '{label}' of a Particle can not be changed.")
+        if label not in self.parent.labels:
+            raise AttributeError(f"'{label}' is not a property of the particles.")
+        getattr(self.parent, label)[self.index] = value
+
+    @property
+    def properties(self) -> ParticleProperties:
+        '''
+        Dictionary-like view of the additional properties of the particle, writing to the container.
+        '''
+        return ParticleProperties(self.parent, self.index)
+
+    def update_positions(self, position: np.ndarray):
+        '''
+        Update the particle's position.
+        '''
+        self.position = position
 
-        
+    def __reduce__(self):
+        # Copies and pickles are detached particles with the values of the viewed row
+        return (Particle, (self.id, np.array(self.position), dict(self.properties)))
 
+    def __repr__(self):
+        return f'Particle(id={self.id}, position={self.position})'
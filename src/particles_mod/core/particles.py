@@ -2,9 +2,17 @@
 This file contains the Particle class which is used to store the properties of a system of partícles
 '''
 
+import json
 import numpy as np
-import matplotlib.pyplot as plt
 import os
+from .rendering import render_frames
+
+# Binary format: magic, header length (uint64), JSON header and the columns aligned to _ALIGNMENT bytes
+_MAGIC = b'PARTICLES\x00'
+_ALIGNMENT = 64
+
+def _aligned(offset : int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
 
 class Particles:
     '''
@@ -27,17 +35,36 @@ class Particles:
         Array containing the positions of the particles.
     properties : numpy.ndarray
         Array containing any other optional property of the particles.
+    parent : Particles
+        For a subset, the container it was taken from (None otherwise).
+    parent_index : numpy.ndarray
+        For a subset, the indices of its particles in the parent (None otherwise).
     
     Methods
     -------
     __init__(labels, data)
         Constructor of the Particles class.
+    from_arrays(id, position, **properties)
+        Create a Particles object from one array per property.
+    from_structured(array)
+        Create a Particles object from a numpy structured array.
+    __getitem__(index)
+        Obtain a Particle view of the particle at an index.
+    subset(selection)
+        Obtain the particles of a slice, a boolean mask or an array of indices.
+    save(path)
+        Save the particles in a binary file.
+    load(path, mmap)
+        Open particles saved with save.
     get_numberparticles()
         Method to get the number of particles in the system.
-    plot(output_file)
+    plot(output_file, remove_file, backend, max_points, size, point_size)
         Method to plot the particles in the system.
     '''
 
+    parent = None
+    parent_index = None
+
     def __init__(self, labels : list, data : list[list]):
         '''
         Constructor of the Particles class.
@@ -53,15 +80,137 @@ class Particles:
             wrong_length_id = np.where(data_lengths != len(labels))[0][0]
             raise ValueError(f'The labels and data must have the same length. Error for particle with id {data[wrong_length_id][0]}')
         
-        # Create the attributes of the class
-        self.labels = labels
-        for label in labels:
-            setattr(self, label, np.array([d[labels.index(label)] for d in data]))
+        # Transpose the rows into one column per label
+        rows = list(zip(*data)) if len(data) else [[] for _ in labels]
+        self._set_columns(dict(zip(labels, (np.array(column) for column in rows))))
+
+    @classmethod
+    def from_arrays(cls, id : np.ndarray, position : np.ndarray, **properties):
+        '''
+        Create a Particles object from one array per property.
+
+        The arrays are adopted without copying when they already are numpy arrays.
+
+        Parameters
+        ----------
+        id : array_like
+            Array containing the ids of the particles.
+        position : array_like
+            Array containing the positions of the particles, with shape (nparticles, 3).
+        **properties : array_like
+            Arrays containing any other property of the particles, one value per particle.
+
+        Returns
+        -------
+        Particles
+            The particles of the system.
+        '''
+        columns = {'id': np.asarray(id), 'position': np.asarray(position),
+                   **{label: np.asarray(column) for label, column in properties.items()}}
+        position = columns['position']
+        if position.ndim != 2 or position.shape[1] != 3:
+            raise ValueError(f'The positions must have shape (nparticles, 3), got {position.shape}.')
+        for label, column in columns.items():
+            if column.ndim == 0:
+                raise ValueError(f"The property '{label}' must have one value per particle.")
+        particles = cls.__new__(cls)
+        particles._set_columns(columns)
+        return particles
+
+    @classmethod
+    def from_structured(cls, array : np.ndarray):
+        '''
+        Create a Particles object from a numpy structured array with an 'id' and a 'position' field.
+
+        Every property is a view of a field of the array, so no data is copied.
 
-        # Check if the ids are unique
-        if len(np.unique(self.id)) != len(self.id):
+        Parameters
+        ----------
+        array : numpy.ndarray
+            Structured array with one record per particle.
+
+        Returns
+        -------
+        Particles
+            The particles of the system.
+        '''
+        labels = list(array.dtype.names or [])
+        if 'id' not in labels or 'position' not in labels:
+            raise ValueError("'id' and 'position' are mandatory labels.")
+        particles = cls.__new__(cls)
+        particles._set_columns({label: array[label] for label in labels})
+        return particles
+
+    def _set_columns(self, columns : dict, check_ids : bool = True):
+        '''
+        Set the property arrays after checking their lengths and the uniqueness of the ids.
+        '''
+        lengths = {len(column) for column in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError('All the properties must have the same length.')
+        if check_ids and len(np.unique(columns['id'])) != len(columns['id']):
             raise ValueError('The ids must be unique.')
+
+        # Create the attributes of the class
+        self.labels = list(columns)
+        for label, column in columns.items():
+            setattr(self, label, column)
     
+    def __len__(self):
+        return len(self.id)
+
+    def __getitem__(self, index : int):
+        '''
+        Obtain a Particle view of the particle at an index.
+        '''
+        from .particle import Particle
+        nparticles = len(self.id)
+        if not -nparticles <= index < nparticles:
+            raise IndexError(f'Particle index {index} out of range for {nparticles} particles.')
+        return Particle.view(self, index % nparticles)
+
+    def __iter__(self):
+        from .particle import Particle
+        for index in range(len(self.id)):
+            yield Particle.view(self, index)
+
+    def subset(self, selection):
+        '''
+        Obtain the particles of a slice, a boolean mask or an array of indices.
+
+        The properties of a slice subset are views of the arrays of the parent, so writing them
+        changes the parent. Masks and index arrays give copies (numpy fancy indexing). A subset
+        of a subset refers to the original container.
+
+        Parameters
+        ----------
+        selection : slice, array_like
+            Slice, boolean mask or array of indices (without repetitions) of the selected particles.
+
+        Returns
+        -------
+        Particles
+            The selected particles, with the parent and parent_index attributes set.
+        '''
+        if not isinstance(selection, slice):
+            selection = np.asarray(selection)
+            if selection.dtype == bool:
+                if selection.shape != (len(self.id),):
+                    raise ValueError('The mask must have one value per particle.')
+                selection = np.flatnonzero(selection)
+        index = np.arange(len(self.id))[selection]
+        if not isinstance(selection, slice) and len(np.unique(index)) != len(index):
+            raise ValueError('The selected particles must be different.')
+
+        subset = Particles.__new__(Particles)
+        # Without repeated indices the ids of a subset are unique if the ids of the parent are
+        subset._set_columns({label: getattr(self, label)[selection] for label in self.labels}, check_ids=False)
+        if self.parent is None:
+            subset.parent, subset.parent_index = self, index
+        else:
+            subset.parent, subset.parent_index = self.parent, self.parent_index[index]
+        return subset
+
     def get_numberparticles(self):
         '''
         Method to get the number of particles in the system.
@@ -82,26 +231,114 @@ class Particles:
         
         self.position = positions
     
-    def plot(self, output_file : str, remove_file : bool = True):
+    def save(self, path : str):
         '''
-        Method to plot the particles in the system.
+        Save the particles in a binary file.
+
+        The file has a JSON header with the label, dtype, shape and offset of every property,
+        followed by the raw arrays, so it can be memory mapped by load.
 
         Parameters
         ----------
-        output_file : str
+        path : str
             String containing the path to the output file.
         '''
+        columns = [np.ascontiguousarray(getattr(self, label)) for label in self.labels]
+        for label, column in zip(self.labels, columns):
+            if column.dtype.hasobject:
+                raise ValueError(f'The property {label} has an object dtype and can not be saved.')
+
+        entries = []
+        offset = 0
+        for label, column in zip(self.labels, columns):
+            entries.append({'label': label, 'dtype': column.dtype.str, 'shape': list(column.shape), 'offset': offset})
+            offset = _aligned(offset + column.nbytes)
+        header = json.dumps({'columns': entries}).encode()
+        data_start = _aligned(len(_MAGIC) + 8 + len(header))
+
+        with open(path, 'wb') as file:
+            file.write(_MAGIC)
+            file.write(np.uint64(len(header)).tobytes())
+            file.write(header)
+            for entry, column in zip(entries, columns):
+                file.seek(data_start + entry['offset'])
+                column.tofile(file)
+            file.truncate(data_start + offset)
+
+    @classmethod
+    def load(cls, path : str, mmap : bool = True):
+        '''
+        Open particles saved with save.
+
+        Parameters
+        ----------
+        path : str
+            String containing the path to the file.
+        mmap : bool, optional
+            If True, the properties are memory mapped (read only), so the data is only read from
+            disk when it is touched. Default is True.
+
+        Returns
+        -------
+        Particles
+            The particles of the system.
+        '''
+        with open(path, 'rb') as file:
+            if file.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f'{path} is not a Particles file.')
+            header_length = int(np.frombuffer(file.read(8), dtype=np.uint64)[0])
+            header = json.loads(file.read(header_length))
+        data_start = _aligned(len(_MAGIC) + 8 + header_length)
 
-        fig = plt.figure()
-        ax = fig.add_subplot(111, projection='3d')
-        ax.scatter(self.position[:, 0], self.position[:, 1], self.position[:, 2])
-        ax.set_xlabel('X')
-        ax.set_ylabel('Y')
-        ax.set_zlabel('Z')
+        columns = {}
+        for entry in header['columns']:
+            dtype = np.dtype(entry['dtype'])
+            shape = tuple(entry['shape'])
+            count = int(np.prod(shape))
+            if mmap and count:
+                columns[entry['label']] = np.memmap(path, dtype=dtype, mode='r', offset=data_start + entry['offset'], shape=shape)
+            else:
+                columns[entry['label']] = np.fromfile(path, dtype=dtype, count=count, offset=data_start + entry['offset']).reshape(shape)
+        particles = cls.__new__(cls)
+        # The ids were checked before saving, checking them again would read the whole file
+        particles._set_columns(columns, check_ids=False)
+        return particles
 
-        plt.savefig(output_file)
-        plt.close()
+    def plot(self, output_file : str = None, remove_file : bool = True, backend : str = 'matplotlib',
+             max_points : int = None, size : tuple = (640, 480), point_size : float = 2.0):
+        '''
+        Method to plot the particles in the system.
+
+        The image is rendered off-screen. Large systems can be decimated to a random selection of
+        max_points particles.
+
+        Parameters
+        ----------
+        output_file : str, optional
+            String containing the path to the output file. Default is None, which returns the PNG
+            image as bytes without touching the filesystem.
+        remove_file : bool, optional
+            If True, the output file is removed after it is written. Default is True.
+        backend : str, optional
+            'matplotlib' or 'pyvista'. Default is 'matplotlib'.
+        max_points : int, optional
+            Maximum number of points drawn. Default is None (all).
+        size : tuple, optional
+            Width and height of the image in pixels. Default is (640, 480).
+        point_size : float, optional
+            Size of the points. Default is 2.0.
+
+        Returns
+        -------
+        bytes
+            The PNG image if output_file is None.
+        '''
+        image, = render_frames([self.position], backend=backend, max_points=max_points, size=size, point_size=point_size)
+        if output_file is None:
+            return image
 
+        with open(output_file, 'wb') as file:
+            file.write(image)
         if remove_file:
             os.remove(output_file)
         
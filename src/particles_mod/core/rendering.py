@@ -0,0 +1,143 @@
+'''
+This file contains the functions used to render the positions of a system of particles as images
+'''
+
+import io
+import numpy as np
+
+def decimate(positions : np.ndarray, max_points : int = None, seed : int = 0) -> np.ndarray:
+    '''
+    Select at most max_points random points, keeping their order.
+
+    Parameters
+    ----------
+    positions : numpy.ndarray
+        Array containing the positions of the particles.
+    max_points : int, optional
+        Maximum number of points. Default is None, which keeps all the points.
+    seed : int, optional
+        Seed of the random selection, so every frame of a movie shows the same particles. Default is 0.
+    '''
+    if max_points is None or len(positions) <= max_points:
+        return positions
+    selection = np.random.default_rng(seed).choice(len(positions), max_points, replace=False)
+    return positions[np.sort(selection)]
+
+def _encode_png(image : np.ndarray) -> bytes:
+    '''
+    Encode an RGB(A) image array as PNG bytes.
+    '''
+    import matplotlib.image
+    buffer = io.BytesIO()
+    matplotlib.image.imsave(buffer, image, format='png')
+    return buffer.getvalue()
+
+class _MatplotlibRenderer:
+    '''
+    Renders frames with a single matplotlib 3D figure drawn off-screen with the Agg canvas.
+    '''
+
+    def __init__(self, size, point_size):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        dpi = 100
+        self.figure = Figure(figsize=(size[0]/dpi, size[1]/dpi), dpi=dpi)
+        FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_subplot(111, projection='3d')
+        self.axes.set_xlabel('X')
+        self.axes.set_ylabel('Y')
+        self.axes.set_zlabel('Z')
+        self.points, = self.axes.plot([], [], [], linestyle='', marker='.', markersize=point_size)
+        self.limits_set = False
+
+    def render(self, points):
+        self.points.set_data_3d(points[:, 0], points[:, 1], points[:, 2])
+        if not self.limits_set:
+            # The limits of the first frame are kept, so the frames of a movie share the view
+            lower, upper = points.min(axis=0), points.max(axis=0)
+            padding = np.maximum(0.05 * (upper - lower), 1e-12)
+            self.axes.set_xlim(lower[0] - padding[0], upper[0] + padding[0])
+            self.axes.set_ylim(lower[1] - padding[1], upper[1] + padding[1])
+            self.axes.set_zlim(lower[2] - padding[2], upper[2] + padding[2])
+            self.limits_set = True
+        buffer = io.BytesIO()
+        self.figure.savefig(buffer, format='png')
+        return buffer.getvalue()
+
+    def close(self):
+        self.figure.clear()
+
+class _PyvistaRenderer:
+    '''
+    Renders frames with a single off-screen pyvista plotter, updating the points in place.
+    '''
+
+    def __init__(self, size, point_size):
+        import pyvista
+        self.pyvista = pyvista
+        self.plotter = pyvista.Plotter(off_screen=True, window_size=list(size))
+        self.cloud = None
+        self.point_size = point_size
+
+    def render(self, points):
+        if self.cloud is None or self.cloud.n_points != len(points):
+            if self.cloud is not None:
+                self.plotter.clear()
+            self.cloud = self.pyvista.PolyData(np.asarray(points, dtype=np.float32))
+            self.plotter.add_mesh(self.cloud, style='points', point_size=self.point_size)
+            self.plotter.reset_camera()
+        else:
+            self.cloud.points = np.asarray(points, dtype=np.float32)
+        self.plotter.render()
+        return _encode_png(self.plotter.screenshot(return_img=True))
+
+    def close(self):
+        self.plotter.close()
+
+_RENDERERS = {'matplotlib': _MatplotlibRenderer, 'pyvista': _PyvistaRenderer}
+
+def render_frames(frames, output_pattern : str = None, backend : str = 'matplotlib', max_points : int = None,
+                  size : tuple = (640, 480), point_size : float = 2.0, seed : int = 0) -> list:
+    '''
+    Render several frames reusing a single figure or plotter, for instance to make a movie.
+
+    Parameters
+    ----------
+    frames : iterable
+        Positions of the frames, for instance a (nframes, nparticles, 3) array or a Trajectory.
+    output_pattern : str, optional
+        Format string of the image files, e.g. 'frame_{:05d}.png'. Default is None, which returns
+        the PNG images in memory without touching the filesystem.
+    backend : str, optional
+        'matplotlib' or 'pyvista'. Default is 'matplotlib'.
+    max_points : int, optional
+        Maximum number of points drawn per frame, selected at random. Default is None (all).
+    size : tuple, optional
+        Width and height of the images in pixels. Default is (640, 480).
+    point_size : float, optional
+        Size of the points. Default is 2.0.
+    seed : int, optional
+        Seed of the selection of the drawn points. Default is 0.
+
+    Returns
+    -------
+    list
+        The PNG images as bytes, or the paths of the written files if output_pattern is given.
+    '''
+    if backend not in _RENDERERS:
+        raise ValueError(f'Unknown backend {backend}, use one of {list(_RENDERERS)}.')
+    renderer = _RENDERERS[backend](size, point_size)
+    results = []
+    try:
+        for index, positions in enumerate(frames):
+            image = renderer.render(decimate(np.asarray(positions), max_points, seed))
+            if output_pattern is None:
+                results.append(image)
+            else:
+                path = output_pattern.format(index)
+                with open(path, 'wb') as file:
+                    file.write(image)
+                results.append(path)
+    finally:
+        renderer.close()
+    return results
@@ -0,0 +1,273 @@
+'''
+This file contains the Trajectory class which is used to store the positions of a system of particles along a simulation
+'''
+
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from .npy import NpyWriter
+
+# Binary format: magic, number of frames and particles (uint64) and dtype, padded to _HEADER_BYTES
+_MAGIC = b'TRAJECTORY\x00'
+_HEADER_BYTES = 64
+
+def _read_header(path):
+    '''
+    Read the number of frames, the number of particles and the dtype of a trajectory file.
+    '''
+    with open(path, 'rb') as file:
+        header = file.read(_HEADER_BYTES)
+    if not header.startswith(_MAGIC):
+        raise ValueError(f'{path} is not a Trajectory file.')
+    nframes, nparticles = np.frombuffer(header, dtype=np.uint64, count=2, offset=len(_MAGIC))
+    dtype = np.dtype(header[len(_MAGIC) + 16:].rstrip(b'\x00').decode())
+    return int(nframes), int(nparticles), dtype
+
+def _map_chunk(path, fn, indices):
+    '''
+    Evaluate a function on some frames of a trajectory file, opened by the worker itself.
+    '''
+    frames = Trajectory(path).frames
+    return np.stack([np.asarray(fn(np.asarray(frames[index]))) for index in indices])
+
+class Trajectory:
+    '''
+    Class to store the positions of a system of particles along a simulation.
+
+    The frames are kept in a binary file (a fixed header followed by the (nframes, nparticles, 3)
+    positions) that is memory mapped, so only the frames that are touched are read from disk.
+    New frames can be appended while the file is being written. Readers see them after refresh,
+    which len() and iteration call once, as does indexing a frame beyond the mapped ones.
+    iterate(follow=True) also yields the frames appended while iterating.
+
+    Parameters
+    ----------
+    path : str
+        String containing the path to the trajectory file.
+    mode : str, optional
+        'r' to open the file read only, 'r+' to allow changing and appending frames. Default is 'r'.
+
+    Attributes
+    ----------
+    path : str
+        String containing the path to the trajectory file.
+    nframes : int
+        Number of frames of the trajectory.
+    nparticles : int
+        Number of particles of every frame.
+    dtype : numpy.dtype
+        Data type of the positions.
+    frames : numpy.memmap
+        Memory map of the positions with shape (nframes, nparticles, 3).
+
+    Methods
+    -------
+    create(path, nparticles, dtype)
+        Create an empty trajectory file.
+    append(positions)
+        Add frames at the end of the trajectory.
+    refresh()
+        Map the frames appended by a writer since the file was opened.
+    iterate(follow)
+        Iterate over the frames, optionally following the frames appended while iterating.
+    map_frames(fn, output, workers, chunk_size, start, stop, step)
+        Evaluate a function on every frame and write the results to an .npy file.
+    '''
+
+    def __init__(self, path : str, mode : str = 'r'):
+        '''
+        Constructor of the Trajectory class.
+        '''
+        if mode not in ('r', 'r+'):
+            raise ValueError(f"Unknown mode {mode}, use 'r' or 'r+'.")
+        self.path = path
+        self.mode = mode
+        self.nframes, self.nparticles, self.dtype = _read_header(path)
+        self._map()
+
+    @classmethod
+    def create(cls, path : str, nparticles : int, dtype = np.float64):
+        '''
+        Create an empty trajectory file, opened to append frames.
+
+        Parameters
+        ----------
+        path : str
+            String containing the path to the trajectory file.
+        nparticles : int
+            Number of particles of every frame.
+        dtype : numpy.dtype, optional
+            Data type of the positions. Default is float64.
+
+        Returns
+        -------
+        Trajectory
+            The empty trajectory.
+        '''
+        with open(path, 'wb') as file:
+            file.write(_MAGIC)
+            file.write(np.array([0, nparticles], dtype=np.uint64).tobytes())
+            file.write(np.dtype(dtype).str.encode().ljust(_HEADER_BYTES - len(_MAGIC) - 16, b'\x00'))
+        return cls(path, mode='r+')
+
+    def _map(self):
+        '''
+        Memory map the frames of the file.
+        '''
+        if self.nframes:
+            self.frames = np.memmap(self.path, dtype=self.dtype, mode=self.mode, offset=_HEADER_BYTES, shape=(self.nframes, self.nparticles, 3))
+        else:
+            self.frames = np.empty((0, self.nparticles, 3), dtype=self.dtype)
+
+    def refresh(self) -> int:
+        '''
+        Read the header again and map the frames appended by a writer since the file was opened.
+
+        Returns
+        -------
+        int
+            Number of new frames.
+        '''
+        nframes = _read_header(self.path)[0]
+        new_frames = nframes - self.nframes
+        if new_frames:
+            if isinstance(self.frames, np.memmap):
+                self.frames.flush()
+            self.nframes = nframes
+            self._map()
+        return new_frames
+
+    def __len__(self):
+        # Readers check for the frames appended by a writer
+        if self.mode == 'r':
+            self.refresh()
+        return self.nframes
+
+    def __getitem__(self, index):
+        '''
+        Obtain a frame, or a slice of frames (with any step), as a view of the memory map.
+        '''
+        try:
+            return self.frames[index]
+        except IndexError:
+            # The frame may have been appended by a writer after the last refresh
+            if self.mode == 'r' and self.refresh():
+                return self.frames[index]
+            raise
+
+    def __iter__(self):
+        return self.iterate()
+
+    def iterate(self, follow : bool = False):
+        '''
+        Iterate over the frames of the trajectory.
+
+        Parameters
+        ----------
+        follow : bool, optional
+            If True, the header is read again every time the mapped frames are exhausted, and the
+            frames appended by a writer meanwhile are also yielded. Default is False, which only
+            refreshes once before iterating.
+
+        Yields
+        ------
+        numpy.ndarray
+            The positions of every frame, with shape (nparticles, 3).
+        '''
+        start = 0
+        stop = len(self)
+        while start < stop:
+            yield from self.frames[start:stop]
+            start = stop
+            if follow and self.mode == 'r':
+                self.refresh()
+                stop = self.nframes
+
+    def append(self, positions : np.ndarray):
+        '''
+        Add frames at the end of the trajectory.
+
+        Parameters
+        ----------
+        positions : numpy.ndarray
+            A frame with shape (nparticles, 3) or several frames with shape (nframes, nparticles, 3).
+        '''
+        if self.mode != 'r+':
+            raise ValueError('The trajectory was opened read only.')
+        positions = np.ascontiguousarray(positions, dtype=self.dtype)
+        if positions.ndim == 2:
+            positions = positions[np.newaxis]
+        if positions.shape[1:] != (self.nparticles, 3):
+            raise ValueError(f'The frames must have shape ({self.nparticles}, 3).')
+        if isinstance(self.frames, np.memmap):
+            self.frames.flush()
+        with open(self.path, 'r+b') as file:
+            file.seek(_HEADER_BYTES + self.nframes * self.nparticles * 3 * self.dtype.itemsize)
+            positions.tofile(file)
+            # The number of frames is updated after the data, so readers never see missing frames
+            file.seek(len(_MAGIC))
+            file.write(np.uint64(self.nframes + len(positions)).tobytes())
+        self.nframes += len(positions)
+        self._map()
+
+    def map_frames(self, fn, output : str, workers : int = None, chunk_size : int = 64,
+                   start : int = None, stop : int = None, step : int = None) -> np.ndarray:
+        '''
+        Evaluate a function on every frame and write the results to an .npy file.
+
+        The frames are processed in chunks, and at most two chunks per worker are in flight, so
+        neither the trajectory nor the results are ever fully held in memory.
+
+        Parameters
+        ----------
+        fn : callable
+            Function of the positions of a frame, with shape (nparticles, 3), returning an array
+            with the same shape for every frame (for instance a mobility tensor or a Hessian).
+            It must be picklable to use several workers.
+        output : str
+            String containing the path to the output .npy file.
+        workers : int, optional
+            Number of worker processes. Default is None, which evaluates the frames in this process.
+        chunk_size : int, optional
+            Number of frames sent to a worker at once. Default is 64.
+        start, stop, step : int, optional
+            Range of the frames to process.
+
+        Returns
+        -------
+        results : numpy.memmap
+            Read only memory map of the results, with shape (nselected,) + shape of the result of fn.
+        '''
+        indices = np.arange(self.nframes)[slice(start, stop, step)]
+        chunks = [indices[i:i + chunk_size] for i in range(0, len(indices), chunk_size)]
+        if isinstance(self.frames, np.memmap):
+            self.frames.flush()
+
+        writer = None
+        written = 0
+        def write(results):
+            nonlocal writer, written
+            if writer is None:
+                writer = NpyWriter(output, results.dtype, (len(indices),) + results.shape[1:])
+            writer.write(written, results)
+            written += len(results)
+
+        try:
+            if workers is None or workers <= 1:
+                for chunk in chunks:
+                    write(np.stack([np.asarray(fn(np.asarray(self.frames[index]))) for index in chunk]))
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    pending = deque()
+                    for chunk in chunks:
+                        pending.append(executor.submit(_map_chunk, self.path, fn, chunk))
+                        if len(pending) >= 2 * workers:
+                            write(pending.popleft().result())
+                    while pending:
+                        write(pending.popleft().result())
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            raise ValueError('There are no frames to process.')
+        return np.load(output, mmap_mode='r')
@@ -0,0 +1,76 @@
+'''
+This file contains the cell list used to find close pairs of particles in the geometries.
+'''
+
+import numpy as np
+
+def _expand(query_index, start, counts):
+    '''
+    Expand the ranges [start, start + counts) of sorted points found for every query point.
+    '''
+    total = counts.sum()
+    iq = np.repeat(query_index, counts)
+    positions = np.repeat(start, counts) + np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return iq, positions
+
+def pairs_within(query : np.ndarray, points : np.ndarray = None, distance : float = 1.0) -> tuple:
+    '''
+    Find the pairs of query points and points closer than a distance with a cell list.
+
+    The points are hashed into cubic cells of side distance and sorted by cell, so the
+    neighbours of every query point are found with binary searches in its 27 surrounding cells
+    (9 ranges of 3 consecutive cells). If points is None, every close pair of query points is
+    found once, searching only half of the surrounding cells.
+
+    Returns
+    -------
+    tuple
+        Indices of the query points and of the points of every close pair.
+    '''
+    self_pairs = points is None
+    if self_pairs:
+        points = query
+    if len(query) == 0 or len(points) == 0:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    origin = np.minimum(query.min(axis=0), points.min(axis=0)) - distance
+    # One empty layer of cells at every side so the neighbour cells never wrap around
+    ncells = np.ceil((np.maximum(query.max(axis=0), points.max(axis=0)) - origin) / distance).astype(np.int64) + 2
+    def cell_keys(cells):
+        return (cells[:, 0] * ncells[1] + cells[:, 1]) * ncells[2] + cells[:, 2]
+
+    point_keys = cell_keys(((points - origin) // distance).astype(np.int64))
+    order = np.argsort(point_keys, kind='stable')
+    sorted_keys = point_keys[order]
+    # Sorted query keys make the binary searches cache friendly, and the key of a neighbour
+    # cell is the key of the cell plus a constant, so the order holds for every offset
+    if self_pairs:
+        query_order, query_keys = order, sorted_keys
+    else:
+        query_keys = cell_keys(((query - origin) // distance).astype(np.int64))
+        query_order = np.argsort(query_keys, kind='stable')
+        query_keys = query_keys[query_order]
+
+    if self_pairs:
+        # Own column from the own cell (later points only) to the next cell, and four of the
+        # eight neighbour columns, so every pair of cells is visited once
+        columns = [(0, 0), (0, 1), (1, -1), (1, 0), (1, 1)]
+    else:
+        columns = [(offset_x, offset_y) for offset_x in (-1, 0, 1) for offset_y in (-1, 0, 1)]
+
+    query_index, point_index = [np.empty(0, dtype=int)], [np.empty(0, dtype=int)]
+    for offset_x, offset_y in columns:
+        # The three cells along z are consecutive keys, so they are searched as one range
+        keys = query_keys + (offset_x * ncells[1] + offset_y) * ncells[2]
+        if self_pairs and (offset_x, offset_y) == (0, 0):
+            start = np.arange(1, len(keys) + 1)
+        else:
+            start = np.searchsorted(sorted_keys, keys - 1, side='left')
+        counts = np.searchsorted(sorted_keys, keys + 1, side='right') - start
+        if counts.sum() == 0:
+            continue
+        iq, positions = _expand(query_order, start, counts)
+        ip = order[positions]
+        close = np.sum((query[iq] - points[ip])**2, axis=1) < distance**2
+        query_index.append(iq[close])
+        point_index.append(ip[close])
+    return np.concatenate(query_index), np.concatenate(point_index)
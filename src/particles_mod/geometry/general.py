@@ -5,6 +5,30 @@ This file contains the parent definition for the geometry class that manages geo
 import numpy as np
 from particles_mod.core import Particles
 
+def spawn_seeds(seed, k : int, start : int = 0) -> list:
+    '''
+    Function to obtain independent seed sequences for the members of an ensemble.
+
+    Member i always gets the i-th child of SeedSequence(seed), so any worker can generate any
+    range of members reproducibly without generating the others.
+
+    Parameters:
+    -----------
+    seed : int or numpy.random.SeedSequence
+        Seed of the ensemble.
+    k : int
+        Number of members.
+    start : int, optional
+        Index of the first member. Default is 0.
+
+    Returns:
+    --------
+    list
+        The numpy.random.SeedSequence of every member.
+    '''
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return [np.random.SeedSequence(root.entropy, spawn_key=root.spawn_key + (start + i,), pool_size=root.pool_size) for i in range(k)]
+
 class Geometry:
     '''
     Parent class for the geometry classes.    
@@ -25,6 +49,8 @@ class Geometry:
     --------
     get_positions(particles : Particles)
         Method to get the positions of the particles in the geometry
+    sample(particles : Particles, k : int, seed, start : int)
+        Method to get the positions of the particles in k independent members of an ensemble
     '''
     
     def __init__(self, geometry_name : str, **parameters):
@@ -52,4 +78,38 @@ class Geometry:
         
         raise NotImplementedError('The get_positions method must be implemented in the child class.')
 
+    def _generate(self, n_points : int, rng : np.random.Generator) -> np.ndarray:
+        '''
+        Method to generate the positions of some particles with a random generator, used by sample.
+        '''
+        raise NotImplementedError('The _generate method must be implemented in the child class.')
 
+    def sample(self, particles : Particles, k : int, seed = None, start : int = 0) -> np.ndarray:
+        '''
+        Method to get the positions of the particles in k independent members of an ensemble.
+
+        Every member draws from its own numpy.random.Generator, seeded with spawn_seeds, so the
+        ensemble does not depend on the global numpy random state and a worker generating
+        members start ... start + k - 1 obtains the same positions as a single call for all members.
+
+        Parameters:
+        -----------
+        particles : Particles
+            Particles object containing the positions of the particles.
+        k : int
+            Number of members.
+        seed : int or numpy.random.SeedSequence, optional
+            Seed of the ensemble. Default is None, which uses fresh entropy.
+        start : int, optional
+            Index of the first member. Default is 0.
+
+        Returns:
+        --------
+        numpy.ndarray
+            Array with shape (k, nparticles, 3) containing the positions of every member.
+        '''
+        n_points = particles.get_numberparticles()
+        positions = np.empty((k, n_points, 3))
+        for member, member_seed in enumerate(spawn_seeds(seed, k, start)):
+            positions[member] = self._generate(n_points, np.random.default_rng(member_seed))
+        return positions
@@ -1,6 +1,6 @@
 '''
-Sphere Geometry Subclass
+Geometry Subclasses
 '''
 
 from .sphere_geometry import SphereGeometry
-
+from .packing_geometry import PackingGeometry, BoxPackingGeometry, SpherePackingGeometry, CylinderPackingGeometry
@@ -5,6 +5,7 @@ Sphere Geometry Subclass
 import numpy as np
 from particles_mod.geometry.general import Geometry
 from particles_mod.core import Particles
+from particles_mod.geometry.cell_list import pairs_within
 
 class SphereGeometry(Geometry):
     '''
@@ -16,6 +17,16 @@ class SphereGeometry(Geometry):
         Radius of the sphere.
     center : array_like
         Center of the sphere.
+    placement : str, optional
+        How the particles are placed on the surface of the sphere: 'random' (uniformly at random,
+        default), 'fibonacci' (deterministic quasi-uniform Fibonacci lattice) or 'poisson'
+        (uniformly at random with a minimum distance between particles).
+    min_distance : float, optional
+        Minimum distance between particles for the 'poisson' placement, e.g. twice the
+        hydrodynamic radius.
+    seed : int, optional
+        Seed of the random placements. Successive calls of get_positions give different
+        configurations, reproducible from the seed.
 
     Attributes:
     -----------
@@ -23,20 +34,41 @@ class SphereGeometry(Geometry):
         Radius of the sphere.
     center : array_like
         Center of the sphere.
+    placement : str
+        How the particles are placed on the surface of the sphere.
+    min_distance : float
+        Minimum distance between particles for the 'poisson' placement.
+    seed : int
+        Seed of the random placements.
+    rng : numpy.random.Generator
+        Generator of the random placements created from the seed, or None to use the global
+        numpy random state. Independent streams are obtained with sample.
 
     Methods:
     --------
-    set_positions(particles : Particles)
-        Method to set the positions of the particles in the sphere.
+    get_positions(particles : Particles)
+        Method to get the positions of the particles in the sphere.
     '''
 
-    def __init__(self, radius : float, center : np.ndarray):
+    placements = ('random', 'fibonacci', 'poisson')
+
+    def __init__(self, radius : float, center : np.ndarray, placement : str = 'random', min_distance : float = None, seed : int = None):
         '''
         Constructor of the SphereGeometry class.
         '''
         super().__init__('sphere')
+        if placement not in self.placements:
+            raise ValueError(f'Unknown placement {placement}, use one of {list(self.placements)}.')
+        if placement == 'poisson' and min_distance is None:
+            raise ValueError("The 'poisson' placement needs a min_distance.")
         self.radius = radius
         self.center = center
+        self.placement = placement
+        self.min_distance = min_distance
+        self.seed = seed
+        # A seeded geometry draws successive configurations from its own generator, an unseeded
+        # one from the global numpy random state, so np.random.seed still controls it
+        self.rng = np.random.default_rng(seed) if seed is not None else None
 
     def get_positions(self, particles : Particles):
         '''
@@ -52,12 +84,66 @@ class SphereGeometry(Geometry):
         numpy.ndarray
             Array containing the positions of the particles in the sphere.
         '''
-        # Generate random points in the sphere
-        n_points = particles.get_numberparticles()
-        random_points = np.random.normal(size=(n_points, 3))
-        random_points /= np.linalg.norm(random_points, axis=1)[:, np.newaxis]
-        random_points *= self.radius
-        random_points += self.center
+        return self._generate(particles.get_numberparticles(), self.rng if self.rng is not None else np.random)
+
+    def _generate(self, n_points : int, rng : np.random.Generator) -> np.ndarray:
+        '''
+        Method to generate the positions of some particles in the sphere with a random generator.
+        '''
+        if self.placement == 'random':
+            unit_points = self._random_points(n_points, rng)
+        elif self.placement == 'fibonacci':
+            unit_points = self._fibonacci_points(n_points)
+        else:
+            unit_points = self._poisson_points(n_points, rng)
+
+        return unit_points * self.radius + self.center
 
+    @staticmethod
+    def _random_points(n_points : int, rng : np.random.Generator) -> np.ndarray:
+        '''
+        Uniformly random points on the unit sphere.
+        '''
+        random_points = rng.normal(size=(n_points, 3))
+        random_points /= np.linalg.norm(random_points, axis=1)[:, np.newaxis]
         return random_points
 
+    @staticmethod
+    def _fibonacci_points(n_points : int) -> np.ndarray:
+        '''
+        Fibonacci lattice on the unit sphere: equal area bands in z and a golden angle step in the azimuth.
+        '''
+        index = np.arange(n_points) + 0.5
+        z = 1 - 2 * index / n_points
+        rho = np.sqrt(1 - z**2)
+        azimuth = np.pi * (3 - np.sqrt(5)) * index
+        return np.stack([rho * np.cos(azimuth), rho * np.sin(azimuth), z], axis=1)
+
+    def _poisson_points(self, n_points : int, rng : np.random.Generator, max_candidates : int = 100) -> np.ndarray:
+        '''
+        Random points on the unit sphere separated by at least min_distance / radius.
+
+        Candidates are drawn in batches and rejected if they are too close to an accepted point
+        or to an earlier candidate of the same batch, with cell list searches, so the expected
+        cost is linear in the number of points.
+        '''
+        distance = self.min_distance / self.radius
+        accepted = np.empty((0, 3))
+        ncandidates = 0
+        while len(accepted) < n_points:
+            if ncandidates > max_candidates * n_points:
+                raise ValueError(f'Could not place {n_points} particles with a minimum distance {self.min_distance} '
+                                 f'on the sphere, only {len(accepted)} were placed.')
+            candidates = self._random_points(max(2 * (n_points - len(accepted)), 256), rng)
+            ncandidates += len(candidates)
+            # Candidates close to accepted points
+            too_close, _ = pairs_within(candidates, accepted, distance)
+            keep = np.ones(len(candidates), dtype=bool)
+            keep[too_close] = False
+            candidates = candidates[keep]
+            # Candidates close to earlier candidates of the batch
+            first, second = pairs_within(candidates, None, distance)
+            keep = np.ones(len(candidates), dtype=bool)
+            keep[np.maximum(first, second)] = False
+            accepted = np.concatenate([accepted, candidates[keep][:n_points - len(accepted)]])
+        return accepted
@@ -0,0 +1,44 @@
+'''
+Helpers shared by the tests of the mobility, the modes, the dynamics and the Hessians.
+'''
+
+import numpy as np
+from hydrodynamic_int.utils import getMobilityTensorRPY
+
+def rpy_mobility(positions, hyd_radius=1.0, viscosity=1.0):
+    '''
+    Dense RPY mobility tensor in open boundaries from the numpy backend, so the tests run without libMobility.
+    '''
+    return getMobilityTensorRPY(positions, hyd_radius, viscosity, backend='numpy-rpy')
+
+def create_chain(nparticles=None):
+    """
+    Create a chain with pair and angular bonds. By default a bent chain of 4 particles, and for
+    a given number of particles a randomly perturbed straight chain.
+    """
+    if nparticles is None:
+        positions = np.array([[0.0, 0.0, 0.0], [3.0, 0.0, 0.0], [5.0, 2.0, 0.0], [5.0, 5.0, 1.0]])
+        pairbonds = [[0, 1, 1.0, 3.0], [1, 2, 1.0, 2.5], [2, 3, 1.0, 3.0]]
+        anglebonds = [[0, 1, 2, 1.0, 2.5], [1, 2, 3, 1.0, 2.5]]
+    else:
+        rng = np.random.default_rng(1)
+        positions = np.zeros((nparticles, 3))
+        positions[:, 0] = np.arange(nparticles)
+        positions += 0.1*rng.normal(size=positions.shape)
+        pairbonds = [[i, i+1, 1.0, 1.0] for i in range(nparticles-1)]
+        anglebonds = [[i, i+1, i+2, 2.0, np.pi] for i in range(nparticles-2)]
+    bonds = {
+        "pairbonds" : {
+            "type": ["Bond2", "Harmonic"],
+            "parameters": {},
+            "labels": ["id_i", "id_j", "K", "r0"],
+            "data": pairbonds
+        },
+        "anglebonds" : {
+            "type": ["Bond3", "HarmonicAngular"],
+            "parameters": {},
+            "labels": ["id_i", "id_j", "id_k", "K", "theta0"],
+            "data": anglebonds
+        }
+    }
+    return positions, bonds
@@ -0,0 +1,91 @@
+'''
+This is a file for testing the registry of mobility backends.
+'''
+
+import sys
+import numpy as np
+import pytest
+from hydrodynamic_int.backends import rpy_blocks, create_backend, select_backend, register_backend, MobilityBackend, _BACKENDS
+from hydrodynamic_int.utils import getMobilityTensorRPY
+
+def test_rpy_blocks():
+    '''
+    Test the RPY blocks against the parallel and perpendicular mobilities of a pair of particles.
+    '''
+    hyd_radius, viscosity = 0.8, 1.3
+    selfmobility = 1/(6*np.pi*viscosity*hyd_radius)
+    for r in (0.0, 0.5, 1.2, 1.6, 2.5, 7.0):
+        block = rpy_blocks(np.zeros((1, 3)), np.array([[r, 0.0, 0.0]]), hyd_radius, viscosity)[0, 0]
+        if r >= 2*hyd_radius:
+            parallel = (2 - 4*hyd_radius**2/(3*r**2))/(8*np.pi*viscosity*r)
+            perpendicular = (1 + 2*hyd_radius**2/(3*r**2))/(8*np.pi*viscosity*r)
+        else:
+            parallel = selfmobility*(1 - 3*r/(16*hyd_radius))
+            perpendicular = selfmobility*(1 - 9*r/(32*hyd_radius))
+        assert np.allclose(block, np.diag([parallel, perpendicular, perpendicular]))
+
+    # The blocks are rotated with the separation and are continuous at contact
+    direction = np.array([1.0, 2.0, -2.0]) / 3
+    block = rpy_blocks(np.zeros((1, 3)), 2.5*direction[np.newaxis], hyd_radius, viscosity)[0, 0]
+    expected = rpy_blocks(np.zeros((1, 3)), np.array([[2.5, 0.0, 0.0]]), hyd_radius, viscosity)[0, 0]
+    assert np.isclose(direction @ block @ direction, expected[0, 0])
+    assert np.allclose(block @ direction, expected[0, 0] * direction)
+    below, above = rpy_blocks(np.zeros((1, 3)), np.array([[2*hyd_radius - 1e-9, 0, 0], [2*hyd_radius, 0, 0]]), hyd_radius, viscosity)[0]
+    assert np.allclose(below, above)
+
+def test_numpy_rpy_backend():
+    '''
+    Test the blocked products and the dense assembly of the numpy RPY backend.
+    '''
+    positions = np.random.default_rng(0).uniform(-4, 4, size=(30, 3))
+    backend = create_backend('numpy-rpy', nparticles=len(positions), hyd_radius=0.8, viscosity=1.3, block_pairs=64)
+    backend.set_positions(positions)
+    mobility = backend.dense()
+    blocks = rpy_blocks(positions, positions, 0.8, 1.3)
+    assert np.allclose(mobility, blocks.transpose(0, 2, 1, 3).reshape(90, 90))
+    assert np.allclose(mobility, mobility.T)
+    assert np.linalg.eigvalsh(mobility).min() > 0
+
+    forces = np.random.default_rng(1).normal(size=(4, 30, 3))
+    assert np.allclose(backend.Mdot(forces[0]).ravel(), mobility @ forces[0].ravel())
+    assert np.allclose(backend.Mdot_batch(forces).reshape(4, -1), forces.reshape(4, -1) @ mobility.T)
+    # The dense assembly from the products of the parent class gives the same tensor
+    assert np.allclose(MobilityBackend.dense(backend), mobility)
+
+def test_backend_selection(monkeypatch):
+    '''
+    Test the automatic selection and the CPU fallback when libMobility is missing.
+    '''
+    monkeypatch.setitem(sys.modules, 'libMobility', None)
+    assert select_backend(('open', 'open', 'open'), 100) == 'numpy-rpy'
+    with pytest.raises(ValueError):
+        select_backend(('open', 'open', 'open'), 10**6)
+    with pytest.raises(ValueError):
+        select_backend(('periodic', 'periodic', 'periodic'))
+    with pytest.raises(ValueError):
+        create_backend('numpy-rpy', ('periodic', 'periodic', 'periodic'))
+
+    positions = np.random.default_rng(2).uniform(-3, 3, size=(10, 3))
+    expected = rpy_blocks(positions, positions, hyd_radius=0.5).transpose(0, 2, 1, 3).reshape(30, 30)
+    assert np.allclose(getMobilityTensorRPY(positions, hyd_radius=0.5), expected)
+
+def test_mock_backend_and_registration(monkeypatch):
+    '''
+    Test the deterministic mock backend and the registration of a new backend.
+    '''
+    positions = np.random.default_rng(3).uniform(-3, 3, size=(5, 3))
+    mobility = getMobilityTensorRPY(positions, boundary_conditions=['periodic', 'periodic', 'open'], backend='mock')
+    assert np.allclose(mobility, np.eye(15) / (6 * np.pi))
+
+    class ScaledBackend(MobilityBackend):
+        name = 'scaled'
+        def initialize(self, hyd_radius=1.0, viscosity=1.0, nparticles=None):
+            pass
+        def set_positions(self, positions):
+            self.positions = positions
+        def Mdot(self, forces):
+            return 2 * forces
+
+    monkeypatch.setattr('hydrodynamic_int.backends._BACKENDS', dict(_BACKENDS))
+    register_backend(ScaledBackend)
+    assert np.allclose(getMobilityTensorRPY(positions, backend='scaled'), 2 * np.eye(15))
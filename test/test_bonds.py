@@ -0,0 +1,70 @@
+'''
+This is a file for testing the BondTable class.
+'''
+
+import numpy as np
+from particles_mod.core import BondTable
+from particles_mod.HalfPipe import construct_structure
+
+def create_table():
+    '''
+    Create a table with the pair bonds of a chain of 5 particles.
+    '''
+    columns = {'id_i': np.arange(4), 'id_j': np.arange(1, 5), 'K': np.full(4, 2.0), 'r0': np.linspace(1.0, 1.3, 4)}
+    return BondTable(['Bond2', 'Harmonic'], ['id_i', 'id_j', 'K', 'r0'], columns)
+
+def test_bondtable_schema():
+    '''
+    Test that a BondTable follows the UAMMD-structured bond dictionary schema.
+    '''
+    table = create_table()
+    assert table['type'] == ['Bond2', 'Harmonic']
+    assert table['labels'] == ['id_i', 'id_j', 'K', 'r0']
+    assert table['parameters'] == {}
+    assert table.nbonds == 4
+    # the data rows are built from the columns, and can not be edited
+    assert table['data'][1] == (1, 2, 2.0, 1.1)
+    assert isinstance(table['data'][1][0], int)
+    try:
+        table['data'][1][3] = 2.0
+        assert False
+    except TypeError:
+        pass
+    # the conversion to a plain dictionary builds editable rows
+    plain = table.to_dict()
+    assert plain['data'] == table.to_list() and plain['data'][1] == [1, 2, 2.0, 1.1]
+    assert BondTable.from_dict(plain).to_list() == table.to_list()
+
+def test_bondtable_operations():
+    '''
+    Test the slicing, concatenation and filtering of a BondTable.
+    '''
+    table = create_table()
+
+    # slices share the columns of the table
+    sliced = table.slice(1, 3)
+    assert sliced.nbonds == 2
+    assert np.shares_memory(sliced.columns['r0'], table.columns['r0'])
+    assert sliced.to_list() == table.to_list()[1:3]
+
+    # concatenation
+    joined = BondTable.concatenate([table, sliced])
+    assert joined.nbonds == 6
+    assert joined.to_list() == table.to_list() + sliced.to_list()
+
+    # filtering by a particle subset
+    subset = table.filter_particles([1, 2, 3])
+    assert subset.to_list() == table.to_list()[1:3]
+    relabeled = table.filter_particles([1, 2, 3], relabel=True)
+    assert np.all(relabeled.columns['id_i'] == [0, 1])
+    assert np.all(relabeled.columns['id_j'] == [1, 2])
+
+def test_structure_bondtables():
+    '''
+    Test that construct_structure returns columnar bond tables.
+    '''
+    positions, bonds = construct_structure(10.0, 5.0, np.pi / 2)
+    assert isinstance(bonds['pairbonds'], BondTable)
+    assert isinstance(bonds['anglebonds'], BondTable)
+    assert bonds['pairbonds'].columns['id_i'].dtype == np.int64
+    assert len(bonds['pairbonds']['data']) == bonds['pairbonds'].nbonds
@@ -0,0 +1,84 @@
+'''
+This is a file for testing the hydint command line runner.
+'''
+
+import json
+import os
+import numpy as np
+from hydrodynamic_int.cli import main, expand_jobs
+from particles_mod.HalfPipe import construct_structure
+from helpers import rpy_mobility
+
+def test_expand_jobs():
+    '''
+    Test the expansion of the sweep of a job spec.
+    '''
+    spec = {'structure': {'type': 'halfpipe', 'length': 1.0}, 'parameters': {'viscosity': 1.0},
+            'sweep': {'structure.length': [1.0, 2.0], 'parameters.hyd_radius': [0.1, 0.2, 0.3]}}
+    jobs = expand_jobs(spec)
+    assert len(jobs) == 6
+    assert jobs[1] == {'structure': {'type': 'halfpipe', 'length': 1.0}, 'parameters': {'viscosity': 1.0, 'hyd_radius': 0.2}}
+    assert spec['structure']['length'] == 1.0
+
+def test_cli_batch_and_resume(tmp_path, capsys):
+    '''
+    Test a batch with workers, the outputs, the resume and the failed jobs.
+    '''
+    spec = {
+        'structure': {'type': 'halfpipe', 'length': 1.0, 'radius': 1.0, 'density': 6.0},
+        'compute': ['mobility', 'hessian', 'modes'],
+        'parameters': {'hyd_radius': 0.05, 'backend': 'numpy-rpy', 'simulation': 'local', 'k': 4},
+        'sweep': {'structure.radius': [1.0, 1.5]}
+    }
+    spec_path = tmp_path / 'jobs.json'
+    spec_path.write_text(json.dumps(spec))
+    output = tmp_path / 'results'
+    assert main([str(spec_path), '-o', str(output), '-w', '2']) == 0
+
+    positions, _ = construct_structure(1.0, 1.5, np.pi/2, 6.0)
+    job = output / 'job_0001'
+    assert np.allclose(np.load(job / 'positions.npy'), positions)
+    assert np.allclose(np.load(job / 'mobility.npy'), rpy_mobility(positions, hyd_radius=0.05))
+    assert np.load(job / 'hessian.npy').shape == (len(positions), len(positions), 3, 3)
+    assert np.load(job / 'rates.npy').shape == (4,)
+    assert np.load(job / 'modes.npy').shape == (4, len(positions), 3)
+    assert set(json.loads((job / 'done.json').read_text())) == {'structure', 'mobility', 'hessian', 'modes'}
+
+    # A restart skips the jobs done, and a job without bonds fails without stopping the batch
+    os.remove(output / 'job_0000' / 'done.json')
+    spec['sweep']['structure.radius'].append(2.0)
+    spec_path.write_text(json.dumps(spec))
+    (tmp_path / 'sphere.json').write_text(json.dumps({'structure': {'type': 'sphere', 'radius': 1.0, 'center': [0, 0, 0], 'nparticles': 5}, 'compute': ['hessian']}))
+    assert main([str(spec_path), '-o', str(output)]) == 0
+    summary = json.loads((output / 'summary.json').read_text())
+    assert (summary['run'], summary['skipped'], summary['failed']) == (2, 1, 0)
+    spec['parameters']['hyd_radius'] = 0.06
+    spec_path.write_text(json.dumps(spec))
+    assert main([str(spec_path), '-o', str(output), '-q']) == 0
+    assert json.loads((output / 'summary.json').read_text())['run'] == 3
+    assert main([str(tmp_path / 'sphere.json'), '-q']) == 1
+    assert 'failed' in capsys.readouterr().out
+
+def test_cli_failed_edit_is_not_done(tmp_path):
+    '''
+    Test that a job edited after a successful run and then failing is run again on resume.
+    '''
+    spec = {'structure': {'type': 'halfpipe', 'length': 1.0, 'radius': 1.0, 'density': 4.0},
+            'parameters': {'hyd_radius': 0.05, 'backend': 'numpy-rpy'}}
+    spec_path = tmp_path / 'jobs.json'
+    output = tmp_path / 'results'
+    spec_path.write_text(json.dumps(spec))
+    assert main([str(spec_path), '-o', str(output), '-q']) == 0
+
+    spec['parameters']['backend'] = 'unknown'
+    spec_path.write_text(json.dumps(spec))
+    for _ in range(2):
+        assert main([str(spec_path), '-o', str(output), '-q']) == 1
+        summary = json.loads((output / 'summary.json').read_text())
+        assert (summary['failed'], summary['skipped']) == (1, 0)
+    assert not (output / 'job_0000' / 'done.json').exists()
+
+    spec['parameters']['backend'] = 'numpy-rpy'
+    spec_path.write_text(json.dumps(spec))
+    assert main([str(spec_path), '-o', str(output), '-q']) == 0
+    assert json.loads((output / 'summary.json').read_text())['run'] == 1
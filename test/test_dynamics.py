@@ -0,0 +1,70 @@
+'''
+This is a file for testing the Brownian dynamics integrator.
+'''
+
+import numpy as np
+from hydrodynamic_int.dynamics import BrownianDynamics
+from hydrodynamic_int.bonded import bonded_gradient, bonded_energy
+from helpers import rpy_mobility, create_chain
+
+def test_brownian_dynamics_forces_and_relaxation():
+    '''
+    Test the bonded forces and the deterministic relaxation at zero temperature.
+    '''
+    positions, bonds = create_chain()
+    dynamics = BrownianDynamics(positions, bonds, dt=0.05, temperature=0.0, mobility_function=rpy_mobility, hyd_radius=0.5)
+    assert np.allclose(dynamics.forces(positions), -bonded_gradient(positions, bonds))
+
+    energies = [bonded_energy(positions, bonds)]
+    for _ in range(5):
+        dynamics.run(20)
+        energies.append(bonded_energy(dynamics.positions, bonds))
+    assert np.all(np.diff(energies) < 0)
+    assert dynamics.nsteps == 100
+    assert dynamics.nrefreshes == 100
+    assert dynamics.steps_per_second > 0
+
+def test_brownian_dynamics_refresh():
+    '''
+    Test the lazy refresh of the mobility.
+    '''
+    positions, bonds = create_chain()
+    dynamics = BrownianDynamics(positions, bonds, dt=0.01, refresh_every=5, mobility_function=rpy_mobility, seed=0, hyd_radius=0.5)
+    dynamics.run(20)
+    assert dynamics.nrefreshes == 4
+
+    # A small displacement threshold forces extra refreshes
+    dynamics = BrownianDynamics(positions, bonds, dt=0.01, refresh_every=5, refresh_displacement=1e-3,
+                                mobility_function=rpy_mobility, seed=0, hyd_radius=0.5)
+    dynamics.run(20)
+    assert dynamics.nrefreshes > 4
+
+def test_brownian_dynamics_diffusion():
+    '''
+    Test the free diffusion of a single particle, <dx^2> = 2 kT mu dt per coordinate.
+    '''
+    nsteps = 20000
+    dynamics = BrownianDynamics(np.zeros((1, 3)), {}, dt=0.1, temperature=2.0, refresh_every=nsteps,
+                                mobility_function=rpy_mobility, seed=1, hyd_radius=0.5)
+    displacements = np.empty((nsteps, 3))
+    for step in range(nsteps):
+        previous = dynamics.positions
+        displacements[step] = dynamics.step()[0] - previous[0]
+    expected = 2 * 2.0 / (6 * np.pi * 0.5) * 0.1
+    assert np.allclose(np.var(displacements, axis=0), expected, rtol=0.05)
+    assert dynamics.nrefreshes == 1
+
+def test_brownian_dynamics_particles_trajectory(tmp_path):
+    '''
+    Test the integration of a Particles object saved to a Trajectory.
+    '''
+    from particles_mod.core import Particles, Trajectory
+
+    positions, bonds = create_chain()
+    particles = Particles.from_arrays(id=np.arange(len(positions)), position=positions.copy())
+    trajectory = Trajectory.create(tmp_path / 'trajectory.bin', len(positions))
+    dynamics = BrownianDynamics(particles, bonds, dt=0.01, mobility_function=rpy_mobility, seed=0, hyd_radius=0.5)
+    final = dynamics.run(10, trajectory=trajectory, save_every=2)
+    assert len(trajectory) == 5
+    assert np.all(trajectory[-1] == final)
+    assert np.all(particles.position == final)
@@ -0,0 +1,100 @@
+'''
+This is a file for testing the streaming ensemble averages of the mobility.
+'''
+
+import numpy as np
+import pytest
+import hydrodynamic_int.ensemble as ensemble
+from hydrodynamic_int.ensemble import WelfordAccumulator, ensemble_mobility
+from particles_mod.geometry import SphereGeometry
+from particles_mod.core import Particles
+from helpers import rpy_mobility
+
+def trace(tensor):
+    return np.trace(tensor)
+
+def test_welford_accumulator(tmp_path):
+    '''
+    Test the running statistics, the merge of accumulators and the checkpoints.
+    '''
+    samples = np.random.default_rng(0).normal(size=(50, 2, 3))
+    accumulator = WelfordAccumulator((2, 3))
+    for sample in samples[:20]:
+        accumulator.update(sample)
+    other = WelfordAccumulator((2, 3))
+    for sample in samples[20:]:
+        other.update(sample)
+    accumulator.merge(other)
+    assert accumulator.count == 50
+    assert np.allclose(accumulator.mean, samples.mean(axis=0))
+    assert np.allclose(accumulator.variance, samples.var(axis=0))
+
+    path = tmp_path / 'checkpoint.npz'
+    accumulator.save(path, seed=3)
+    loaded, metadata = WelfordAccumulator.load(path)
+    assert loaded.count == 50 and int(metadata['seed']) == 3
+    assert np.allclose(loaded.variance, accumulator.variance)
+
+def test_ensemble_mobility():
+    '''
+    Test the ensemble average of the mobility against the stacked tensors.
+    '''
+    particles = Particles.from_arrays(id=np.arange(5), position=np.zeros((5, 3)))
+    sphere = SphereGeometry(4.0, np.zeros(3))
+    k = 20
+    tensors = np.stack([rpy_mobility(positions, hyd_radius=0.5) for positions in sphere.sample(particles, k, seed=1)])
+
+    accumulator = ensemble_mobility(sphere, particles, k, seed=1, chunk_size=3, mobility_function=rpy_mobility, hyd_radius=0.5)
+    assert accumulator.count == k
+    assert np.allclose(accumulator.mean, tensors.mean(axis=0))
+    assert np.allclose(accumulator.variance, tensors.var(axis=0))
+
+    # Parallel workers with a scalar reduction
+    accumulator = ensemble_mobility(sphere, particles, k, seed=1, workers=2, chunk_size=3, mobility_function=rpy_mobility,
+                                    reduction=trace, hyd_radius=0.5)
+    assert np.isclose(accumulator.mean, np.trace(tensors, axis1=1, axis2=2).mean())
+
+def test_ensemble_mobility_checkpoint(tmp_path, monkeypatch):
+    '''
+    Test the resume of an interrupted ensemble from its checkpoint, and the checks of its settings.
+    '''
+    particles = Particles.from_arrays(id=np.arange(5), position=np.zeros((5, 3)))
+    sphere = SphereGeometry(4.0, np.zeros(3))
+    k = 20
+    tensors = np.stack([rpy_mobility(positions, hyd_radius=0.5) for positions in sphere.sample(particles, k, seed=1)])
+    checkpoint = tmp_path / 'ensemble.npz'
+    arguments = dict(seed=1, chunk_size=3, mobility_function=rpy_mobility, checkpoint=checkpoint)
+
+    # Interrupt the run after three chunks
+    chunk = ensemble._ensemble_chunk
+    def interrupted_chunk(*chunk_arguments):
+        if chunk_arguments[3] == 9:
+            raise RuntimeError('interrupted')
+        return chunk(*chunk_arguments)
+    monkeypatch.setattr(ensemble, '_ensemble_chunk', interrupted_chunk)
+    with pytest.raises(RuntimeError):
+        ensemble_mobility(sphere, particles, k, hyd_radius=0.5, **arguments)
+    monkeypatch.undo()
+    assert WelfordAccumulator.load(checkpoint)[0].count == 9
+
+    # Runs with other settings can not resume it
+    for changes in ({'k': 30}, {'chunk_size': 4}, {'seed': 2}, {'hyd_radius': 0.6}, {'reduction': trace}):
+        with pytest.raises(ValueError):
+            ensemble_mobility(sphere, particles, **{'k': k, 'hyd_radius': 0.5, **arguments, **changes})
+
+    accumulator = ensemble_mobility(sphere, particles, k, hyd_radius=0.5, **arguments)
+    assert accumulator.count == k
+    assert np.allclose(accumulator.mean, tensors.mean(axis=0))
+
+    # A checkpoint with more members than the ensemble is rejected
+    accumulator, metadata = WelfordAccumulator.load(checkpoint)
+    accumulator.count = k + 5
+    accumulator.save(checkpoint, **metadata)
+    with pytest.raises(ValueError, match='more than'):
+        ensemble_mobility(sphere, particles, k, hyd_radius=0.5, **arguments)
+
+    # Empty ensembles and unseeded checkpointed ensembles are rejected
+    with pytest.raises(ValueError, match='at least one member'):
+        ensemble_mobility(sphere, particles, 0, hyd_radius=0.5, **arguments)
+    with pytest.raises(ValueError, match='needs a seed'):
+        ensemble_mobility(sphere, particles, k, hyd_radius=0.5, **{**arguments, 'seed': None})
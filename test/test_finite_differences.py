@@ -0,0 +1,72 @@
+import numpy as np
+from hydrodynamic_int.bonded import bonded_gradient, bonded_energy, bonded_hessian
+from hydrodynamic_int.finite_differences import finite_difference_hessian, interaction_graph, color_particles
+from helpers import create_chain
+
+class ChainEnergy:
+    '''
+    Vectorized bonded energy of a stack of configurations.
+    '''
+    def __init__(self, bonds):
+        self.bonds = bonds
+
+    def __call__(self, positions_stack):
+        return np.array([bonded_energy(positions, self.bonds) for positions in positions_stack])
+
+class ChainGradient:
+    '''
+    Picklable bonded gradient.
+    '''
+    def __init__(self, bonds):
+        self.bonds = bonds
+
+    def __call__(self, positions):
+        return bonded_gradient(positions, self.bonds)
+
+def test_coloring():
+    """
+    Test that particles of the same color do not share any bonded neighbor.
+    """
+    positions, bonds = create_chain(8)
+    graph = interaction_graph(bonds, len(positions))
+    colors = color_particles(graph)
+
+    # Angular bonds couple particles up to two bonds away, so a distance-2 coloring needs 5 colors
+    assert colors.max() + 1 == 5, f"Number of colors is incorrect: {colors.max() + 1}"
+    conflicts = (graph.astype(int) @ graph.astype(int)).tocoo()
+    for i, j in zip(conflicts.row, conflicts.col):
+        if i != j:
+            assert colors[i] != colors[j], f"Particles {i} and {j} share a neighbor and a color"
+
+def test_finite_difference_hessian():
+    """
+    Test the colored finite difference Hessian against the bonded Hessian.
+    """
+    positions, bonds = create_chain(8)
+    expected = bonded_hessian(positions, bonds)
+
+    hessian = finite_difference_hessian(positions, gradient=ChainGradient(bonds), bonds=bonds)
+    assert hessian.shape == (8, 8, 3, 3), f"Hessian has incorrect shape: {hessian.shape}"
+    assert np.allclose(hessian, expected, atol=1e-6), "Colored Hessian does not match the bonded Hessian"
+
+    # Without topology every particle is displaced on its own
+    hessian = finite_difference_hessian(positions, gradient=ChainGradient(bonds))
+    assert np.allclose(hessian, expected, atol=1e-6), "Uncolored Hessian does not match the bonded Hessian"
+
+    # From a vectorized energy
+    hessian = finite_difference_hessian(positions, energy=ChainEnergy(bonds), bonds=bonds, step=1e-4)
+    assert np.allclose(hessian, expected, atol=1e-4), "Energy based Hessian does not match the bonded Hessian"
+
+def test_finite_difference_hessian_parallel_sparse():
+    """
+    Test the parallel evaluation and the block-sparse output.
+    """
+    positions, bonds = create_chain(8)
+    expected = bonded_hessian(positions, bonds)
+
+    hessian = finite_difference_hessian(positions, gradient=ChainGradient(bonds), bonds=bonds, workers=2, sparse=True)
+    # Only the blocks of particles up to two bonds away are stored
+    assert hessian.blocksize == (3, 3), f"Hessian has incorrect block size: {hessian.blocksize}"
+    assert hessian.nnz == 9*(8 + 2*7 + 2*6), f"Number of stored elements is incorrect: {hessian.nnz}"
+    dense = hessian.toarray().reshape(8, 3, 8, 3).transpose(0, 2, 1, 3)
+    assert np.allclose(dense, expected, atol=1e-6), "Sparse Hessian does not match the bonded Hessian"
@@ -18,3 +18,31 @@ def test_geometry():
     assert geometry.name == 'test'
 
 
+
+def test_geometry_sample():
+    '''
+    Test the ensemble sampling of the geometries.
+    '''
+    from particles_mod.geometry import SphereGeometry, spawn_seeds
+
+    # The seeds are the children of the seed sequence
+    children = np.random.SeedSequence(7).spawn(4)
+    seeds = spawn_seeds(7, 2, start=2)
+    assert [s.generate_state(2).tolist() for s in seeds] == [c.generate_state(2).tolist() for c in children[2:]]
+
+    particles = Particles.from_arrays(id=np.arange(50), position=np.zeros((50, 3)))
+    sphere = SphereGeometry(2.0, np.zeros(3))
+    ensemble = sphere.sample(particles, 6, seed=7)
+    assert ensemble.shape == (6, 50, 3)
+    assert np.allclose(np.linalg.norm(ensemble, axis=2), 2.0)
+    # Reproducible, independent members, and any range of members can be generated alone
+    assert np.all(ensemble == sphere.sample(particles, 6, seed=7))
+    assert not np.allclose(ensemble[0], ensemble[1])
+    assert np.all(ensemble[3:] == sphere.sample(particles, 3, seed=7, start=3))
+
+    # The general class has no generator
+    try:
+        Geometry('test').sample(particles, 2, seed=0)
+        assert False
+    except NotImplementedError:
+        pass
@@ -28,6 +28,29 @@ def test_HPpositions():
         assert np.isclose(positions[i][0], -Radius), f"Particle {i} is not at the correct x coordinate: {positions[i][0]} != {-Radius}"
         assert np.isclose(positions[i][2], Radius), f"Particle {i} is not at the correct z coordinate: {positions[i][2]} != {Radius}"
 
+def test_HPpositions_array():
+    """
+    Test that the positions are a contiguous array with the particle ordering row_id * ny + column_id.
+    """
+    half_pipe = HalfPipe(10.0, 5.0, np.pi / 2, HP_density=4.0)
+    positions = half_pipe.generate_positions()
+
+    # check the array layout
+    assert isinstance(positions, np.ndarray), f"Positions are not an array: {type(positions)}"
+    assert positions.shape == (half_pipe.nparticles, 3), f"Positions have incorrect shape: {positions.shape}"
+    assert positions.flags['C_CONTIGUOUS'], "Positions are not contiguous"
+
+    # check the ordering against the element-wise parametrization
+    y = np.linspace(0, half_pipe.HP_length, half_pipe.ny)
+    theta = np.linspace(-half_pipe.HP_amplitude, half_pipe.HP_amplitude, half_pipe.ntheta)
+    expected = [[half_pipe.HP_radius*np.sin(t), j, half_pipe.HP_radius*(1-np.cos(t))] for t in theta for j in y]
+    assert np.allclose(positions, expected), "Positions ordering is incorrect"
+
+    # check the single precision output
+    positions32 = HalfPipe(10.0, 5.0, np.pi / 2, HP_density=4.0).generate_positions(dtype=np.float32)
+    assert positions32.dtype == np.float32, f"Positions have incorrect dtype: {positions32.dtype}"
+    assert np.allclose(positions32, positions, atol=1e-5), "Single precision positions are incorrect"
+
 def test_HP_pairbonds():
     """
     Test the HalfPipe class for the correct calculation of pair bonds.
@@ -108,3 +131,28 @@ def test_HP_strconstr():
 
 
 
+def test_HP_bond_indices():
+    """
+    Test the vectorized bond indices and that the bonds are computed from the given positions.
+    """
+    half_pipe = HalfPipe(10.0, 5.0, np.pi / 2, HP_density=4.0)
+    positions = half_pipe.generate_positions()
+    ny = half_pipe.ny
+
+    # check the stencils of the first bond of every family
+    id_i, id_j = half_pipe.pairbond_indices()
+    nhorizontal = half_pipe.ntheta*(ny - 1)
+    nvertical = (half_pipe.ntheta - 1)*ny
+    assert (id_i[0], id_j[0]) == (0, 1), "First horizontal bond is incorrect"
+    assert (id_i[nhorizontal], id_j[nhorizontal]) == (0, ny), "First vertical bond is incorrect"
+    assert (id_i[nhorizontal + nvertical], id_j[nhorizontal + nvertical]) == (0, ny + 1), "First diagonal bond is incorrect"
+    assert (id_i[nhorizontal + nvertical + 1], id_j[nhorizontal + nvertical + 1]) == (1, ny), "Second diagonal bond is incorrect"
+
+    id_i, id_j, id_k = half_pipe.anglebond_indices()
+    assert (id_i[-1], id_j[-1], id_k[-1]) == (half_pipe.nparticles - 1 - 2*ny, half_pipe.nparticles - 1 - ny, half_pipe.nparticles - 1), "Last vertical angular bond is incorrect"
+
+    # check that the rest lengths and angles come from the given positions
+    pairbonds = half_pipe.generate_pairbonds(2*positions)
+    assert np.isclose(pairbonds[0][3], 2*half_pipe.HP_length/(ny - 1)), f"Rest length is incorrect: {pairbonds[0][3]}"
+    anglebonds = half_pipe.generate_anglebonds(positions)
+    assert np.allclose([bond[4] for bond in anglebonds[:half_pipe.ntheta*(ny - 2)]], np.pi), "Horizontal angles are incorrect"
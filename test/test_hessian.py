@@ -1,4 +1,5 @@
 import hydrodynamic_int.hessian as hess
+import os
 import numpy as np
 
 def create_particle_pair():
@@ -77,3 +78,178 @@ def test_hessian_diagonalization():
 
 
 
+def test_hessian_local_simulation():
+    """
+    Test the Hessian obtained with the local simulation stand-in against the analytical harmonic bond Hessian.
+    """
+    from hydrodynamic_int.local_simulation import LocalSimulation
+
+    positions, bonds = create_particle_pair()
+    # Stretch the bond so that the transversal terms do not vanish
+    positions[1][0] = 1.0
+
+    hessian = hess.obtainHessian(positions, bonds, simulation_factory=LocalSimulation)
+
+    # Analytical Hessian of a harmonic bond along x with K = 1, r0 = 1 and r = 1.5
+    block = np.diag([1.0, 1 - 1/1.5, 1 - 1/1.5])
+    assert np.allclose(hessian[0, 0], block, atol=1e-5), f"Diagonal block is incorrect: {hessian[0, 0]}"
+    assert np.allclose(hessian[0, 1], -block, atol=1e-5), f"Off diagonal block is incorrect: {hessian[0, 1]}"
+
+def test_hessian_batch():
+    """
+    Test that the batched Hessian evaluation matches the Hessians of the individual configurations.
+    """
+    from hydrodynamic_int.local_simulation import LocalSimulation
+
+    # Three particles with a pair bond and an angular bond
+    bonds = {
+        "pairbonds" : {
+            "type": ["Bond2", "Harmonic"],
+            "parameters": {},
+            "labels": ["id_i", "id_j", "K", "r0"],
+            "data": [[0, 1, 1.0, 1.0], [1, 2, 2.0, 1.0]]
+        },
+        "anglebonds" : {
+            "type": ["Bond3", "HarmonicAngular"],
+            "parameters": {},
+            "labels": ["id_i", "id_j", "id_k", "K", "theta0"],
+            "data": [[0, 1, 2, 1.0, np.pi]]
+        }
+    }
+    rng = np.random.default_rng(0)
+    positions_batch = np.array([[[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [2.0, 0.0, 0.0]]]*4) + 0.1*rng.normal(size=(4, 3, 3))
+
+    hessians = hess.obtainHessianBatch(positions_batch, bonds, batch_size=3, simulation_factory=LocalSimulation)
+
+    # check the shape of the batched Hessians
+    assert hessians.shape == (4, 3, 3, 3, 3), f"Batched Hessians have incorrect shape: {hessians.shape}"
+
+    # check every configuration against an individual evaluation
+    for k in range(4):
+        hessian = hess.obtainHessian(positions_batch[k].tolist(), bonds, simulation_factory=LocalSimulation)
+        assert np.allclose(hessians[k], hessian), f"Batched Hessian {k} does not match the individual Hessian"
+        assert np.allclose(hessians[k], hessians[k].transpose(1, 0, 3, 2), atol=1e-5), f"Batched Hessian {k} is not symmetric"
+
+def test_hessian_batch_diagonal_blocks(tmp_path, monkeypatch):
+    """
+    Test that only the diagonal blocks of the packed Hessian file are read, in chunks of rows.
+    """
+    from hydrodynamic_int.local_simulation import LocalSimulation, write_hessian_file
+
+    # the packed Hessian file is never read as a whole
+    def fail(*args, **kwargs):
+        raise AssertionError("The full packed Hessian was read")
+    positions, bonds = create_particle_pair()
+    positions_batch = np.array([positions]*5) + 0.1*np.random.default_rng(1).normal(size=(5, 2, 3))
+    expected = np.stack([hess.obtainHessian(p.tolist(), bonds, simulation_factory=LocalSimulation) for p in positions_batch])
+    monkeypatch.setattr(hess, "read_hessian_file", fail)
+    monkeypatch.setattr(hess, "MAX_PACKED_PARTICLES", 4)
+    hessians = hess.obtainHessianBatch(positions_batch, bonds, simulation_factory=LocalSimulation)
+    assert np.allclose(hessians, expected), "Batched Hessians with the default batch size are incorrect"
+
+    # rows split across chunks, with blocks between copies that are discarded
+    packed = np.random.default_rng(2).normal(size=(6, 6, 3, 3))
+    write_hessian_file(tmp_path / "hessian.txt", packed)
+    blocks = hess.read_hessian_diagonal_blocks(tmp_path / "hessian.txt", 2, 3, chunk_rows=5)
+    for copy in range(3):
+        indices = slice(2*copy, 2*copy + 2)
+        assert np.allclose(blocks[copy], packed[indices, indices]), f"Diagonal blocks of copy {copy} are incorrect"
+
+def test_replicate_bonds_table(monkeypatch):
+    """
+    Test that the replication of BondTable bonds matches the one of dictionaries without building their rows.
+    """
+    from particles_mod.core.bonds import BondTable
+
+    bonds = create_particle_pair()[1]
+    expected = hess.replicate_bonds(bonds, 2, 3)
+    tables = {name: BondTable.from_dict(bond) for name, bond in bonds.items()}
+    def fail(self):
+        raise AssertionError("The rows of the BondTable have been built")
+    monkeypatch.setattr(BondTable, "to_list", fail)
+    packed_bonds = hess.replicate_bonds(tables, 2, 3)
+    assert packed_bonds == expected, "Replicated BondTable bonds do not match the replicated dictionaries"
+    assert packed_bonds["bonds"]["data"][1][:2] == [2, 3], "Replicated bonds have incorrect ids"
+
+def test_hessian_session():
+    """
+    Test that a Hessian session reuses its simulation for several configurations.
+    """
+    from hydrodynamic_int.local_simulation import LocalSimulation
+
+    positions, bonds = create_particle_pair()
+
+    with hess.HessianSession(bonds, len(positions), simulation_factory=LocalSimulation) as session:
+        simulation = session.simulation
+        output_file_path = session.output_file_path
+        for stretch in [0.0, 0.5, 1.0]:
+            new_positions = np.array(positions)
+            new_positions[1, 0] += stretch
+            hessian = session.compute(new_positions)
+            expected = hess.obtainHessian(new_positions.tolist(), bonds, simulation_factory=LocalSimulation)
+            assert np.allclose(hessian, expected), f"Session Hessian is incorrect for stretch {stretch}"
+
+        # check that the simulation and the output file have been reused
+        assert session.simulation is simulation, "Session simulation has been rebuilt"
+        assert session.output_file_path == output_file_path, "Session output file has changed"
+        assert session.ncalls == 3, f"Number of calls is incorrect: {session.ncalls}"
+        assert session.amortized_latency > 0, "Amortized latency has not been measured"
+    assert not os.path.exists(output_file_path), "Session output buffer has not been removed"
+
+def test_hessian_session_output(tmp_path):
+    """
+    Test that every Hessian session call reads only the output of its own run.
+    """
+    from hydrodynamic_int.local_simulation import LocalSimulation
+
+    positions, bonds = create_particle_pair()
+    with hess.HessianSession(bonds, len(positions), simulation_factory=LocalSimulation, buffer_dir=tmp_path) as session:
+        first = session.compute(positions)
+        stretched = np.array(positions) + [[0.0, 0.0, 0.0], [0.5, 0.2, 0.0]]
+        second = session.compute(stretched)
+        expected = hess.obtainHessian(stretched.tolist(), bonds, simulation_factory=LocalSimulation)
+        assert not np.allclose(first, second), "Second session Hessian is the first one"
+        assert np.allclose(second, expected), "Second session Hessian is incorrect"
+
+        # a run that writes nothing does not return the previous Hessian
+        session.simulation["simulationStep"] = {}
+        try:
+            session.compute(stretched)
+            assert False, "The previous Hessian was read again"
+        except (FileNotFoundError, OSError):
+            pass
+
+def test_hessian_subset():
+    """
+    Test that the Hessian of a subset matches the corresponding blocks of the full Hessian.
+    """
+    from hydrodynamic_int.local_simulation import LocalSimulation
+    from particles_mod.HalfPipe import HalfPipe
+    from particles_mod.core import Particles
+
+    half_pipe = HalfPipe(2.0, 1.0, np.pi/2, 4.0)
+    positions, bonds = half_pipe.construct()
+    full = hess.obtainHessian(positions, bonds, simulation_factory=LocalSimulation)
+
+    # first rim of the half-pipe (the row with the lowest angle)
+    rim = np.arange(half_pipe.nv)
+    particles = Particles.from_arrays(id=np.arange(len(positions)), position=positions)
+    subset = particles.subset(slice(0, half_pipe.nv))
+    hessian = hess.obtainHessian(subset, bonds, simulation_factory=LocalSimulation)
+    assert hessian.shape == (len(rim), len(rim), 3, 3), f"Subset Hessian has incorrect shape: {hessian.shape}"
+    assert np.allclose(hessian, full[np.ix_(rim, rim)]), "Subset Hessian does not match the full Hessian blocks"
+
+    # explicit subset indices
+    indices = np.array([1, 5, 6, 10])
+    hessian = hess.obtainHessian(positions, bonds, simulation_factory=LocalSimulation, subset=indices)
+    assert np.allclose(hessian, full[np.ix_(indices, indices)]), "Subset Hessian does not match the full Hessian blocks"
+
+    # the edited positions of an index subset (a copy) are used
+    subset = particles.subset(indices)
+    subset.position[0] += [0.1, -0.2, 0.05]
+    moved = positions.copy()
+    moved[indices[0]] = subset.position[0]
+    hessian = hess.obtainHessian(subset, bonds, simulation_factory=LocalSimulation)
+    expected = hess.obtainHessian(moved, bonds, simulation_factory=LocalSimulation, subset=indices)
+    assert np.allclose(hessian, expected), "Subset Hessian ignores the positions of the subset"
+    assert not np.allclose(hessian, full[np.ix_(indices, indices)]), "Subset Hessian ignores the positions of the subset"
@@ -0,0 +1,72 @@
+'''
+This is a file for testing the multi-resolution structure hierarchy.
+'''
+
+import numpy as np
+import scipy.sparse
+from particles_mod.ParametricSurface import flat_sheet, tube
+from particles_mod.StructureHierarchy import StructureHierarchy
+
+def grid_laplacian(surface):
+    '''
+    Vector graph Laplacian of the pair bonds of a surface, shifted to be positive definite.
+    '''
+    id_i, id_j = surface.pairbond_indices()
+    n = surface.nparticles
+    adjacency = scipy.sparse.csr_matrix((np.ones(2*len(id_i)), (np.concatenate([id_i, id_j]), np.concatenate([id_j, id_i]))), shape=(n, n))
+    laplacian = scipy.sparse.diags(np.asarray(adjacency.sum(axis=1)).ravel()) - adjacency
+    return scipy.sparse.kron(laplacian + 0.1*scipy.sparse.identity(n), np.eye(3)).tocsr()
+
+def test_hierarchy_levels():
+    '''
+    Test the nesting of the levels and the transfer operators.
+    '''
+    hierarchy = StructureHierarchy(flat_sheet(2.0, 4.0, 3, 5), 3)
+    assert [(level.nu, level.nv) for level in hierarchy.levels] == [(3, 5), (5, 9), (9, 17)]
+
+    coarse = hierarchy.levels[0].generate_positions()
+    fine = hierarchy.levels[1].generate_positions()
+    # the coarse nodes are nodes of the fine level
+    assert np.allclose(fine.reshape(5, 9, 3)[::2, ::2], coarse.reshape(3, 5, 3))
+    # bilinear interpolation is exact for a flat sheet and restriction undoes it
+    assert np.allclose(hierarchy.prolong(coarse, 0), fine)
+    assert np.allclose(hierarchy.restrict(fine, 1), coarse)
+    # stacks of fields
+    assert hierarchy.prolong(np.stack([coarse, 2*coarse]), 0).shape == (2, 45, 3)
+
+    # periodic levels double the number of rows
+    hierarchy = StructureHierarchy(tube(1.0, 1.0, 4, 6), 2)
+    assert (hierarchy.levels[1].nu, hierarchy.levels[1].nv) == (12, 7)
+    assert np.allclose(hierarchy.prolongation(0).sum(axis=1), 1.0)
+
+def test_hierarchy_cache_and_modes():
+    '''
+    Test the cache and the seeding of fine eigenmodes with coarse ones.
+    '''
+    hierarchy = StructureHierarchy(flat_sheet(1.0, 1.0, 5, 5), 2)
+
+    calls = []
+    def compute(surface):
+        calls.append(surface.nparticles)
+        return grid_laplacian(surface)
+    coarse_operator = hierarchy.cached('laplacian', 0, compute)
+    hierarchy.cached('laplacian', 0, compute)
+    assert calls == [25]
+
+    # lowest coarse modes
+    _, vectors = np.linalg.eigh(coarse_operator.toarray())
+    coarse_modes = vectors[:, :6].T.reshape(6, 25, 3)
+
+    fine_operator = hierarchy.cached('laplacian', 1, compute)
+    eigenvalues, modes = hierarchy.refine_modes(fine_operator, coarse_modes, 1, tol=1e-8)
+    expected = np.linalg.eigvalsh(fine_operator.toarray())[:6]
+    assert modes.shape == (6, 81, 3)
+    assert np.allclose(eigenvalues, expected, atol=1e-6)
+
+def test_hierarchy_namespace():
+    '''
+    Test that only StructureHierarchy is exported to the particles_mod namespace.
+    '''
+    import particles_mod
+    assert particles_mod.StructureHierarchy is StructureHierarchy
+    assert not hasattr(particles_mod, 'copy'), 'copy leaked into the particles_mod namespace'
@@ -0,0 +1,41 @@
+'''
+This is a file for testing that the packages import without their heavy backends.
+'''
+
+import subprocess
+import sys
+
+def run_isolated(code):
+    '''
+    Run some code in a new interpreter where libMobility, pyUAMMD, matplotlib and pyvista can not be imported.
+    '''
+    blocker = "import sys\nfor name in ('libMobility', 'pyUAMMD', 'matplotlib', 'pyvista'):\n    sys.modules[name] = None\n"
+    result = subprocess.run([sys.executable, '-c', blocker + code], capture_output=True, text=True, env=None)
+    assert result.returncode == 0, result.stderr
+
+def test_imports_without_backends():
+    '''
+    Test that importing the packages loads neither the backends nor scipy.
+    '''
+    run_isolated(
+        "import particles_mod, hydrodynamic_int\n"
+        "assert 'scipy' not in sys.modules\n"
+        "assert 'hydrodynamic_int.hessian' not in sys.modules\n"
+    )
+
+def test_lazy_attributes_without_backends():
+    '''
+    Test that the functions not needing the backends work without them.
+    '''
+    run_isolated(
+        "import numpy as np\n"
+        "import hydrodynamic_int\n"
+        "from hydrodynamic_int.local_simulation import LocalSimulation\n"
+        "from particles_mod.HalfPipe import construct_structure\n"
+        "positions, bonds = construct_structure(1.0, 1.0, np.pi/2, 9.0)\n"
+        "hessian = hydrodynamic_int.obtainHessian(positions, bonds, simulation_factory=LocalSimulation)\n"
+        "assert hessian.shape == (len(positions), len(positions), 3, 3)\n"
+        "assert 'obtainHessian' in dir(hydrodynamic_int)\n"
+        "assert hydrodynamic_int.select_backend() == 'numpy-rpy'\n"
+        "assert hydrodynamic_int.getMobilityTensorRPY(positions).shape == (3*len(positions), 3*len(positions))\n"
+    )
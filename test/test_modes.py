@@ -0,0 +1,84 @@
+import numpy as np
+from hydrodynamic_int.modes import relaxation_modes, MobilityFactorization
+from hydrodynamic_int.hessian import obtainHessian, reshape_hessian
+from hydrodynamic_int.local_simulation import LocalSimulation
+from helpers import rpy_mobility, create_chain
+
+def test_relaxation_modes():
+    """
+    Test that the relaxation rates and modes are the eigenpairs of M·H.
+    """
+    positions, bonds = create_chain()
+    mobility = rpy_mobility(positions)
+
+    rates, modes = relaxation_modes(positions, bonds, mobility=mobility, simulation_factory=LocalSimulation)
+
+    # check the number of modes and their shape
+    assert rates.shape == (12,), f"Number of rates is incorrect: {rates.shape}"
+    assert modes.shape == (12, 4, 3), f"Modes have incorrect shape: {modes.shape}"
+
+    # check that the rates are the eigenvalues of M·H
+    hessian = reshape_hessian(obtainHessian(positions.tolist(), bonds, LocalSimulation))
+    expected = np.sort(np.linalg.eigvals(mobility @ hessian).real)
+    assert np.allclose(rates, expected, atol=1e-5), f"Rates are incorrect: {rates} != {expected}"
+
+    # check that every mode is a right eigenvector of M·H
+    for rate, mode in zip(rates, modes):
+        vector = mode.flatten()
+        assert np.allclose(mobility @ hessian @ vector, rate*vector, atol=1e-5), "Mode is not an eigenvector of M·H"
+
+def test_relaxation_modes_lowest():
+    """
+    Test the lowest k modes option with the dense and the matrix free solvers.
+    """
+    positions, bonds = create_chain()
+    mobility = rpy_mobility(positions)
+
+    rates, _ = relaxation_modes(positions, bonds, mobility=mobility, simulation_factory=LocalSimulation)
+    rates_k, modes_k = relaxation_modes(positions, bonds, mobility=mobility, k=8, simulation_factory=LocalSimulation)
+    rates_free, _ = relaxation_modes(positions, bonds, mobility=mobility, k=8, matrix_free=True, simulation_factory=LocalSimulation)
+
+    assert modes_k.shape == (8, 4, 3), f"Modes have incorrect shape: {modes_k.shape}"
+    assert np.allclose(rates_k, rates[:8]), f"Lowest rates are incorrect: {rates_k} != {rates[:8]}"
+    assert np.allclose(rates_free, rates[:8], atol=1e-6), f"Matrix free rates are incorrect: {rates_free} != {rates[:8]}"
+
+def test_relaxation_modes_matrix_free(monkeypatch):
+    """
+    Test that the matrix free solver only uses the sparse Hessian and mobility products.
+    """
+    positions, bonds = create_chain()
+    mobility = rpy_mobility(positions)
+    hessian = reshape_hessian(obtainHessian(positions.tolist(), bonds, LocalSimulation))
+    rates, _ = relaxation_modes(positions, bonds, mobility=mobility, simulation_factory=LocalSimulation)
+
+    # Neither the mobility tensor nor its Cholesky factor are built
+    def fail(*args, **kwargs):
+        raise AssertionError("The mobility tensor was built")
+    monkeypatch.setattr(MobilityFactorization, "factor", fail)
+    monkeypatch.setattr("scipy.linalg.cholesky", fail)
+    sparse_hessian = obtainHessian(positions.tolist(), bonds, LocalSimulation, sparse=True)
+    assert np.allclose(sparse_hessian.toarray(), hessian), "Sparse Hessian is incorrect"
+    rates_free, modes_free = relaxation_modes(positions, bonds, k=6, matrix_free=True, simulation_factory=LocalSimulation)
+    rates_sparse, _ = relaxation_modes(positions, hessian=sparse_hessian, k=6, matrix_free=True)
+
+    assert np.allclose(rates_free, rates[:6], atol=1e-6), f"Matrix free rates are incorrect: {rates_free} != {rates[:6]}"
+    assert np.allclose(rates_sparse, rates[:6], atol=1e-6), f"Sparse Hessian rates are incorrect: {rates_sparse} != {rates[:6]}"
+    vectors = modes_free.reshape(6, -1).T
+    assert np.allclose(mobility @ hessian @ vectors, vectors * rates_free, atol=1e-6), "Modes are not eigenvectors of M·H"
+    assert np.allclose(vectors.T @ np.linalg.solve(mobility, vectors), np.eye(6), atol=1e-6), "Modes are not M^-1 orthonormal"
+
+def test_mobility_factorization_reuse():
+    """
+    Test that the mobility factorization is reused for nearby configurations.
+    """
+    positions, bonds = create_chain()
+    factorization = MobilityFactorization(rpy_mobility, tolerance=0.1)
+
+    relaxation_modes(positions, bonds, factorization=factorization, simulation_factory=LocalSimulation)
+    relaxation_modes(positions + 0.05, bonds, factorization=factorization, simulation_factory=LocalSimulation)
+    assert factorization.nfactorizations == 1, f"Factorization was not reused: {factorization.nfactorizations}"
+    assert factorization.nreuses == 1, f"Number of reuses is incorrect: {factorization.nreuses}"
+
+    relaxation_modes(positions + 0.5, bonds, factorization=factorization, simulation_factory=LocalSimulation)
+    assert factorization.nfactorizations == 2, f"Factorization was not recomputed: {factorization.nfactorizations}"
+    assert np.allclose(factorization.lower @ factorization.lower.T, rpy_mobility(positions + 0.5)), "Cholesky factor is incorrect"
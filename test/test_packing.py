@@ -0,0 +1,63 @@
+'''
+This script tests the packing subclasses of the Geometry class.
+'''
+
+import numpy as np
+from particles_mod.geometry import BoxPackingGeometry, SpherePackingGeometry, CylinderPackingGeometry
+from particles_mod.core import Particles
+
+def min_distance(positions):
+    distances = np.linalg.norm(positions[:, np.newaxis] - positions[np.newaxis], axis=-1)
+    return distances[np.triu_indices(len(positions), 1)].min()
+
+def test_packing_geometries():
+    '''
+    This function tests the packings of beads in a box, a sphere and a cylinder.
+    '''
+    n = 400
+    bead_radius = 0.5
+    particles = Particles.from_arrays(id=np.arange(n), position=np.zeros((n, 3)))
+    bead_volume = n * 4/3 * np.pi * bead_radius**3
+
+    # Box at a packing fraction of 0.45
+    side = (bead_volume / 0.45)**(1/3)
+    box = BoxPackingGeometry([side, side, side], np.array([1.0, 0.0, 0.0]), bead_radius, seed=0)
+    positions = box.get_positions(particles)
+    assert positions.shape == (n, 3)
+    assert min_distance(positions) >= 2 * bead_radius
+    assert np.all(np.abs(positions - box.center) <= side / 2 - bead_radius + 1e-12)
+    assert np.isclose(box.packing_fraction, 0.45)
+    assert box.generation_time > 0
+    assert np.all(positions == BoxPackingGeometry([side, side, side], np.array([1.0, 0.0, 0.0]), bead_radius, seed=0).get_positions(particles))
+
+    # Sphere at a packing fraction of 0.4
+    radius = (bead_volume / 0.4 * 3/(4*np.pi))**(1/3)
+    sphere = SpherePackingGeometry(radius, np.zeros(3), bead_radius, seed=1)
+    positions = sphere.get_positions(particles)
+    assert min_distance(positions) >= 2 * bead_radius
+    assert np.all(np.linalg.norm(positions, axis=1) <= radius - bead_radius + 1e-12)
+    assert np.isclose(sphere.packing_fraction, 0.4)
+
+    # Cylinder at a packing fraction of 0.4
+    radius = (bead_volume / 0.4 / (4*np.pi))**(1/3)
+    cylinder = CylinderPackingGeometry(radius, 4*radius, np.zeros(3), bead_radius, seed=2)
+    positions = cylinder.get_positions(particles)
+    assert min_distance(positions) >= 2 * bead_radius
+    assert np.all(np.linalg.norm(positions[:, :2], axis=1) <= radius - bead_radius + 1e-12)
+    assert np.all(np.abs(positions[:, 2]) <= 2*radius - bead_radius + 1e-12)
+
+    # Ensembles of packings
+    assert box.sample(particles, 2, seed=3).shape == (2, n, 3)
+
+    # Empty packing
+    empty = Particles.from_arrays(id=np.arange(0), position=np.empty((0, 3)))
+    assert box.get_positions(empty).shape == (0, 3)
+    assert box.packing_fraction == 0 and box.nsweeps == 0
+
+    # Impossible packing
+    box = BoxPackingGeometry([side/2, side, side], np.zeros(3), bead_radius, seed=0, max_sweeps=50)
+    try:
+        box.get_positions(particles)
+        assert False
+    except ValueError as e:
+        assert 'Could not remove the overlaps of 400 beads' in str(e)
@@ -1,3 +1,5 @@
+import copy
+import pickle
 from particles_mod.core import *
 import numpy as np
 
@@ -16,3 +18,65 @@ def test_Particle():
     assert np.all(particle.position == position)
     # Check the particle's properties
     assert particle.properties == properties
+
+def test_Particle_view():
+    '''
+    Test the Particle views of a Particles container.
+    '''
+    positions = np.random.rand(5, 3)
+    particles = Particles.from_arrays(id=np.arange(5), position=positions, mass=np.ones(5))
+    assert len(particles) == 5
+
+    particle = particles[2]
+    assert particle.parent is particles and particle.index == 2
+    assert np.all(particle.position == positions[2])
+    assert particle.properties == {'mass': 1.0}
+    assert particles[-1].id == 4
+
+    # Writes go to the arrays of the container
+    particle.update_positions([1.0, 2.0, 3.0])
+    particle.mass = 3.0
+    assert np.all(positions[2] == [1.0, 2.0, 3.0])
+    assert particles.mass[2] == 3.0
+
+    # Views have no instance dictionary
+    assert not hasattr(particle, '__dict__')
+    assert [p.id for p in particles] == list(range(5))
+
+def test_Particle_copy_and_pickle():
+    '''
+    Test that copies and pickles of a Particle are detached particles with the same values.
+    '''
+    particles = Particles.from_arrays(id=np.arange(3), position=np.random.rand(3, 3), mass=np.array([1.0, 2.0, 3.0]))
+    for particle in (Particle(1, [0.0, 0.0, 0.0], {'mass': 2.0}), particles[1]):
+        for duplicate in (copy.copy(particle), copy.deepcopy(particle), pickle.loads(pickle.dumps(particle))):
+            assert duplicate.id == particle.id
+            assert np.all(duplicate.position == particle.position)
+            assert duplicate.properties == particle.properties
+            assert duplicate.parent is not particle.parent
+    duplicate = copy.copy(particles[1])
+    duplicate.mass = 5.0
+    assert particles.mass[1] == 2.0
+
+def test_Particle_properties_write():
+    '''
+    Test that writing the properties of a Particle view changes the arrays of the container.
+    '''
+    particles = Particles.from_arrays(id=np.arange(3), position=np.random.rand(3, 3), charge=np.ones(3))
+    properties = particles[0].properties
+    properties['charge'] = 5.0
+    assert particles.charge[0] == 5.0 and particles.charge[1] == 1.0
+    assert dict(properties) == {'charge': 5.0} and len(properties) == 1
+    properties.update(charge=2.0)
+    assert particles[0].charge == 2.0
+    for label in ('mass', 'position'):
+        try:
+            properties[label] = 1.0
+            assert False
+        except KeyError:
+            pass
+    try:
+        del properties['charge']
+        assert False
+    except TypeError as e:
+        assert str(e) == 'The properties of a particle can not be removed.'
@@ -1,5 +1,5 @@
 import numpy as np
-from particles_mod.core import Particles
+from particles_mod.core import Particles, render_frames
 
 def test_particles():
     
@@ -104,5 +104,158 @@ def test_particles():
     ####################################################################################################
 
 
+
+def test_particles_from_arrays():
+    
+    # Test the creation of a Particles object from arrays without copies
+    ids = np.arange(4)
+    positions = np.random.rand(4, 3)
+    charges = np.array([1.0, -1.0, 1.0, -1.0])
+    particles = Particles.from_arrays(id=ids, position=positions, charge=charges)
+    assert particles.labels == ['id', 'position', 'charge']
+    assert particles.position is positions
+    assert particles.charge is charges
+    assert particles.get_numberparticles() == 4
+    ####################################################################################################
+
+    # Check the errors of the wrong lengths and repeated ids
+    try:
+        Particles.from_arrays(id=ids, position=positions[:3])
+        assert False
+    except ValueError as e:
+        assert str(e) == 'All the properties must have the same length.'
+    try:
+        Particles.from_arrays(id=np.zeros(4, dtype=int), position=positions)
+        assert False
+    except ValueError as e:
+        assert str(e) == 'The ids must be unique.'
+    for wrong_positions in (positions[:, 0], positions[:, :2]):
+        try:
+            Particles.from_arrays(id=ids, position=wrong_positions)
+            assert False
+        except ValueError as e:
+            assert str(e) == f'The positions must have shape (nparticles, 3), got {wrong_positions.shape}.'
+    try:
+        Particles.from_arrays(id=ids, position=positions, charge=1.0)
+        assert False
+    except ValueError as e:
+        assert str(e) == "The property 'charge' must have one value per particle."
+    try:
+        Particles.from_arrays(id=ids, position=positions, charge=charges[:3])
+        assert False
+    except ValueError as e:
+        assert str(e) == 'All the properties must have the same length.'
+    ####################################################################################################
+
+    # Test the creation of a Particles object from a structured array
+    records = np.zeros(4, dtype=[('id', np.int64), ('position', np.float64, 3), ('mass', np.float64)])
+    records['id'] = ids
+    records['position'] = positions
+    records['mass'] = 2.0
+    particles = Particles.from_structured(records)
+    assert particles.labels == ['id', 'position', 'mass']
+    assert np.shares_memory(particles.position, records)
+    assert np.all(particles.position == positions)
+    assert np.all(particles.mass == 2.0)
+    ####################################################################################################
+
+    # The list constructor gives the same columns
+    data = [[i, p, c] for i, p, c in zip(ids, positions, charges)]
+    particles = Particles(['id', 'position', 'charge'], data)
+    assert np.all(particles.position == positions)
+    assert np.all(particles.charge == charges)
+    ####################################################################################################
+
+
+
+def test_particles_save_load(tmp_path):
+    
+    # Test the binary persistence of a Particles object
+    labels = ['id', 'position', 'property', 'material']
+    data = [[0, np.array([0.0, 0.0, 0.0]), 1.0, 'A'],
+            [1, np.array([1.0, 1.0, 1.0]), 2.0, 'B'],
+            [2, np.array([2.0, 2.0, 2.0]), 3.0, 'C']]
+    particles = Particles(labels, data)
+    path = tmp_path / 'particles.bin'
+    particles.save(path)
+
+    for mmap in (True, False):
+        loaded = Particles.load(path, mmap=mmap)
+        assert loaded.labels == labels
+        assert isinstance(loaded.position, np.memmap) == mmap
+        for label in labels:
+            column = getattr(loaded, label)
+            assert column.dtype == getattr(particles, label).dtype
+            assert np.all(column == getattr(particles, label))
+    ####################################################################################################
+
+    # Check the error for files of other formats
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'0' * 32)
+    try:
+        Particles.load(path)
+        assert False
+    except ValueError as e:
+        assert 'is not a Particles file' in str(e)
+    ####################################################################################################
+
+
+
+def test_particles_plot(tmp_path):
+    
+    # Test the in memory rendering of the plot method
+    particles = Particles.from_arrays(id=np.arange(1000), position=np.random.rand(1000, 3))
+    image = particles.plot(max_points=100, size=(320, 240))
+    assert image.startswith(b'\x89PNG')
+    ####################################################################################################
+
+    # Test the output file of the plot method
+    output_file = tmp_path / 'particles.png'
+    particles.plot(output_file, remove_file=False)
+    assert output_file.read_bytes().startswith(b'\x89PNG')
+    particles.plot(output_file)
+    assert not output_file.exists()
+    ####################################################################################################
+
+    # Test the rendering of several frames
+    frames = np.random.rand(3, 50, 3)
+    images = render_frames(frames, max_points=20)
+    assert len(images) == 3 and all(image.startswith(b'\x89PNG') for image in images)
+    paths = render_frames(frames, str(tmp_path / 'frame_{:03d}.png'))
+    assert paths[2] == str(tmp_path / 'frame_002.png')
+    assert (tmp_path / 'frame_002.png').exists()
+    ####################################################################################################
+
+
+
+def test_particles_subset():
     
-    
\ No newline at end of file
+    # Test the slice subsets, which share the arrays of the parent
+    positions = np.random.rand(10, 3)
+    particles = Particles.from_arrays(id=np.arange(10), position=positions, mass=np.ones(10))
+    subset = particles.subset(slice(2, 8, 2))
+    assert subset.parent is particles
+    assert np.all(subset.parent_index == [2, 4, 6])
+    assert np.shares_memory(subset.position, positions)
+    subset.mass[0] = 5.0
+    assert particles.mass[2] == 5.0
+    ####################################################################################################
+
+    # Test the mask and index subsets, and the subsets of subsets
+    mask = particles.position[:, 0] > 0.5
+    subset = particles.subset(mask)
+    assert np.all(subset.parent_index == np.flatnonzero(mask))
+    assert np.all(subset.position == positions[mask])
+    subset = particles.subset([9, 3, 5, 7]).subset([1, 3])
+    assert subset.parent is particles
+    assert np.all(subset.parent_index == [3, 7])
+    assert np.all(subset.id == [3, 7])
+    ####################################################################################################
+
+    # Check the error of repeated particles
+    try:
+        particles.subset([1, 1])
+        assert False
+    except ValueError as e:
+        assert str(e) == 'The selected particles must be different.'
+    ####################################################################################################
@@ -0,0 +1,61 @@
+import numpy as np
+from hydrodynamic_int.hessian import diagonalize_hessian
+from hydrodynamic_int.projection import ModeProjector
+
+def create_trajectory(nframes=500, nparticles=4):
+    '''
+    Create a random Hessian and a correlated random trajectory around a reference configuration.
+    '''
+    rng = np.random.default_rng(2)
+    matrix = rng.normal(size=(3*nparticles, 3*nparticles))
+    hessian = (matrix @ matrix.T).reshape(nparticles, 3, nparticles, 3).transpose(0, 2, 1, 3)
+    reference = rng.normal(size=(nparticles, 3))
+    noise = rng.normal(size=(nframes, nparticles, 3))
+    frames = np.empty_like(noise)
+    frames[0] = noise[0]
+    for t in range(1, nframes):
+        frames[t] = 0.8*frames[t-1] + noise[t]
+    return hessian, reference, frames + reference
+
+def test_mode_projector():
+    """
+    Test the streaming statistics against the statistics of the fully loaded trajectory.
+    """
+    hessian, reference, frames = create_trajectory()
+    _, eigenvectors, _, eigenvectors_reshaped = diagonalize_hessian(hessian)
+
+    # Reference statistics from the whole trajectory
+    amplitudes = (frames - reference).reshape(len(frames), -1) @ eigenvectors_reshaped
+    fluctuations = amplitudes - amplitudes.mean(axis=0)
+
+    output = np.empty_like(amplitudes)
+    projector = ModeProjector(eigenvectors, reference, chunk_size=64, max_lag=5).consume(frames, output)
+
+    assert projector.nframes == len(frames), f"Number of frames is incorrect: {projector.nframes}"
+    assert np.allclose(output, amplitudes), "Streamed amplitudes are incorrect"
+    assert np.allclose(projector.mean, amplitudes.mean(axis=0)), "Running mean is incorrect"
+    assert np.allclose(projector.variance, amplitudes.var(axis=0)), "Running variance is incorrect"
+
+    # check the autocorrelation at lag 3
+    lag = 3
+    head, tail = amplitudes[:-lag], amplitudes[lag:]
+    expected = np.mean(head*tail, axis=0) - head.mean(axis=0)*tail.mean(axis=0)
+    autocovariance = projector.autocorrelation(normalized=False)
+    assert np.allclose(autocovariance[lag], expected), "Autocovariance at lag 3 is incorrect"
+    assert np.allclose(projector.autocorrelation()[0], 1.0), "Normalized autocorrelation at lag 0 is not 1"
+    assert np.allclose(autocovariance[0], np.mean(fluctuations**2, axis=0)), "Autocovariance at lag 0 is not the variance"
+
+def test_mode_projector_iterator():
+    """
+    Test the projection of an iterator of frames and of a subset of modes.
+    """
+    hessian, reference, frames = create_trajectory(nframes=100)
+    _, eigenvectors, _, _ = diagonalize_hessian(hessian)
+
+    projector_array = ModeProjector(eigenvectors, reference, modes=[0, 1, 2], chunk_size=32, max_lag=4).consume(frames)
+    projector_iterator = ModeProjector(eigenvectors, reference, modes=[0, 1, 2], chunk_size=7, max_lag=4).consume(iter(frames))
+
+    assert projector_iterator.mean.shape == (3,), f"Mean has incorrect shape: {projector_iterator.mean.shape}"
+    assert np.allclose(projector_iterator.mean, projector_array.mean), "Iterator mean is incorrect"
+    assert np.allclose(projector_iterator.variance, projector_array.variance), "Iterator variance is incorrect"
+    assert np.allclose(projector_iterator.autocorrelation(), projector_array.autocorrelation()), "Iterator autocorrelation is incorrect"
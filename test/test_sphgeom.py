@@ -36,3 +36,58 @@ def test_sphere_geometry():
     assert positions.shape == (3, 3)
     assert np.all(np.linalg.norm(positions - center, axis=1) <= radius)
     ########################################################
+
+def test_sphere_geometry_placements():
+    '''
+    This function tests the Fibonacci and Poisson-disk placements of the SphereGeometry.
+    '''
+    n = 2000
+    particles = Particles.from_arrays(id=np.arange(n), position=np.zeros((n, 3)))
+    radius = 2.0
+    center = np.array([1.0, -1.0, 0.5])
+
+    # Fibonacci lattice: deterministic and quasi-uniform
+    sphere = SphereGeometry(radius, center, placement='fibonacci')
+    positions = sphere.get_positions(particles)
+    assert positions.shape == (n, 3)
+    assert np.allclose(np.linalg.norm(positions - center, axis=1), radius)
+    assert np.all(positions == sphere.get_positions(particles))
+    assert np.allclose(positions.mean(axis=0), center, atol=1e-2)
+
+    # Poisson-disk placement: minimum distance and reproducible with a seed
+    min_distance = 0.1
+    sphere = SphereGeometry(radius, center, placement='poisson', min_distance=min_distance, seed=1)
+    positions = sphere.get_positions(particles)
+    assert positions.shape == (n, 3)
+    assert np.allclose(np.linalg.norm(positions - center, axis=1), radius)
+    distances = np.linalg.norm(positions[:, None] - positions[None], axis=-1)
+    assert distances[np.triu_indices(n, 1)].min() >= min_distance
+    assert not np.all(positions == sphere.get_positions(particles))
+    same_seed = SphereGeometry(radius, center, placement='poisson', min_distance=min_distance, seed=1)
+    assert np.all(positions == same_seed.get_positions(particles))
+
+    # Too many particles for the minimum distance
+    try:
+        SphereGeometry(radius, center, placement='poisson', min_distance=1.0, seed=1).get_positions(particles)
+        assert False
+    except ValueError as e:
+        assert 'Could not place 2000 particles' in str(e)
+    try:
+        SphereGeometry(radius, center, placement='poisson')
+        assert False
+    except ValueError as e:
+        assert str(e) == "The 'poisson' placement needs a min_distance."
+
+def test_sphere_geometry_random_state():
+    '''
+    This function tests that the unseeded placements follow the global numpy random state.
+    '''
+    particles = Particles.from_arrays(id=np.arange(10), position=np.zeros((10, 3)))
+    sphere = SphereGeometry(1.0, np.zeros(3))
+    np.random.seed(3)
+    positions = sphere.get_positions(particles)
+    np.random.seed(3)
+    assert np.all(positions == sphere.get_positions(particles))
+    np.random.seed(3)
+    expected = np.random.normal(size=(10, 3))
+    assert np.allclose(positions, expected / np.linalg.norm(expected, axis=1)[:, np.newaxis])
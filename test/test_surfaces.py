@@ -0,0 +1,101 @@
+'''
+This is a file for testing the parametric surface structures.
+'''
+
+import numpy as np
+from particles_mod.ParametricSurface import ParametricSurface, flat_sheet, tube, spherical_cap, helicoid, load_structure
+from particles_mod.HalfPipe import HalfPipe
+
+def test_flat_sheet():
+    '''
+    Test the positions and bond counts of an open surface.
+    '''
+    nx, ny = 4, 6
+    sheet = flat_sheet(3.0, 5.0, nx, ny)
+    positions, bonds = sheet.construct()
+
+    assert positions.shape == (nx*ny, 3)
+    assert np.allclose(positions[:, 2], 0.0)
+    # the particle row_id * ny + column_id is at the row_id-th x and the column_id-th y
+    assert np.allclose(positions[ny + 2], [1.0, 2.0, 0.0])
+
+    # same counts as the half-pipe stencils
+    assert bonds['pairbonds'].nbonds == 4*nx*ny - 3*nx - 3*ny + 2
+    assert bonds['anglebonds'].nbonds == 2*(nx*ny - nx - ny)
+    # unit squares: sides of length 1 and diagonals of length sqrt(2)
+    assert np.allclose(np.sort(np.unique(np.round(bonds['pairbonds'].columns['r0'], 8))), [1.0, np.sqrt(2)])
+    assert np.allclose(bonds['anglebonds'].columns['theta0'], np.pi)
+
+def test_tube():
+    '''
+    Test that a periodic surface bonds the last row with the first one.
+    '''
+    ny, ntheta = 5, 8
+    surface = tube(4.0, 1.0, ny, ntheta)
+    positions, bonds = surface.construct()
+
+    # all particles at unit distance from the axis
+    assert np.allclose(np.sqrt(positions[:, 0]**2 + (positions[:, 2] - 1.0)**2), 1.0)
+    # periodic rows: horizontal, vertical and two diagonals per cell with every row anchoring cells
+    assert bonds['pairbonds'].nbonds == ntheta*(ny - 1) + ntheta*ny + 2*ntheta*(ny - 1)
+    assert bonds['anglebonds'].nbonds == ntheta*(ny - 2) + ntheta*ny
+    # the last row is bonded to the first one
+    pairs = set(zip(bonds['pairbonds'].columns['id_i'].tolist(), bonds['pairbonds'].columns['id_j'].tolist()))
+    assert ((ntheta - 1)*ny, 0) in pairs
+    # no degenerate bonds
+    assert np.all(bonds['pairbonds'].columns['r0'] > 0)
+
+def test_other_presets():
+    '''
+    Test the spherical cap and helicoid presets.
+    '''
+    cap = spherical_cap(2.0, np.pi/3, 5, 12)
+    positions, bonds = cap.construct()
+    assert np.allclose(np.linalg.norm(positions, axis=1), 2.0)
+    assert np.all(bonds['pairbonds'].columns['r0'] > 0)
+
+    surface = helicoid(1.0, 2.0, 1.5, 30, 4)
+    positions, bonds = surface.construct()
+    assert positions.shape == (120, 3)
+    assert np.isclose(positions[:, 2].max(), 2.0*1.5)
+    assert np.all(bonds['pairbonds'].columns['r0'] > 0)
+
+def test_halfpipe_preset():
+    '''
+    Test that HalfPipe is the cylinder sector preset of ParametricSurface.
+    '''
+    half_pipe = HalfPipe(10.0, 5.0, np.pi/2)
+    assert isinstance(half_pipe, ParametricSurface)
+    assert (half_pipe.nu, half_pipe.nv) == (half_pipe.ntheta, half_pipe.ny)
+
+    surface = ParametricSurface(lambda u, v: (5.0*np.sin(u), v, 5.0*(1 - np.cos(u))), half_pipe.ntheta, half_pipe.ny, (-np.pi/2, np.pi/2), (0.0, 10.0))
+    assert np.allclose(surface.generate_positions(), half_pipe.generate_positions())
+    assert np.array_equal(surface.pairbond_indices(), half_pipe.pairbond_indices())
+
+def test_streaming_export(tmp_path):
+    '''
+    Test that the band by band export reproduces the in-memory construction.
+    '''
+    for surface in [HalfPipe(10.0, 5.0, np.pi/2), tube(4.0, 1.0, 5, 8)]:
+        positions, bonds = surface.construct()
+        for band_rows in [1, 3, surface.nu]:
+            directory = tmp_path / f'structure_{surface.nparticles}_{band_rows}'
+            surface.export(str(directory), band_rows=band_rows)
+            loaded_positions, loaded_bonds = load_structure(str(directory))
+
+            assert isinstance(loaded_positions, np.memmap)
+            assert np.array_equal(loaded_positions, positions)
+            for name, table in bonds.items():
+                assert loaded_bonds[name]['type'] == table['type']
+                for label in table.labels:
+                    assert np.allclose(loaded_bonds[name].columns[label], table.columns[label]), f'{name} {label} is incorrect for bands of {band_rows} rows'
+
+def test_package_namespace():
+    '''
+    Test that only the public surface API is exported to the particles_mod namespace.
+    '''
+    import particles_mod
+    for name in ['ParametricSurface', 'load_structure', 'flat_sheet', 'tube', 'spherical_cap', 'helicoid']:
+        assert hasattr(particles_mod, name)
+    for name in ['json', 'os', 'NpyWriter', 'PAIR_STENCILS', 'ANGLE_STENCILS']:
+        assert not hasattr(particles_mod, name), f'{name} leaked into the particles_mod namespace'
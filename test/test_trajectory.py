@@ -0,0 +1,85 @@
+'''
+This script tests the Trajectory class.
+'''
+
+import numpy as np
+from particles_mod.core import Trajectory
+
+def center_of_mass(positions):
+    return positions.mean(axis=0)
+
+def test_trajectory(tmp_path):
+    '''
+    This function tests the creation, appending and slicing of a trajectory.
+    '''
+    path = tmp_path / 'trajectory.bin'
+    frames = np.random.rand(10, 4, 3)
+    trajectory = Trajectory.create(path, 4)
+    assert len(trajectory) == 0
+    trajectory.append(frames[0])
+    trajectory.append(frames[1:])
+    assert len(trajectory) == 10
+    assert np.all(trajectory[3] == frames[3])
+    assert np.all(trajectory[1:9:3] == frames[1:9:3])
+
+    # Readers see the appended frames
+    reader = Trajectory(path)
+    assert isinstance(reader.frames, np.memmap)
+    assert reader.frames.shape == (10, 4, 3)
+    assert np.all(np.stack(list(reader)) == frames)
+    try:
+        reader.append(frames[0])
+        assert False
+    except ValueError as e:
+        assert str(e) == 'The trajectory was opened read only.'
+
+    # Readers opened before the writer appends see the new frames
+    more_frames = np.random.rand(3, 4, 3)
+    trajectory.append(more_frames)
+    assert reader.nframes == 10
+    assert np.all(reader[11] == more_frames[1])
+    assert len(reader) == 13
+    assert np.all(reader[10:] == more_frames)
+    trajectory.append(frames[0])
+    assert reader.refresh() == 1
+    assert np.all(np.stack(list(reader))[-1] == frames[0])
+    empty_reader = Trajectory(Trajectory.create(tmp_path / 'empty.bin', 4).path)
+    Trajectory(tmp_path / 'empty.bin', 'r+').append(frames[:2])
+    assert len(empty_reader) == 2 and isinstance(empty_reader.frames, np.memmap)
+
+    # Iterating reads the header once, unless the appended frames are followed
+    writer = Trajectory(tmp_path / 'empty.bin', 'r+')
+    iterated = []
+    for frame in empty_reader:
+        if not iterated:
+            writer.append(frames[2])
+        iterated.append(frame)
+    assert len(iterated) == 2
+    iterated = []
+    for frame in empty_reader.iterate(follow=True):
+        if len(iterated) == 2:
+            writer.append(frames[3])
+        iterated.append(frame)
+    assert np.all(np.stack(iterated) == frames[:4])
+
+    try:
+        trajectory.append(np.zeros((5, 3)))
+        assert False
+    except ValueError as e:
+        assert str(e) == 'The frames must have shape (4, 3).'
+
+def test_trajectory_map_frames(tmp_path):
+    '''
+    This function tests the per frame computations of a trajectory.
+    '''
+    path = tmp_path / 'trajectory.bin'
+    frames = np.random.rand(50, 6, 3)
+    trajectory = Trajectory.create(path, 6)
+    trajectory.append(frames)
+
+    expected = frames.mean(axis=1)
+    results = trajectory.map_frames(center_of_mass, tmp_path / 'com.npy', chunk_size=7)
+    assert np.allclose(results, expected)
+    results = trajectory.map_frames(center_of_mass, tmp_path / 'com_parallel.npy', workers=2, chunk_size=7, step=2)
+    assert np.allclose(results, expected[::2])
+    assert np.allclose(np.load(tmp_path / 'com_parallel.npy'), expected[::2])